@@ -0,0 +1,109 @@
+import re
+import threading
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+from config.settings import settings
+from schemas.candidate_selection import CandidateSelection
+from schemas.game_entity import GameEntity
+from utils.logger import get_logger
+from utils.text import normalize_keyword
+
+logger = get_logger(__name__)
+
+# 用户问的是系列 / 全部作品时，即使标题完全匹配也交给 LLM 判断；
+# 英文按词边界匹配（避免 "fall guys"、"call of duty" 误判），中文没有词边界，按子串匹配
+SERIES_PATTERN = re.compile(r"系列|全部|所有|合集|三部曲|\b(?:series|trilogy|collection|all)\b")
+
+
+class CandidateRanker:
+    """
+    候选快速通道：按标题相似度与 DLC 类型对搜索结果本地打分。
+    答案明确（只剩一个候选，或恰有一个类型正确的标题完全匹配）时直接给出 CandidateSelection，
+    否则只把得分最高的 top_k 个候选交给 LLM。
+    """
+
+    def __init__(self, top_k: Optional[int] = None, min_score: Optional[float] = None):
+        """
+        min_score: 只剩一个候选时，标题相似度至少达到该值才直接选择，否则仍交给 LLM
+        """
+        self.top_k = top_k or settings.SELECTOR_TOP_K
+        self.min_score = settings.SELECTOR_MIN_SCORE if min_score is None else min_score
+        self._lock = threading.Lock()
+        self._stats = {"ranked": 0, "short_circuited": 0, "pruned": 0}
+
+    def rank(
+        self,
+        user_query: str,
+        entity: Optional[GameEntity],
+        candidates: List[Dict],
+    ) -> Tuple[Optional[CandidateSelection], List[Dict]]:
+        """返回 (直接选择结果或 None, 交给 LLM 的候选列表)"""
+        if not candidates or entity is None:
+            return None, candidates
+
+        target = normalize_keyword(entity.game_name)
+        # 按 DLC 过滤；过滤后为空说明类型信息不可靠，保留全部候选
+        wanted = "dlc" if entity.is_dlc else "game"
+        typed = [c for c in candidates if c.get("type", "game") == wanted] or candidates
+
+        scored = sorted(
+            ((_similarity(target, c.get("title", "")), index, c) for index, c in enumerate(typed)),
+            key=lambda item: (-item[0], item[1]),
+        )
+        selection = self._unambiguous(user_query, target, typed, scored)
+        pruned = [c for _, _, c in scored[:self.top_k]]
+
+        with self._lock:
+            self._stats["ranked"] += 1
+            if selection is not None:
+                self._stats["short_circuited"] += 1
+            else:
+                self._stats["pruned"] += len(candidates) - len(pruned)
+
+        if selection is not None:
+            logger.info(f"Candidate ranker selected {selection.selected_ids} without LLM")
+        return selection, pruned
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["short_circuit_rate"] = (
+            stats["short_circuited"] / stats["ranked"] if stats["ranked"] else 0.0
+        )
+        return stats
+
+    def _unambiguous(
+        self,
+        user_query: str,
+        target: str,
+        typed: List[Dict],
+        scored: List[tuple],
+    ) -> Optional[CandidateSelection]:
+        if SERIES_PATTERN.search(normalize_keyword(user_query)):
+            return None
+
+        if len(typed) == 1 and scored[0][0] >= self.min_score:
+            candidate = typed[0]
+            return CandidateSelection(
+                selection_type="single",
+                selected_ids=[candidate["id"]],
+                reason=f"搜索结果中只有一个匹配的候选：{candidate.get('title', '')}",
+            )
+
+        exact = [c for score, _, c in scored if score == 1.0]
+        if len(exact) == 1:
+            return CandidateSelection(
+                selection_type="single",
+                selected_ids=[exact[0]["id"]],
+                reason=f"候选标题与游戏名完全一致：{exact[0].get('title', '')}",
+            )
+        return None
+
+
+def _similarity(target: str, title: str) -> float:
+    title = normalize_keyword(title)
+    if title == target:
+        return 1.0
+    # 完全一致之外的得分压到 1 以下，避免与精确匹配混淆
+    return min(SequenceMatcher(None, target, title).ratio(), 0.99)
@@ -1,24 +1,27 @@
 from langchain.agents import create_agent
 from langchain.messages import HumanMessage
 from schemas.candidate_selection import CandidateSelection
-from pathlib import Path
-from typing import Any, Dict, List
-import os
+from agent.encoding import encode_candidates
+from agent.llm_cache import StructuredOutputCache
+from agent.prompts import load_prompt
+from typing import Any, Dict, List, Optional
 
 from utils.logger import get_logger
+from utils.tracing import TracedAgent
 
 logger = get_logger(__name__)
 
 class CandidateSelectorAgent:
-    def __init__(self, llm: Any):
-        prompt_path = os.path.join(os.path.dirname(__file__), "..", "prompts", "candidate_selector.txt")
-        prompt_text = Path(prompt_path).read_text(encoding="utf-8")
+    def __init__(self, llm: Any, cache: Optional[StructuredOutputCache] = None):
+        prompt_text = load_prompt("candidate_selector")
         agent = create_agent(
             model=llm,
             system_prompt=prompt_text,
             response_format=CandidateSelection
         )
-        self.agent = agent
+        if cache is not None:
+            agent = cache.wrap(agent, llm, prompt_text, CandidateSelection)
+        self.agent = TracedAgent(agent, "selector", prompt_text)
         
     def select(self, user_query: str,candidates: List[Dict]) -> CandidateSelection:
         """
@@ -26,7 +29,7 @@ class CandidateSelectorAgent:
         """
         try:
             result = self.agent.invoke({"messages":
-                HumanMessage(f"User query: {user_query}\nCandidates: {candidates}")})
+                HumanMessage(f"User query: {user_query}\nCandidates: {encode_candidates(candidates)}")})
         except Exception as e:
             raise RuntimeError(f"Error during CandidateSelectorAgent making: {str(e)}") from e
         
@@ -34,3 +37,15 @@ class CandidateSelectorAgent:
         logger.info(f"Candidate selection: {structured_response}")
 
         return structured_response
+
+    async def aselect(self, user_query: str, candidates: List[Dict]) -> CandidateSelection:
+        try:
+            result = await self.agent.ainvoke({"messages":
+                HumanMessage(f"User query: {user_query}\nCandidates: {encode_candidates(candidates)}")})
+        except Exception as e:
+            raise RuntimeError(f"Error during CandidateSelectorAgent making: {str(e)}") from e
+
+        structured_response = result.get("structured_response", {})
+        logger.info(f"Candidate selection: {structured_response}")
+
+        return structured_response
@@ -1,36 +1,226 @@
 from langchain.agents import create_agent
 from langchain.messages import HumanMessage
 from schemas.price_result import PriceInfo
-from schemas.purchase_decision import PurchaseDecision
-from pathlib import Path
-from typing import Any
-import os
+from schemas.purchase_decision import PurchaseDecision, PurchaseDecisionBatch
+from schemas.steam_result import SteamInfo
+from config.settings import settings
+from agent.encoding import encode_payload
+from agent.llm_cache import StructuredOutputCache
+from agent.prompts import load_prompt
+from typing import Any, Callable, Optional
 
 from utils.logger import get_logger
+from utils.tracing import TracedAgent
 
 logger = get_logger(__name__)
 
+BATCH_INSTRUCTION = """
+
+You may receive a JSON array of price information objects instead of a single one.
+In that case, return one decision per array element in the "decisions" field, in the same order."""
+
+
 class PurchaseDecisionAgent:
-    def __init__(self, llm: Any):
-        prompt_path = os.path.join(os.path.dirname(__file__), "..", "prompts", "decision.txt")
-        prompt_text = Path(prompt_path).read_text(encoding="utf-8")
+    def __init__(self, llm: Any, cache: Optional[StructuredOutputCache] = None):
+        prompt_text = load_prompt("decision")
         agent = create_agent(
             model=llm,
             system_prompt=prompt_text,
             response_format=PurchaseDecision
         )
-        self.agent = agent
-        
-    def decide(self, price_infos: list[PriceInfo]) -> dict:
+        if cache is not None:
+            agent = cache.wrap(agent, llm, prompt_text, PurchaseDecision)
+        self.agent = TracedAgent(agent, "decision", prompt_text)
+        batch_agent = create_agent(
+            model=llm,
+            system_prompt=prompt_text + BATCH_INSTRUCTION,
+            response_format=PurchaseDecisionBatch
+        )
+        if cache is not None:
+            batch_agent = cache.wrap(batch_agent, llm, prompt_text + BATCH_INSTRUCTION, PurchaseDecisionBatch)
+        self.batch_agent = TracedAgent(batch_agent, "decision_batch", prompt_text + BATCH_INSTRUCTION)
+
+    def decide(
+        self,
+        price_infos: list[PriceInfo],
+        mode: Optional[str] = None,
+        on_decision: Optional[Callable[[int, PurchaseDecision], None]] = None,
+        steam_infos: Optional[list[Optional[SteamInfo]]] = None,
+        histories: Optional[list[Optional[dict]]] = None
+    ) -> list:
+        """
+        mode: sequential / batched / concurrent，默认取 settings.DECISION_MODE。
+        batched 与 concurrent 模式下单条失败不影响其他结果，失败项返回置信度为 0 的 wait。
+        on_decision: 每得到一条决策即回调 (下标, 决策)，用于流式输出
+        steam_infos: 与 price_infos 一一对应的 Steam 元数据（可为 None），作为决策参考
+        histories: 与 price_infos 一一对应的本地价格历史概况（可为 None），见 tools.price_history
+        """
+        inputs = self._inputs(price_infos, steam_infos, histories)
+        mode = mode or settings.DECISION_MODE
+        if mode == "batched":
+            return _notify(self._decide_batched(inputs), on_decision)
+        if mode == "concurrent":
+            return _notify(self._decide_concurrent(inputs), on_decision)
+
+        structured_responses = []
+        for payload in inputs:
+            try:
+                result = self.agent.invoke(self._single_input(payload))
+            except Exception as e:
+                raise RuntimeError(f"Error during purchase decision making: {str(e)}") from e
+
+            structured_response = result.get("structured_response", {})
+            structured_responses.append(structured_response)
+            logger.info(f"Purchase decision: {structured_response}")
+            if on_decision is not None:
+                on_decision(len(structured_responses) - 1, structured_response)
+
+        return structured_responses
+
+    async def adecide(
+        self,
+        price_infos: list[PriceInfo],
+        mode: Optional[str] = None,
+        on_decision: Optional[Callable[[int, PurchaseDecision], None]] = None,
+        steam_infos: Optional[list[Optional[SteamInfo]]] = None,
+        histories: Optional[list[Optional[dict]]] = None
+    ) -> list:
+        inputs = self._inputs(price_infos, steam_infos, histories)
+        mode = mode or settings.DECISION_MODE
+        if mode == "batched":
+            return _notify(await self._adecide_batched(inputs), on_decision)
+        if mode == "concurrent":
+            return _notify(await self._adecide_concurrent(inputs), on_decision)
+
         structured_responses = []
-        for price_info in price_infos:
+        for payload in inputs:
             try:
-                result = self.agent.invoke({"messages":HumanMessage(price_info.model_dump_json())})
+                result = await self.agent.ainvoke(self._single_input(payload))
             except Exception as e:
                 raise RuntimeError(f"Error during purchase decision making: {str(e)}") from e
-            
+
             structured_response = result.get("structured_response", {})
             structured_responses.append(structured_response)
             logger.info(f"Purchase decision: {structured_response}")
+            if on_decision is not None:
+                on_decision(len(structured_responses) - 1, structured_response)
 
         return structured_responses
+
+    def _decide_concurrent(self, inputs: list[dict]) -> list:
+        if not inputs:
+            return []
+        results = self.agent.batch(
+            [self._single_input(payload) for payload in inputs],
+            config={"max_concurrency": settings.DECISION_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        return self._collect(results)
+
+    async def _adecide_concurrent(self, inputs: list[dict]) -> list:
+        if not inputs:
+            return []
+        results = await self.agent.abatch(
+            [self._single_input(payload) for payload in inputs],
+            config={"max_concurrency": settings.DECISION_MAX_CONCURRENCY},
+            return_exceptions=True
+        )
+        return self._collect(results)
+
+    def _decide_batched(self, inputs: list[dict]) -> list:
+        if not inputs:
+            return []
+        try:
+            result = self.batch_agent.invoke(self._batch_input(inputs))
+            decisions = self._unpack_batch(result, len(inputs))
+        except Exception as e:
+            logger.warning(f"Batched purchase decision failed, falling back to concurrent mode: {e}")
+            return self._decide_concurrent(inputs)
+
+        # 模型返回条数不足时，缺失部分逐条补齐
+        missing = len(inputs) - len(decisions)
+        if missing:
+            decisions.extend(self._decide_concurrent(inputs[-missing:]))
+        return decisions
+
+    async def _adecide_batched(self, inputs: list[dict]) -> list:
+        if not inputs:
+            return []
+        try:
+            result = await self.batch_agent.ainvoke(self._batch_input(inputs))
+            decisions = self._unpack_batch(result, len(inputs))
+        except Exception as e:
+            logger.warning(f"Batched purchase decision failed, falling back to concurrent mode: {e}")
+            return await self._adecide_concurrent(inputs)
+
+        missing = len(inputs) - len(decisions)
+        if missing:
+            decisions.extend(await self._adecide_concurrent(inputs[-missing:]))
+        return decisions
+
+    @staticmethod
+    def _inputs(
+        price_infos: list[PriceInfo],
+        steam_infos: Optional[list[Optional[SteamInfo]]],
+        histories: Optional[list[Optional[dict]]] = None
+    ) -> list[dict]:
+        """每条 PriceInfo 转为模型输入；有 Steam 元数据 / 本地价格历史时分别附在 steam / history 字段中"""
+        steam_infos = steam_infos or [None] * len(price_infos)
+        histories = histories or [None] * len(price_infos)
+        inputs = []
+        for price_info, steam_info, history in zip(price_infos, steam_infos, histories):
+            payload = price_info.model_dump(mode="json")
+            if steam_info is not None:
+                payload["steam"] = steam_info.model_dump(mode="json")
+            if history is not None:
+                payload["history"] = history
+            inputs.append(payload)
+        return inputs
+
+    @staticmethod
+    def _single_input(payload: dict) -> dict:
+        return {"messages": HumanMessage(encode_payload(payload))}
+
+    @staticmethod
+    def _batch_input(inputs: list[dict]) -> dict:
+        return {"messages": HumanMessage(encode_payload(inputs))}
+
+    @staticmethod
+    def _unpack_batch(result: dict, expected: int) -> list:
+        batch = result.get("structured_response")
+        if batch is None:
+            raise ValueError("Missing structured response for batched decision")
+        decisions = list(batch.decisions[:expected])
+        for decision in decisions:
+            logger.info(f"Purchase decision: {decision}")
+        return decisions
+
+    @staticmethod
+    def _collect(results: list) -> list:
+        structured_responses = []
+        for result in results:
+            if isinstance(result, Exception):
+                logger.error(f"Error during purchase decision making: {result}")
+                structured_responses.append(failed_decision(result))
+                continue
+
+            structured_response = result.get("structured_response", {})
+            structured_responses.append(structured_response)
+            logger.info(f"Purchase decision: {structured_response}")
+        return structured_responses
+
+
+def _notify(decisions: list, on_decision: Optional[Callable[[int, PurchaseDecision], None]]) -> list:
+    if on_decision is not None:
+        for i, decision in enumerate(decisions):
+            on_decision(i, decision)
+    return decisions
+
+
+def failed_decision(error: Exception) -> PurchaseDecision:
+    """单条决策失败时的占位结果，保证结果与输入一一对应"""
+    return PurchaseDecision(
+        recommendation="wait",
+        reason=f"决策失败：{error}",
+        confidence=0.0
+    )
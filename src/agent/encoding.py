@@ -0,0 +1,46 @@
+"""
+发送给 LLM 的输入编码。
+
+verbose（默认）：原有格式（候选为 Python repr，决策输入为带空格的完整 JSON）；
+compact：只保留模型需要的字段，去掉空值，JSON 不带多余空白，经 bench/prompt_encoding.py 对比后按部署开启。
+由 settings.PROMPT_ENCODING 切换，也可按调用显式指定。
+"""
+import json
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+
+ENCODINGS = ("compact", "verbose")
+CANDIDATE_FIELDS = ("id", "title", "type")
+
+
+def encode_candidates(candidates: List[Dict], encoding: Optional[str] = None) -> str:
+    """compact 时编码为 [{"id":"...","title":"...","type":"game"}]"""
+    if _encoding(encoding) == "verbose":
+        return str(candidates)
+    compact = [{field: candidate.get(field) for field in CANDIDATE_FIELDS} for candidate in candidates]
+    return json.dumps(compact, ensure_ascii=False, separators=(",", ":"))
+
+
+def encode_payload(payload: Any, encoding: Optional[str] = None) -> str:
+    """决策输入（单条 dict 或 dict 列表）；compact 时去掉 None、空列表与空对象"""
+    if _encoding(encoding) == "verbose":
+        return json.dumps(payload, ensure_ascii=False)
+    return json.dumps(_prune(payload), ensure_ascii=False, separators=(",", ":"))
+
+
+def _encoding(encoding: Optional[str]) -> str:
+    encoding = encoding or settings.PROMPT_ENCODING
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown prompt encoding: {encoding}")
+    return encoding
+
+
+def _prune(value: Any) -> Any:
+    if isinstance(value, dict):
+        pruned = {key: _prune(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, [], {})}
+    if isinstance(value, list):
+        # 列表元素保持位置（批量决策按顺序对应）
+        return [_prune(item) for item in value]
+    return value
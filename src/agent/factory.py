@@ -1,24 +1,64 @@
+from typing import Any, Optional
+
+from langchain_core.rate_limiters import BaseRateLimiter
 from langchain_deepseek import ChatDeepSeek
 
 from agent.game_entity_resolver import GameEntityResolver
+from agent.candidate_ranker import CandidateRanker
 from agent.candidate_selector import CandidateSelectorAgent
 from agent.decision import PurchaseDecisionAgent
-from config.settings import Settings
+from agent.llm_cache import create_llm_cache
+from agent.rule_engine import DecisionRuleEngine
+from config.settings import Settings, settings
+from utils.resilience import OutboundGuard, get_guard
+
+
+class GuardRateLimiter(BaseRateLimiter):
+    """把共享的 OutboundGuard 令牌桶接到 LangChain 聊天模型的 rate_limiter 上，指标记在 "llm" 名下"""
+
+    def __init__(self, guard: OutboundGuard):
+        self.guard = guard
+
+    def acquire(self, *, blocking: bool = True) -> bool:
+        self.guard.throttle()
+        return True
+
+    async def aacquire(self, *, blocking: bool = True) -> bool:
+        await self.guard.athrottle()
+        return True
 
 
 def create_llm():
+    # 重试由 DeepSeek（OpenAI 兼容）客户端自身完成，它同样遵循 Retry-After
+    rate_limiter = GuardRateLimiter(get_guard("llm", rate=settings.LLM_RPS)) if settings.LLM_RPS > 0 else None
     return ChatDeepSeek(
         model="deepseek-chat",
         temperature=0.2,
-        api_key=Settings.DEEPSEEK_API_KEY
+        api_key=Settings.DEEPSEEK_API_KEY,
+        max_retries=settings.LLM_MAX_RETRIES,
+        rate_limiter=rate_limiter
     )
 
 
-def create_agents():
-    llm = create_llm()
+def create_agents(enable_cache: Optional[bool] = None, llm: Any = None):
+    """
+    enable_cache: 是否启用 LLM 结构化输出缓存，默认取 settings.LLM_CACHE_ENABLED
+    llm: 使用给定的聊天模型（如基准测试中的模拟模型），默认新建 DeepSeek 客户端
+    """
+    if llm is None:
+        llm = create_llm()
+
+    if enable_cache is None:
+        enable_cache = settings.LLM_CACHE_ENABLED
+    cache = create_llm_cache() if enable_cache else None
 
-    return {
-        "resolver": GameEntityResolver(llm),
-        "selector": CandidateSelectorAgent(llm),
-        "decision": PurchaseDecisionAgent(llm),
+    agents = {
+        "resolver": GameEntityResolver(llm, cache),
+        "selector": CandidateSelectorAgent(llm, cache),
+        "decision": PurchaseDecisionAgent(llm, cache),
     }
+    if settings.SELECTOR_RANKER_ENABLED:
+        agents["ranker"] = CandidateRanker()
+    if settings.RULE_ENGINE_ENABLED:
+        agents["rules"] = DecisionRuleEngine()
+    return agents
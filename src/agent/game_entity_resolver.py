@@ -1,24 +1,26 @@
 from langchain.agents import create_agent
 from langchain.messages import HumanMessage
 from schemas.game_entity import GameEntity
-from pathlib import Path
-from typing import Any
+from agent.llm_cache import StructuredOutputCache
+from agent.prompts import load_prompt
+from typing import Any, Optional
 from config.settings import Settings
 from utils.logger import get_logger
-import os
+from utils.tracing import TracedAgent
 
 logger = get_logger(__name__)
 #查询游戏名称的实体解析器
 class GameEntityResolver:
-    def __init__(self, llm: Any):
-        prompt_path = os.path.join(os.path.dirname(__file__), "..", "prompts", "game_entity_resolver.txt")
-        prompt_text = Path(prompt_path).read_text(encoding="utf-8")
+    def __init__(self, llm: Any, cache: Optional[StructuredOutputCache] = None):
+        prompt_text = load_prompt("game_entity_resolver")
         agent = create_agent(
             model=llm,
             system_prompt=prompt_text,
             response_format=GameEntity
         )
-        self.agent = agent
+        if cache is not None:
+            agent = cache.wrap(agent, llm, prompt_text, GameEntity, semantic=True)
+        self.agent = TracedAgent(agent, "resolver", prompt_text)
         
     def resolve(self, user_query: str) -> GameEntity:
         try:
@@ -28,4 +30,14 @@ class GameEntityResolver:
         
         structured_response = result.get("structured_response", {})
         logger.info(f"Resolved game entity: {structured_response}")
-        return structured_response
\ No newline at end of file
+        return structured_response
+
+    async def aresolve(self, user_query: str) -> GameEntity:
+        try:
+            result = await self.agent.ainvoke({"messages":HumanMessage(user_query)})
+        except Exception as e:
+            raise RuntimeError(f"Error during game name recognition for query '{user_query}': {str(e)}") from e
+
+        structured_response = result.get("structured_response", {})
+        logger.info(f"Resolved game entity: {structured_response}")
+        return structured_response
@@ -0,0 +1,280 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, List, Optional, Type
+
+import numpy as np
+from pydantic import BaseModel
+
+from config.settings import settings
+from utils.cache import EVICTION_CHECK_INTERVAL, TwoTierCache
+from utils.logger import get_logger
+from utils.text import normalize_keyword
+
+logger = get_logger(__name__)
+
+
+class StructuredOutputCache:
+    """
+    LLM 结构化输出缓存：键由模型名、提示词哈希、响应 schema 与归一化输入组成，
+    值为校验后的 pydantic 对象（以 JSON 持久化，带 TTL 与容量上限）。
+
+    可选传入 embed_fn，为开启 semantic 的 agent 提供近似查询命中。
+    每个 scope 的向量最多保留 max_entries 条，对应缓存条目被淘汰或过期后向量一并删除。
+    """
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        ttl: float = 7 * 86400,
+        max_entries: int = 50000,
+        embed_fn: Optional[Callable[[str], List[float]]] = None,
+        similarity_threshold: float = 0.95,
+    ):
+        self.store = TwoTierCache(
+            "llm_structured_output",
+            path=path,
+            ttl=ttl,
+            max_entries=min(max_entries, 4096),
+            max_disk_entries=max_entries,
+        )
+        self.embed_fn = embed_fn
+        self.similarity_threshold = similarity_threshold
+        self.max_vectors = max_entries
+
+        self._lock = threading.Lock()
+        self._vectors: dict = {}
+        self._vector_sets = 0
+        if embed_fn is not None:
+            # 向量表与缓存共用同一个连接和锁
+            with self.store.locked_connection() as conn:
+                if conn is not None:
+                    conn.execute(
+                        "CREATE TABLE IF NOT EXISTS embeddings ("
+                        "scope TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, PRIMARY KEY (scope, key))"
+                    )
+                    dropped = []
+                    for scope, key, blob in conn.execute("SELECT scope, key, vector FROM embeddings").fetchall():
+                        dropped.extend(self._remember_vector(scope, key, np.frombuffer(blob, dtype=np.float32)))
+                    self._forget(dropped + self._stale_vectors(), conn)
+
+    def wrap(
+        self,
+        agent: Any,
+        llm: Any,
+        prompt_text: str,
+        schema: Type[BaseModel],
+        semantic: bool = False,
+    ) -> "CachedStructuredAgent":
+        return CachedStructuredAgent(agent, self, _scope(llm, prompt_text, schema), schema, semantic)
+
+    def get(self, scope: str, text: str, semantic: bool = False) -> Optional[dict]:
+        key = _key(scope, text)
+        value = self.store.get(key)
+        if value is not None or not semantic or self.embed_fn is None:
+            return value
+
+        similar_key = self._nearest(scope, text)
+        if similar_key is None:
+            return None
+        value = self.store.get(similar_key)
+        if value is None:
+            # 缓存条目已被淘汰或过期，向量随之删除
+            with self._lock, self.store.locked_connection() as conn:
+                self._forget([(scope, similar_key)], conn)
+        return value
+
+    def set(self, scope: str, text: str, value: BaseModel, semantic: bool = False) -> None:
+        key = _key(scope, text)
+        self.store.set(key, value.model_dump(mode="json"))
+        if semantic and self.embed_fn is not None:
+            vector = self._embed(text)
+            with self._lock, self.store.locked_connection() as conn:
+                dropped = self._remember_vector(scope, key, vector)
+                self._vector_sets += 1
+                if conn is not None:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO embeddings (scope, key, vector) VALUES (?, ?, ?)",
+                        (scope, key, vector.tobytes()),
+                    )
+                # 与持久层的容量淘汰同一节奏，清理缓存条目已不存在的向量
+                if self._vector_sets % EVICTION_CHECK_INTERVAL == 0:
+                    dropped.extend(self._stale_vectors())
+                self._forget(dropped, conn)
+
+    def stats(self) -> dict:
+        return self.store.stats()
+
+    def _nearest(self, scope: str, text: str) -> Optional[str]:
+        with self._lock:
+            keys, matrix = self._vectors.get(scope, ([], None))
+            if matrix is None or not keys:
+                return None
+            keys = list(keys)
+
+        scores = matrix @ self._embed(text)
+        best = int(np.argmax(scores))
+        if scores[best] < self.similarity_threshold:
+            return None
+        logger.info(f"LLM cache semantic hit (similarity={scores[best]:.3f})")
+        return keys[best]
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.asarray(self.embed_fn(normalize_keyword(text)), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remember_vector(self, scope: str, key: str, vector: np.ndarray) -> List[tuple]:
+        """加入向量，返回超出 max_vectors 被挤出的 (scope, key)（最早加入的先出）"""
+        keys, matrix = self._vectors.get(scope, ([], None))
+        if key in keys:
+            return []
+        keys.append(key)
+        matrix = vector[None, :] if matrix is None else np.vstack([matrix, vector])
+        overflow = len(keys) - self.max_vectors
+        dropped = [(scope, k) for k in keys[:overflow]] if overflow > 0 else []
+        if dropped:
+            keys, matrix = keys[overflow:], matrix[overflow:]
+        self._vectors[scope] = (keys, matrix)
+        return dropped
+
+    def _stale_vectors(self) -> List[tuple]:
+        """缓存条目已被淘汰或过期的向量 (scope, key)"""
+        live = self.store.live_keys()
+        return [(scope, key) for scope, (keys, _) in self._vectors.items() for key in keys if key not in live]
+
+    def _forget(self, scope_keys: List[tuple], conn: Optional[sqlite3.Connection]) -> None:
+        """从内存矩阵与向量表（conn 不为空时）中删除这些 (scope, key)；在 locked_connection 内调用"""
+        if not scope_keys:
+            return
+        by_scope: dict = {}
+        for scope, key in scope_keys:
+            by_scope.setdefault(scope, set()).add(key)
+        for scope, removed in by_scope.items():
+            keys, matrix = self._vectors.get(scope, ([], None))
+            keep = [i for i, key in enumerate(keys) if key not in removed]
+            if len(keep) == len(keys):
+                continue
+            if keep:
+                self._vectors[scope] = ([keys[i] for i in keep], matrix[keep])
+            else:
+                del self._vectors[scope]
+        if conn is not None:
+            conn.executemany("DELETE FROM embeddings WHERE scope = ? AND key = ?", scope_keys)
+
+
+class CachedStructuredAgent:
+    """
+    包装 create_agent 返回的 agent，对 invoke/ainvoke/batch/abatch 先查缓存。
+    仅缓存 structured_response，命中时返回 {"structured_response": obj}。
+    """
+
+    def __init__(self, agent: Any, cache: StructuredOutputCache, scope: str, schema: Type[BaseModel], semantic: bool):
+        self.agent = agent
+        self.cache = cache
+        self.scope = scope
+        self.schema = schema
+        self.semantic = semantic
+
+    def invoke(self, input: dict, config: Any = None, **kwargs) -> dict:
+        text = _input_text(input)
+        cached = self._lookup(text)
+        if cached is not None:
+            return cached
+
+        result = self.agent.invoke(input, config, **kwargs)
+        self._store(text, result)
+        return result
+
+    async def ainvoke(self, input: dict, config: Any = None, **kwargs) -> dict:
+        text = _input_text(input)
+        cached = self._lookup(text)
+        if cached is not None:
+            return cached
+
+        result = await self.agent.ainvoke(input, config, **kwargs)
+        self._store(text, result)
+        return result
+
+    def batch(self, inputs: List[dict], config: Any = None, *, return_exceptions: bool = False, **kwargs) -> list:
+        texts, results, misses = self._split(inputs)
+        if misses:
+            fresh = self.agent.batch(
+                [inputs[i] for i in misses], config, return_exceptions=return_exceptions, **kwargs
+            )
+            self._fill(texts, results, misses, fresh)
+        return results
+
+    async def abatch(self, inputs: List[dict], config: Any = None, *, return_exceptions: bool = False, **kwargs) -> list:
+        texts, results, misses = self._split(inputs)
+        if misses:
+            fresh = await self.agent.abatch(
+                [inputs[i] for i in misses], config, return_exceptions=return_exceptions, **kwargs
+            )
+            self._fill(texts, results, misses, fresh)
+        return results
+
+    def _split(self, inputs: List[dict]):
+        texts = [_input_text(item) for item in inputs]
+        results = [self._lookup(text) for text in texts]
+        misses = [i for i, result in enumerate(results) if result is None]
+        return texts, results, misses
+
+    def _fill(self, texts: List[str], results: list, misses: List[int], fresh: list) -> None:
+        for i, result in zip(misses, fresh):
+            results[i] = result
+            if not isinstance(result, Exception):
+                self._store(texts[i], result)
+
+    def _lookup(self, text: str) -> Optional[dict]:
+        value = self.cache.get(self.scope, text, semantic=self.semantic)
+        if value is None:
+            return None
+        try:
+            return {"structured_response": self.schema.model_validate(value)}
+        except ValueError:
+            logger.warning(f"Discarding invalid cached {self.schema.__name__} entry")
+            return None
+
+    def _store(self, text: str, result: dict) -> None:
+        structured_response = result.get("structured_response") if isinstance(result, dict) else None
+        if isinstance(structured_response, self.schema):
+            self.cache.set(self.scope, text, structured_response, semantic=self.semantic)
+
+
+def _scope(llm: Any, prompt_text: str, schema: Type[BaseModel]) -> str:
+    """模型名 + 提示词哈希 + schema 哈希，任一变化都会使旧缓存失效"""
+    model_name = getattr(llm, "model_name", None) or getattr(llm, "model", None) or type(llm).__name__
+    prompt_hash = hashlib.sha256(prompt_text.encode("utf-8")).hexdigest()[:16]
+    schema_json = json.dumps(schema.model_json_schema(), sort_keys=True)
+    schema_hash = hashlib.sha256(schema_json.encode("utf-8")).hexdigest()[:16]
+    return f"{model_name}|{prompt_hash}|{schema.__name__}:{schema_hash}"
+
+
+def _key(scope: str, text: str) -> str:
+    return hashlib.sha256(f"{scope}\n{normalize_keyword(text)}".encode("utf-8")).hexdigest()
+
+
+def _input_text(input: dict) -> str:
+    messages = input.get("messages")
+    if not isinstance(messages, list):
+        messages = [messages]
+    return "\n".join(str(getattr(message, "content", message)) for message in messages)
+
+
+def create_llm_cache() -> StructuredOutputCache:
+    embed_fn = None
+    if settings.LLM_CACHE_EMBEDDING_MODEL:
+        from langchain_ollama import OllamaEmbeddings
+
+        embed_fn = OllamaEmbeddings(model=settings.LLM_CACHE_EMBEDDING_MODEL).embed_query
+
+    return StructuredOutputCache(
+        path=os.path.join(settings.CACHE_DIR, "llm_cache.sqlite"),
+        ttl=settings.LLM_CACHE_TTL,
+        max_entries=settings.LLM_CACHE_MAX_ENTRIES,
+        embed_fn=embed_fn,
+        similarity_threshold=settings.LLM_CACHE_SIMILARITY,
+    )
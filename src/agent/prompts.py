@@ -0,0 +1,11 @@
+import os
+from functools import lru_cache
+from pathlib import Path
+
+PROMPT_DIR = os.path.join(os.path.dirname(__file__), "..", "prompts")
+
+
+@lru_cache(maxsize=None)
+def load_prompt(name: str) -> str:
+    """读取 prompts 目录下的提示词，进程内只读一次磁盘"""
+    return Path(os.path.join(PROMPT_DIR, f"{name}.txt")).read_text(encoding="utf-8")
@@ -0,0 +1,127 @@
+import threading
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from config.settings import settings
+from schemas.price_result import PriceInfo
+from schemas.purchase_decision import PurchaseDecision
+from schemas.steam_result import SteamInfo
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 评价在这些等级时，即使价格到了史低也交给 LLM 结合评价判断
+CAUTION_RATINGS = {"褒贬不一", "多半差评", "差评", "特别差评", "差评如潮"}
+
+
+@dataclass
+class DecisionRules:
+    # 当前价 <= 史低 * (1 + buy_margin) 时直接建议购买
+    buy_margin: float = 0.0
+    # 无折扣且史低比当前价低至少 wait_depth（比例）时直接建议等待
+    wait_depth: float = 0.5
+    buy_confidence: float = 0.95
+    wait_confidence: float = 0.85
+
+    @classmethod
+    def from_settings(cls) -> "DecisionRules":
+        return cls(
+            buy_margin=settings.RULE_BUY_MARGIN,
+            wait_depth=settings.RULE_WAIT_DEPTH,
+        )
+
+
+class DecisionRuleEngine:
+    """
+    决策快速通道：把所有 PriceInfo 作为 NumPy 数组一次性打分，
+    明确的情况直接给出 PurchaseDecision，只有模糊的情况交给 LLM。
+    """
+
+    def __init__(self, rules: Optional[DecisionRules] = None):
+        self.rules = rules or DecisionRules.from_settings()
+        self._lock = threading.Lock()
+        self._stats = {"evaluated": 0, "short_circuited": 0}
+
+    def evaluate(
+        self,
+        price_infos: List[PriceInfo],
+        steam_infos: Optional[Sequence[Optional[SteamInfo]]] = None,
+        histories: Optional[Sequence[Optional[dict]]] = None,
+    ) -> List[Optional[PurchaseDecision]]:
+        """
+        返回与输入等长的列表，无法判定的位置为 None。
+        steam_infos / histories 与 price_infos 按位置对应；"买入"只在评价已知且不偏负面、
+        本地价格历史中没有更低成交价时才直接给出，否则交给 LLM 综合判断
+        """
+        if not price_infos:
+            return []
+
+        rules = self.rules
+        current = np.fromiter((p.current_price for p in price_infos), dtype=np.float64, count=len(price_infos))
+        low = np.fromiter((p.historical_low for p in price_infos), dtype=np.float64, count=len(price_infos))
+        discount = np.fromiter((p.discount_percent for p in price_infos), dtype=np.int64, count=len(price_infos))
+
+        at_low = current <= low * (1 + rules.buy_margin)
+        buy = at_low & _neutral_context(price_infos, steam_infos, histories)
+        wait = ~at_low & (discount == 0) & (low <= current * (1 - rules.wait_depth))
+
+        decisions: List[Optional[PurchaseDecision]] = [None] * len(price_infos)
+        for i in np.flatnonzero(buy):
+            decisions[i] = PurchaseDecision(
+                recommendation="buy",
+                reason=f"当前价格 {current[i]:g} 已达到或低于史低 {low[i]:g}，是购买的好时机",
+                confidence=rules.buy_confidence
+            )
+        for i in np.flatnonzero(wait):
+            decisions[i] = PurchaseDecision(
+                recommendation="wait",
+                reason=f"当前无折扣，价格 {current[i]:g} 远高于史低 {low[i]:g}，建议等待打折",
+                confidence=rules.wait_confidence
+            )
+
+        short_circuited = int(buy.sum() + wait.sum())
+        with self._lock:
+            self._stats["evaluated"] += len(price_infos)
+            self._stats["short_circuited"] += short_circuited
+
+        logger.info(f"Rule engine decided {short_circuited}/{len(price_infos)} price infos without LLM")
+        return decisions
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["short_circuit_rate"] = (
+            stats["short_circuited"] / stats["evaluated"] if stats["evaluated"] else 0.0
+        )
+        return stats
+
+
+def _neutral_context(
+    price_infos: List[PriceInfo],
+    steam_infos: Optional[Sequence[Optional[SteamInfo]]],
+    histories: Optional[Sequence[Optional[dict]]],
+) -> np.ndarray:
+    """评价已知（不是暂无评价）且不在 CAUTION_RATINGS 中、价格历史（若有）最低价不低于当前价的位置为 True"""
+    steam_infos = steam_infos or [None] * len(price_infos)
+    histories = histories or [None] * len(price_infos)
+    neutral = np.zeros(len(price_infos), dtype=bool)
+    for i, (price_info, steam_info, history) in enumerate(zip(price_infos, steam_infos, histories)):
+        if steam_info is None or steam_info.recent_rating in CAUTION_RATINGS or steam_info.recent_rating == "暂无评价":
+            continue
+        if history and history.get("min_price") is not None and history["min_price"] < price_info.current_price:
+            continue
+        neutral[i] = True
+    return neutral
+
+
+def split_decisions(decisions: List[Optional[PurchaseDecision]], price_infos: List[PriceInfo]) -> List[PriceInfo]:
+    """取出规则引擎未能判定、需要交给 LLM 的 PriceInfo"""
+    return [price_info for price_info, decision in zip(price_infos, decisions) if decision is None]
+
+
+def merge_decisions(decisions: List[Optional[PurchaseDecision]], llm_decisions: list) -> list:
+    """按原顺序把 LLM 结果填回规则引擎留下的空位"""
+    llm_iter = iter(llm_decisions)
+    return [decision if decision is not None else next(llm_iter) for decision in decisions]
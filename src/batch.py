@@ -0,0 +1,217 @@
+"""
+批量查询：从文件或标准输入读取查询（每行一个，或 JSONL 的 {"query": ...}），
+去重后通过共享的编译图并发执行，每完成一个就写出一行 JSONL，最后输出吞吐与延迟汇总。
+
+启用检查点（--checkpoint 或 CHECKPOINT_ENABLED=1）后，每个查询按 (批次 id, 归一化查询) 得到固定的
+thread id；每个查询的结果写出后立即清理其检查点（不论整批是否成功），因此中断后用相同输入重跑时，
+只有未执行完的查询从最后完成的节点继续（图已执行完但结果未写出的直接复用），其余查询重新获取最新价格。
+
+用法（在 src 目录下）：
+    python main.py batch --input queries.txt --output results.jsonl --concurrency 16
+    python main.py batch --input queries.txt --output results.jsonl --checkpoint
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import sys
+import time
+from typing import IO, Iterable, List, Optional
+
+from config.settings import settings
+from utils.logger import setup_logging, get_logger
+from utils.serialization import to_jsonable
+from utils.stats import summarize_latencies
+from utils.text import normalize_keyword
+from utils.token_usage import usage_stats
+from utils.tracing import setup_tracing
+
+logger = get_logger(__name__)
+
+
+def read_queries(lines: Iterable[str]) -> List[str]:
+    """无法解析的 JSONL 行记录警告后跳过，不影响其余查询"""
+    queries = []
+    for lineno, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if line.startswith("{"):
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                logger.warning(f"Skipping malformed JSON on input line {lineno}: {e}")
+                continue
+            line = (record.get("query") or record.get("user_query") or "").strip()
+            if not line:
+                continue
+        queries.append(line)
+    return queries
+
+
+def dedupe_queries(queries: List[str]) -> dict:
+    """归一化后相同的查询只执行一次，返回 {代表查询: 出现次数}"""
+    unique: dict = {}
+    representative: dict = {}
+    for query in queries:
+        key = normalize_keyword(query)
+        if key not in representative:
+            representative[key] = query
+            unique[query] = 0
+        unique[representative[key]] += 1
+    return unique
+
+
+async def run_batch(
+    queries: List[str],
+    out: IO[str],
+    concurrency: int = 8,
+    runtime=None,
+    run_id: Optional[str] = None,
+) -> dict:
+    """
+    runtime.checkpointer 不为空时按检查点恢复；run_id 为批次 id，默认由去重后的查询列表计算。
+    每个查询的结果一经写出即删除其检查点，只有未执行完的查询会留到下次运行继续，
+    避免同样的输入在之后的运行中复用过期的价格
+    """
+    if runtime is None:
+        from runtime import get_runtime
+
+        runtime = get_runtime()
+    graph = runtime.graph
+    checkpointer = getattr(runtime, "checkpointer", None)
+    if checkpointer is not None:
+        from graph.checkpoint import thread_id_for
+
+    unique = dedupe_queries(queries)
+    run_id = run_id or _default_run_id(unique)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: List[float] = []
+    failed = 0
+    saved = {"completed": 0, "resumed": 0, "nodes": {}, "llm_calls": 0, "http_calls": 0}
+
+    async def run_one(query: str) -> dict:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                if checkpointer is None:
+                    state = await graph.ainvoke({"user_query": query})
+                    record = {"query": query, "ok": True, "state": to_jsonable(state)}
+                else:
+                    state, status = await _run_checkpointed(graph, query, run_id, saved)
+                    record = {"query": query, "ok": True, "state": to_jsonable(state), "checkpoint": status}
+            except Exception as e:
+                logger.error(f"Batch query failed: {query}: {e}")
+                record = {"query": query, "ok": False, "error": str(e)}
+            record["latency"] = time.perf_counter() - start
+            record["count"] = unique[query]
+            return record
+
+    batch_start = time.perf_counter()
+    tasks = [asyncio.create_task(run_one(query)) for query in unique]
+    for finished in asyncio.as_completed(tasks):
+        record = await finished
+        latencies.append(record["latency"])
+        if not record["ok"]:
+            failed += 1
+        out.write(json.dumps(record, ensure_ascii=False) + "\n")
+        out.flush()
+        if checkpointer is not None and record["ok"]:
+            await checkpointer.adelete_thread(thread_id_for(record["query"], run_id))
+    elapsed = time.perf_counter() - batch_start
+
+    summary = {
+        "queries": len(queries),
+        "unique_queries": len(unique),
+        "succeeded": len(unique) - failed,
+        "failed": failed,
+        "elapsed": elapsed,
+        "queries_per_second": len(unique) / elapsed if elapsed else 0.0,
+        "latency": summarize_latencies(latencies),
+        "llm_usage": usage_stats(),
+    }
+    if checkpointer is not None:
+        summary["checkpoint"] = {"run_id": run_id, "saved": saved}
+    return summary
+
+
+async def _run_checkpointed(graph, query: str, run_id: str, saved: dict) -> tuple:
+    """返回 (最终状态, completed / resumed / fresh)，并把跳过的工作累计到 saved"""
+    from graph.checkpoint import saved_work, thread_id_for
+
+    config = {"configurable": {"thread_id": thread_id_for(query, run_id)}}
+    snapshot = await graph.aget_state(config)
+    if not snapshot.values:
+        return await graph.ainvoke({"user_query": query}, config), "fresh"
+
+    status = "resumed" if snapshot.next else "completed"
+    work = saved_work(snapshot.values)
+    saved[status] += 1
+    saved["llm_calls"] += work["llm_calls"]
+    saved["http_calls"] += work["http_calls"]
+    for node in work["nodes"]:
+        saved["nodes"][node] = saved["nodes"].get(node, 0) + 1
+
+    if status == "completed":
+        return snapshot.values, status
+    # 输入为 None 时从最后一个检查点继续，只执行尚未完成的节点
+    return await graph.ainvoke(None, config), status
+
+
+def _default_run_id(unique: dict) -> str:
+    return hashlib.sha1("\n".join(sorted(unique)).encode("utf-8")).hexdigest()[:12]
+
+
+async def _run_and_close(
+    queries: List[str],
+    out: IO[str],
+    concurrency: int,
+    runtime=None,
+    run_id: Optional[str] = None,
+) -> dict:
+    from tools.http_client import aclose_async_client
+
+    try:
+        return await run_batch(queries, out, concurrency=concurrency, runtime=runtime, run_id=run_id)
+    finally:
+        await aclose_async_client()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Run many price queries through the graph")
+    parser.add_argument("--input", default="-", help="queries file (txt or jsonl), '-' for stdin")
+    parser.add_argument("--output", default="-", help="JSONL results file, '-' for stdout")
+    parser.add_argument("--concurrency", type=int, default=settings.BATCH_CONCURRENCY)
+    parser.add_argument("--checkpoint", action=argparse.BooleanOptionalAction, default=settings.CHECKPOINT_ENABLED,
+                        help="persist graph checkpoints so an interrupted run resumes where it stopped")
+    parser.add_argument("--run-id", help="batch id for checkpoints (default: derived from the query list)")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    setup_tracing()
+
+    if args.input == "-":
+        queries = read_queries(sys.stdin)
+    else:
+        with open(args.input, encoding="utf-8") as f:
+            queries = read_queries(f)
+
+    runtime = None
+    if args.checkpoint:
+        from graph.checkpoint import create_checkpointer
+        from runtime import SteamPriceRuntime
+
+        runtime = SteamPriceRuntime(checkpointer=create_checkpointer())
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        summary = asyncio.run(_run_and_close(queries, out, args.concurrency, runtime, args.run_id))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(json.dumps(summary, ensure_ascii=False, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
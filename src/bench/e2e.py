@@ -0,0 +1,295 @@
+"""
+端到端基准：启动本地 mock ITAD / Steam 服务与模拟聊天模型，以不同并发驱动编译后的图
+（build_graph().ainvoke）与同步 steam_price_workflow，输出吞吐（queries/s）、端到端延迟、
+各节点 / HTTP / LLM span 的延迟分布以及内存峰值，并可保存基线用于比较。
+
+不访问任何外部服务。用法（在 src 目录下）：
+    python -m bench.e2e --queries 200 --concurrency 1,8,32 --save-baseline .cache/bench/baseline.json
+    python -m bench.e2e --queries 200 --concurrency 1,8,32 --baseline .cache/bench/baseline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, SpanProcessor, TracerProvider
+
+from bench.fake_llm import FakeChatModel
+from bench.mock_services import start_mock_services
+from config.settings import settings
+from utils.logger import setup_logging, get_logger
+from utils.stats import summarize_latencies
+
+logger = get_logger(__name__)
+
+TARGETS = ("graph", "workflow")
+
+
+class SpanCollector(SpanProcessor):
+    """在内存中按 span 名称收集耗时（毫秒），每轮测量前 reset"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        with self._lock:
+            self.durations[span.name].append((span.end_time - span.start_time) / 1e6)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.durations = defaultdict(list)
+
+    def summary(self) -> Dict[str, dict]:
+        with self._lock:
+            return {name: summarize_latencies(samples) for name, samples in sorted(self.durations.items())}
+
+
+def install_span_collector() -> SpanCollector:
+    collector = SpanCollector()
+    provider = trace.get_tracer_provider()
+    if not isinstance(provider, TracerProvider):
+        provider = TracerProvider()
+        trace.set_tracer_provider(provider)
+    provider.add_span_processor(collector)
+    return collector
+
+
+def make_queries(count: int, unique: int) -> List[str]:
+    unique = max(1, min(unique, count))
+    return [f"Bench Query {i % unique}" for i in range(count)]
+
+
+def peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def _run_graph(graph, queries: List[str], concurrency: int) -> List[tuple]:
+    from tools.http_client import aclose_async_client
+
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(query: str) -> tuple:
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await graph.ainvoke({"user_query": query})
+                ok = True
+            except Exception as e:
+                logger.debug(f"Graph query failed: {query}: {e}")
+                ok = False
+            return ok, time.perf_counter() - start
+
+    try:
+        return await asyncio.gather(*(run_one(query) for query in queries))
+    finally:
+        await aclose_async_client()
+
+
+def _run_workflow(agents: dict, queries: List[str], concurrency: int) -> List[tuple]:
+    from workflow import steam_price_workflow
+
+    def run_one(query: str) -> tuple:
+        start = time.perf_counter()
+        try:
+            steam_price_workflow(query, agents=agents)
+            ok = True
+        except Exception as e:
+            logger.debug(f"Workflow query failed: {query}: {e}")
+            ok = False
+        return ok, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as executor:
+        return list(executor.map(run_one, queries))
+
+
+def run_once(target: str, concurrency: int, queries: List[str], graph, agents: dict) -> tuple:
+    start = time.perf_counter()
+    if target == "graph":
+        outcomes = asyncio.run(_run_graph(graph, queries, concurrency))
+    else:
+        outcomes = _run_workflow(agents, queries, concurrency)
+    return outcomes, time.perf_counter() - start
+
+
+def measure(
+    target: str,
+    concurrency: int,
+    queries: List[str],
+    graph,
+    agents: dict,
+    collector: SpanCollector,
+    llm: FakeChatModel,
+    servers: tuple,
+) -> dict:
+    collector.reset()
+    llm_calls = llm.calls
+    http_requests = sum(server.stats["requests"] for server in servers)
+
+    outcomes, elapsed = run_once(target, concurrency, queries, graph, agents)
+
+    failed = sum(1 for ok, _ in outcomes if not ok)
+    return {
+        "target": target,
+        "concurrency": concurrency,
+        "queries": len(queries),
+        "failed": failed,
+        "elapsed": elapsed,
+        "queries_per_second": len(queries) / elapsed if elapsed else 0.0,
+        "latency": summarize_latencies([latency * 1000 for _, latency in outcomes]),
+        "spans": collector.summary(),
+        "llm_calls": llm.calls - llm_calls,
+        "http_requests": sum(server.stats["requests"] for server in servers) - http_requests,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def compare(results: List[dict], baseline: dict, tolerance: float) -> List[str]:
+    """与基线逐项比较，返回超出容差的回归描述（吞吐下降或 p95 上升）"""
+    previous = {(r["target"], r["concurrency"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        key = (result["target"], result["concurrency"])
+        before = previous.get(key)
+        if before is None:
+            continue
+        qps_change = _change(result["queries_per_second"], before["queries_per_second"])
+        p95_change = _change(result["latency"]["p95"], before["latency"]["p95"])
+        print(
+            f"{result['target']:<10}{result['concurrency']:>6}  "
+            f"qps {before['queries_per_second']:.1f} -> {result['queries_per_second']:.1f} ({qps_change:+.1%})  "
+            f"p95 {before['latency']['p95']:.1f} -> {result['latency']['p95']:.1f}ms ({p95_change:+.1%})"
+        )
+        if qps_change < -tolerance:
+            regressions.append(f"{key}: throughput {qps_change:+.1%}")
+        if p95_change > tolerance:
+            regressions.append(f"{key}: p95 latency {p95_change:+.1%}")
+    return regressions
+
+
+def _change(current: float, previous: float) -> float:
+    return (current - previous) / previous if previous else 0.0
+
+
+def print_result(result: dict, show_spans: bool) -> None:
+    latency = result["latency"]
+    rss = result["peak_rss_mb"]
+    print(
+        f"{result['target']:<10}{result['concurrency']:>6}{result['queries_per_second']:>10.1f}"
+        f"{latency['p50']:>10.1f}{latency['p95']:>10.1f}{latency['p99']:>10.1f}"
+        f"{result['failed']:>8}{result['llm_calls']:>8}{result['http_requests']:>8}"
+        f"{(f'{rss:.0f}' if rss is not None else '-'):>10}"
+    )
+    if show_spans:
+        for name, stats in result["spans"].items():
+            print(f"    {name:<44}{stats['count']:>8}{stats['p50']:>10.1f}{stats['p95']:>10.1f}{stats['p99']:>10.1f}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end benchmark against local mock services")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--unique", type=int, default=None, help="number of distinct queries (default: all distinct)")
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated concurrency levels")
+    parser.add_argument("--targets", default=",".join(TARGETS), help="graph, workflow or both")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--http-latency", type=float, default=0.02, help="mock upstream latency (s)")
+    parser.add_argument("--http-error-rate", type=float, default=0.0)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="fake LLM mean latency (s)")
+    parser.add_argument("--llm-jitter", type=float, default=0.05)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--catalog-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--spans", action="store_true", help="print per-span latency distributions")
+    parser.add_argument("--output", help="write full results as JSON")
+    parser.add_argument("--save-baseline", help="save results as a baseline JSON file")
+    parser.add_argument("--baseline", help="compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="allowed relative regression")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    collector = install_span_collector()
+
+    itad, steam = start_mock_services(args.http_latency, args.http_error_rate, args.catalog_size, args.seed)
+    settings.ITAD_BASE_URL = itad.base_url
+    settings.STEAM_STORE_BASE_URL = steam.base_url
+    settings.ITAD_API_KEY = settings.ITAD_API_KEY or "bench"
+    # 关闭本地缓存、标题索引、appid 映射索引与 Steam 快照，保证每次查询都走完整链路
+    settings.SEARCH_CACHE_ENABLED = False
+    settings.TITLE_INDEX_PATH = ""
+    settings.APP_ID_MAP_ENABLED = False
+    settings.STEAM_CATALOG_ENABLED = False
+
+    from agent.factory import create_agents
+    from graph.steam_price_graph import build_graph
+
+    llm = FakeChatModel(
+        latency=args.llm_latency,
+        jitter=args.llm_jitter,
+        error_rate=args.llm_error_rate,
+        seed=args.seed,
+    )
+    agents = create_agents(enable_cache=False, llm=llm)
+    graph = build_graph(agents)
+
+    queries = make_queries(args.queries, args.unique or args.queries)
+    levels = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    targets = [target.strip() for target in args.targets.split(",") if target.strip() in TARGETS]
+
+    results = []
+    try:
+        if args.warmup:
+            for target in targets:
+                run_once(target, 1, queries[:args.warmup], graph, agents)
+
+        print(f"{'target':<10}{'conc':>6}{'qps':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+              f"{'failed':>8}{'llm':>8}{'http':>8}{'rss MB':>10}")
+        for target in targets:
+            for concurrency in levels:
+                result = measure(target, concurrency, queries, graph, agents, collector, llm, (itad, steam))
+                results.append(result)
+                print_result(result, args.spans)
+    finally:
+        itad.stop()
+        steam.stop()
+
+    report = {
+        "config": {key: value for key, value in vars(args).items() if key not in ("output", "save_baseline", "baseline")},
+        "settings": {"DECISION_MODE": settings.DECISION_MODE, "RULE_ENGINE_ENABLED": settings.RULE_ENGINE_ENABLED,
+                     "SELECTOR_RANKER_ENABLED": settings.SELECTOR_RANKER_ENABLED,
+                     "META_ENABLED": settings.META_ENABLED, "PRICE_BATCHING_ENABLED": settings.PRICE_BATCHING_ENABLED},
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    for path in filter(None, (args.output, args.save_baseline)):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        print(f"\ncompared with baseline {args.baseline} ({baseline.get('created_at', '?')}):")
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print("\nregressions beyond tolerance:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
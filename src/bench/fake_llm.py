@@ -0,0 +1,132 @@
+"""
+基准测试用的模拟聊天模型：不访问网络，按 create_agent 绑定的结构化输出工具
+（GameEntity / CandidateSelection / PurchaseDecision / PurchaseDecisionBatch）直接返回工具调用，
+并可配置延迟与错误率。
+"""
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, List, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+_ID_PATTERN = re.compile(r"""["']id["']\s*:\s*["']([^"']+)["']""")
+
+
+class FakeChatModel(BaseChatModel):
+    latency: float = 0.0
+    jitter: float = 0.0
+    error_rate: float = 0.0
+    seed: int = 0
+    # 粗略估算 token 用量，便于 tracing 中的 usage 属性有值；report_usage=False 时不返回用量（走本地估算）
+    chars_per_token: int = 4
+    report_usage: bool = True
+    # 每千个输入 token 额外增加的延迟（秒），模拟 prefill 开销随提示词长度增长
+    input_token_latency: float = 0.0
+
+    _rng: random.Random = PrivateAttr()
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _calls: int = PrivateAttr(default=0)
+
+    def __init__(self, **data: Any):
+        super().__init__(**data)
+        self._rng = random.Random(self.seed)
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-bench"
+
+    @property
+    def calls(self) -> int:
+        return self._calls
+
+    def bind_tools(self, tools: list, *, tool_choice: Any = None, **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        delay, fail = self._next_call(messages)
+        if delay:
+            time.sleep(delay)
+        return self._respond(messages, kwargs.get("tools") or [], fail)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Any = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        delay, fail = self._next_call(messages)
+        if delay:
+            await asyncio.sleep(delay)
+        return self._respond(messages, kwargs.get("tools") or [], fail)
+
+    def _next_call(self, messages: List[BaseMessage]) -> tuple:
+        prefill = self.input_token_latency * self._input_tokens(messages) / 1000
+        with self._lock:
+            self._calls += 1
+            delay = max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter)) + prefill
+            return delay, self._rng.random() < self.error_rate
+
+    def _input_tokens(self, messages: List[BaseMessage]) -> int:
+        return sum(len(str(m.content)) for m in messages) // self.chars_per_token
+
+    def _respond(self, messages: List[BaseMessage], tools: list, fail: bool) -> ChatResult:
+        if fail:
+            raise RuntimeError("Injected fake LLM failure")
+
+        query = next((str(m.content) for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        tool_name = tools[0]["function"]["name"] if tools else ""
+        args = _structured_args(tool_name, query)
+        if args is None:
+            message = AIMessage(content="ok")
+        else:
+            message = AIMessage(
+                content="",
+                tool_calls=[{"name": tool_name, "args": args, "id": f"call_{uuid.uuid4().hex[:12]}"}],
+            )
+
+        if self.report_usage:
+            input_tokens = self._input_tokens(messages)
+            output_tokens = len(json.dumps(args or {}, ensure_ascii=False)) // self.chars_per_token
+            message.usage_metadata = {
+                "input_tokens": input_tokens,
+                "output_tokens": output_tokens,
+                "total_tokens": input_tokens + output_tokens,
+            }
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def _structured_args(tool_name: str, query: str) -> Optional[dict]:
+    if tool_name == "GameEntity":
+        return {"game_name": query.strip(), "is_dlc": False, "confidence": 0.9}
+    if tool_name == "CandidateSelection":
+        ids = _ID_PATTERN.findall(query)
+        return {"selection_type": "single", "selected_ids": ids[:1], "reason": "benchmark selection"}
+    if tool_name == "PurchaseDecision":
+        return _decision()
+    if tool_name == "PurchaseDecisionBatch":
+        try:
+            count = len(json.loads(query))
+        except ValueError:
+            count = 1
+        return {"decisions": [_decision() for _ in range(count)]}
+    return None
+
+
+def _decision() -> dict:
+    return {"recommendation": "wait", "reason": "benchmark decision", "confidence": 0.7}
@@ -0,0 +1,255 @@
+"""
+本地 mock 服务：模拟 ITAD 与 Steam 商店接口，用于可复现的端到端基准测试。
+
+ITAD:  GET /games/search/v1, POST /games/overview/v2, POST /lookup/shop/61/id/v1
+Steam: GET /api/appdetails, GET /appreviews/<appid>
+
+响应由游戏 id / 查询词确定性生成；latency 与 error_rate 模拟上游延迟与 5xx 错误。
+"""
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+APP_ID_OFFSET = 100000
+RATINGS = ["Overwhelmingly Positive", "Very Positive", "Mostly Positive", "Mixed", "Mostly Negative"]
+GENRES = ["动作", "角色扮演", "冒险", "策略", "模拟", "独立", "解谜", "射击"]
+
+
+def _seed(text: str) -> int:
+    return zlib.crc32(text.encode("utf-8"))
+
+
+def game_id(index: int) -> str:
+    return f"bench-{index:06d}"
+
+
+def game_index(game_id_: str) -> int:
+    return int(game_id_.rsplit("-", 1)[-1])
+
+
+class MockCatalog:
+    """确定性的合成游戏目录：每个查询词映射到固定的一组候选游戏"""
+
+    def __init__(self, size: int = 5000, candidates_per_query: int = 5):
+        self.size = size
+        self.candidates_per_query = candidates_per_query
+
+    def search(self, title: str, limit: int) -> List[dict]:
+        start = _seed(title) % self.size
+        count = min(limit, self.candidates_per_query)
+        results = []
+        for offset in range(count):
+            index = (start + offset) % self.size
+            results.append({
+                "id": game_id(index),
+                "slug": f"bench-game-{index}",
+                "title": f"{title} {offset + 1}" if offset else title,
+                "type": "game" if offset < count - 1 else "dlc",
+            })
+        return results
+
+    def overview(self, game_ids: List[str]) -> dict:
+        prices = []
+        for gid in game_ids:
+            rng = random.Random(_seed(gid))
+            regular = rng.choice([38, 58, 68, 98, 128, 198, 298])
+            cut = rng.choice([0, 0, 10, 25, 33, 50, 75, 90])
+            current = round(regular * (100 - cut) / 100, 2)
+            lowest = round(min(current, regular * rng.uniform(0.1, 1.0)), 2)
+            prices.append({
+                "id": gid,
+                "current": {
+                    "shop": {"id": 61, "name": "Steam"},
+                    "price": {"amount": current, "currency": "CNY"},
+                    "regular": {"amount": regular, "currency": "CNY"},
+                    "cut": cut,
+                },
+                "lowest": {
+                    "shop": {"id": 61, "name": "Steam"},
+                    "price": {"amount": lowest, "currency": "CNY"},
+                    "regular": {"amount": regular, "currency": "CNY"},
+                    "cut": round(100 - lowest * 100 / regular),
+                },
+            })
+        return {"prices": prices, "bundles": []}
+
+    def lookup(self, game_ids: List[str]) -> dict:
+        return {gid: [f"app/{APP_ID_OFFSET + game_index(gid)}"] for gid in game_ids}
+
+    def appdetails(self, app_id: str) -> dict:
+        rng = random.Random(_seed(app_id))
+        genres = rng.sample(GENRES, 3)
+        year = rng.choice([2015, 2018, 2021, 2023, time.gmtime().tm_year])
+        return {
+            app_id: {
+                "success": True,
+                "data": {
+                    "steam_appid": int(app_id),
+                    "name": f"Bench Game {app_id}",
+                    "short_description": "x" * 300,
+                    "detailed_description": "x" * 8000,
+                    "genres": [{"id": str(i), "description": genre} for i, genre in enumerate(genres)],
+                    "categories": [{"id": 2, "description": "单人"}, {"id": 22, "description": "Steam 成就"}],
+                    "release_date": {"coming_soon": False, "date": f"{year}-01-15"},
+                },
+            }
+        }
+
+    def appreviews(self, app_id: str) -> dict:
+        rng = random.Random(_seed(app_id) + 1)
+        return {
+            "success": 1,
+            "query_summary": {"num_reviews": 0, "review_score_desc": rng.choice(RATINGS)},
+            "reviews": [],
+        }
+
+
+# 路由处理函数：(catalog, path, query, body) -> JSON 响应；以 "/" 结尾的路由匹配该前缀下的路径
+Route = Callable[[MockCatalog, str, dict, object], object]
+
+
+def _search(catalog: MockCatalog, path: str, query: dict, body: object) -> object:
+    return catalog.search(query.get("title", ""), int(query.get("limit", 10)))
+
+
+def _overview(catalog: MockCatalog, path: str, query: dict, body: object) -> object:
+    return catalog.overview(body or [])
+
+
+def _lookup(catalog: MockCatalog, path: str, query: dict, body: object) -> object:
+    return catalog.lookup(body or [])
+
+
+def _appdetails(catalog: MockCatalog, path: str, query: dict, body: object) -> object:
+    app_id = str(query.get("appids", ""))
+    details = catalog.appdetails(app_id)
+    if query.get("filters"):
+        # 与 Steam 一致：指定 filters 时只返回这些字段
+        fields = query["filters"].split(",")
+        data = details[app_id]["data"]
+        details[app_id]["data"] = {key: data[key] for key in fields if key in data}
+    return details
+
+
+def _appreviews(catalog: MockCatalog, path: str, query: dict, body: object) -> object:
+    return catalog.appreviews(path.rsplit("/", 1)[-1])
+
+
+ITAD_ROUTES: Dict[Tuple[str, str], Route] = {
+    ("GET", "/games/search/v1"): _search,
+    ("POST", "/games/overview/v2"): _overview,
+    ("POST", "/lookup/shop/61/id/v1"): _lookup,
+}
+
+STEAM_ROUTES: Dict[Tuple[str, str], Route] = {
+    ("GET", "/api/appdetails"): _appdetails,
+    ("GET", "/appreviews/"): _appreviews,
+}
+
+
+class MockServer:
+    """在后台线程运行的 mock HTTP 服务，记录请求数与错误注入次数"""
+
+    def __init__(
+        self,
+        routes: Dict[Tuple[str, str], Route],
+        catalog: Optional[MockCatalog] = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ):
+        self.routes = routes
+        self.catalog = catalog or MockCatalog()
+        self.latency = latency
+        self.error_rate = error_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "MockServer":
+        service = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                service._handle(self, "GET")
+
+            def do_POST(self):
+                service._handle(self, "POST")
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-http", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def _should_fail(self) -> bool:
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        self._count("requests")
+        parsed = urlparse(handler.path)
+        query = {key: values[0] for key, values in parse_qs(parsed.query).items()}
+        length = int(handler.headers.get("Content-Length") or 0)
+        raw = handler.rfile.read(length) if length else b""
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        route = self.routes.get((method, parsed.path))
+        if route is None:
+            route = self.routes.get((method, parsed.path.rsplit("/", 1)[0] + "/"))
+        if route is None:
+            status, payload = 404, {"error": "not found"}
+        elif self._should_fail():
+            self._count("errors")
+            status, payload = 500, {"error": "injected failure"}
+        else:
+            status, payload = 200, route(self.catalog, parsed.path, query, json.loads(raw) if raw else None)
+
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+
+def start_mock_services(
+    latency: float = 0.0,
+    error_rate: float = 0.0,
+    catalog_size: int = 5000,
+    seed: int = 0,
+) -> Tuple[MockServer, MockServer]:
+    """启动 ITAD 与 Steam 两个 mock 服务，返回 (itad, steam)"""
+    catalog = MockCatalog(size=catalog_size)
+    itad = MockServer(ITAD_ROUTES, catalog, latency, error_rate, seed).start()
+    steam = MockServer(STEAM_ROUTES, catalog, latency, error_rate, seed + 1).start()
+    return itad, steam
@@ -0,0 +1,149 @@
+"""
+提示词编码对比：在本地 mock 服务与模拟聊天模型上，分别以 verbose / compact 编码（settings.PROMPT_ENCODING）
+驱动同一批查询，按 agent 比较输入 / 输出 token、费用与调用延迟。
+
+模拟模型不返回用量，token 由 utils.token_usage 用 tiktoken 按实际发送的提示词计数；
+--input-token-latency 模拟 prefill 延迟随提示词长度增长。用法（在 src 目录下）：
+    python -m bench.prompt_encoding --queries 100 --all-llm --output .cache/bench/encoding.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Dict, List, Optional
+
+from bench.e2e import _run_graph, make_queries
+from bench.fake_llm import FakeChatModel
+from bench.mock_services import start_mock_services
+from config.settings import settings
+from utils.logger import setup_logging, get_logger
+from utils.stats import summarize_latencies
+from utils.token_usage import reset_usage, usage_stats
+
+logger = get_logger(__name__)
+
+
+def run_encoding(encoding: str, queries: List[str], concurrency: int, args: argparse.Namespace) -> dict:
+    from agent.factory import create_agents
+    from graph.steam_price_graph import build_graph
+
+    settings.PROMPT_ENCODING = encoding
+    # 每种编码使用相同种子的新模型，保证两轮的随机延迟与失败序列一致
+    llm = FakeChatModel(
+        latency=args.llm_latency,
+        input_token_latency=args.input_token_latency,
+        seed=args.seed,
+        report_usage=False,
+    )
+    graph = build_graph(create_agents(enable_cache=False, llm=llm))
+
+    reset_usage()
+    start = time.perf_counter()
+    outcomes = asyncio.run(_run_graph(graph, queries, concurrency))
+    elapsed = time.perf_counter() - start
+
+    return {
+        "encoding": encoding,
+        "queries": len(queries),
+        "failed": sum(1 for ok, _ in outcomes if not ok),
+        "elapsed": elapsed,
+        "latency": summarize_latencies([latency * 1000 for _, latency in outcomes]),
+        "usage": usage_stats(),
+    }
+
+
+def compare_encodings(baseline: dict, candidate: dict) -> List[dict]:
+    """按 agent 对比两种编码，change 为 candidate 相对 baseline 的变化比例"""
+    rows = []
+    for agent in sorted(set(baseline["usage"]) | set(candidate["usage"])):
+        before = baseline["usage"].get(agent, {})
+        after = candidate["usage"].get(agent, {})
+        row = {"agent": agent}
+        for key in ("avg_input_tokens", "input_tokens", "output_tokens", "cost", "avg_latency_ms"):
+            row[key] = {
+                baseline["encoding"]: before.get(key, 0),
+                candidate["encoding"]: after.get(key, 0),
+                "change": _change(after.get(key, 0), before.get(key, 0)),
+            }
+        rows.append(row)
+    return rows
+
+
+def _change(current: float, previous: float) -> float:
+    return (current - previous) / previous if previous else 0.0
+
+
+def print_comparison(rows: List[dict], baseline: str, candidate: str) -> None:
+    print(f"{'agent':<16}{'in tok/call':>24}{'input tokens':>26}{'cost':>24}{'avg ms':>22}")
+    for row in rows:
+        cells = []
+        for key, fmt, width in (
+            ("avg_input_tokens", ".0f", 24),
+            ("input_tokens", ".0f", 26),
+            ("cost", ".4f", 24),
+            ("avg_latency_ms", ".1f", 22),
+        ):
+            values = row[key]
+            cell = f"{values[baseline]:{fmt}} -> {values[candidate]:{fmt}} ({values['change']:+.0%})"
+            cells.append(f"{cell:>{width}}")
+        print(f"{row['agent']:<16}{''.join(cells)}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compare LLM token usage and latency between prompt encodings")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--unique", type=int, default=None, help="number of distinct queries (default: all distinct)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--http-latency", type=float, default=0.0, help="mock upstream latency (s)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="fake LLM base latency (s)")
+    parser.add_argument("--input-token-latency", type=float, default=0.02,
+                        help="extra fake LLM latency per 1k input tokens (s)")
+    parser.add_argument("--catalog-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--all-llm", action="store_true",
+                        help="disable the candidate ranker and decision rule engine so every agent calls the LLM")
+    parser.add_argument("--output", help="write full results as JSON")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+
+    itad, steam = start_mock_services(args.http_latency, 0.0, args.catalog_size, args.seed)
+    settings.ITAD_BASE_URL = itad.base_url
+    settings.STEAM_STORE_BASE_URL = steam.base_url
+    settings.ITAD_API_KEY = settings.ITAD_API_KEY or "bench"
+    settings.SEARCH_CACHE_ENABLED = False
+    settings.TITLE_INDEX_PATH = ""
+    settings.APP_ID_MAP_ENABLED = False
+    settings.STEAM_CATALOG_ENABLED = False
+    if args.all_llm:
+        settings.SELECTOR_RANKER_ENABLED = False
+        settings.RULE_ENGINE_ENABLED = False
+
+    queries = make_queries(args.queries, args.unique or args.queries)
+    results: Dict[str, dict] = {}
+    try:
+        for encoding in ("verbose", "compact"):
+            results[encoding] = run_encoding(encoding, queries, args.concurrency, args)
+    finally:
+        itad.stop()
+        steam.stop()
+
+    verbose, compact = results["verbose"], results["compact"]
+    rows = compare_encodings(verbose, compact)
+    print_comparison(rows, "verbose", "compact")
+    for result in (verbose, compact):
+        latency = result["latency"]
+        print(f"{result['encoding']:<10} elapsed {result['elapsed']:.2f}s  p50 {latency['p50']:.1f}ms  "
+              f"p95 {latency['p95']:.1f}ms  failed {result['failed']}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"config": vars(args), "results": results, "comparison": rows}, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""
+启动开销基准：冷启动（全新进程导入 + 构建运行时） vs. 每次查询的准备开销（旧方式每次新建 LLM/agents/图 vs. 复用常驻运行时）。
+
+不发起任何网络请求，只测量本地构建开销。用法（在 src 目录下）：
+    python -m bench.startup --repeat 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+COLD_START_SNIPPET = """
+import time
+start = time.perf_counter()
+from runtime import SteamPriceRuntime
+SteamPriceRuntime().warmup()
+print(time.perf_counter() - start)
+"""
+
+
+def measure_cold_start(repeat: int) -> list:
+    """每次在新进程中测量导入依赖并构建运行时所需时间"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-c", COLD_START_SNIPPET],
+            capture_output=True, text=True, check=True
+        )
+        total = time.perf_counter() - start
+        samples.append((total, float(out.stdout.strip().splitlines()[-1])))
+    return samples
+
+
+def measure_legacy_per_query(repeat: int) -> list:
+    """旧方式：每次查询都新建 LLM、三个 agent 并重新编译图"""
+    from graph.steam_price_graph import build_graph
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        build_graph()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def measure_warm_per_query(repeat: int) -> list:
+    """常驻运行时：查询前只需取回已编译的图"""
+    from runtime import SteamPriceRuntime
+
+    runtime = SteamPriceRuntime().warmup()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        runtime.graph
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def _fmt(samples: list) -> str:
+    return f"median={statistics.median(samples) * 1000:.2f}ms  max={max(samples) * 1000:.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start vs warm per-query overhead")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    cold = measure_cold_start(args.repeat)
+    legacy = measure_legacy_per_query(args.repeat)
+    warm = measure_warm_per_query(args.repeat)
+
+    print(f"cold start (process + imports + runtime): {_fmt([total for total, _ in cold])}")
+    print(f"cold start (imports + runtime only):      {_fmt([inner for _, inner in cold])}")
+    print(f"per-query setup, rebuild every query:     {_fmt(legacy)}")
+    print(f"per-query setup, warm runtime:            {_fmt(warm)}")
+
+
+if __name__ == "__main__":
+    main()
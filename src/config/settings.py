@@ -8,4 +8,121 @@ class Settings:
     STEAM_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
     DEEPSEEK_API_KEY: str = os.getenv("DEEPSEEK_API_KEY", "")
 
+    # 外部接口地址（基准测试时指向本地 mock 服务）
+    ITAD_BASE_URL: str = os.getenv("ITAD_BASE_URL", "https://api.isthereanydeal.com")
+    STEAM_STORE_BASE_URL: str = os.getenv("STEAM_STORE_BASE_URL", "https://store.steampowered.com")
+    # appdetails 只请求用到的字段（filters），关闭后取完整文档
+    STEAM_SLIM_FETCH: bool = os.getenv("STEAM_SLIM_FETCH", "1") == "1"
+
+    # 本地缓存
+    CACHE_DIR: str = os.getenv("CACHE_DIR", ".cache")
+    SEARCH_CACHE_ENABLED: bool = os.getenv("SEARCH_CACHE_ENABLED", "1") == "1"
+    SEARCH_CACHE_TTL: int = int(os.getenv("SEARCH_CACHE_TTL", "86400"))
+    SEARCH_CACHE_NEGATIVE_TTL: int = int(os.getenv("SEARCH_CACHE_NEGATIVE_TTL", "3600"))
+    SEARCH_CACHE_MAX_ENTRIES: int = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2048"))
+
+    # 价格请求合并
+    PRICE_BATCHING_ENABLED: bool = os.getenv("PRICE_BATCHING_ENABLED", "0") == "1"
+    PRICE_BATCH_WINDOW_MS: int = int(os.getenv("PRICE_BATCH_WINDOW_MS", "50"))
+
+    # HTTP 连接池
+    HTTP_POOL_SIZE: int = int(os.getenv("HTTP_POOL_SIZE", "100"))
+
+    # 出站调用保护：按 host 限流（host=每秒请求数[:突发容量]，逗号分隔）、重试退避与熔断
+    HTTP_RATE_LIMITS: str = os.getenv("HTTP_RATE_LIMITS", "")
+    HTTP_MAX_RETRIES: int = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+    HTTP_BACKOFF_BASE: float = float(os.getenv("HTTP_BACKOFF_BASE", "0.5"))
+    HTTP_BACKOFF_MAX: float = float(os.getenv("HTTP_BACKOFF_MAX", "20"))
+    HTTP_BREAKER_THRESHOLD: int = int(os.getenv("HTTP_BREAKER_THRESHOLD", "5"))
+    HTTP_BREAKER_COOLDOWN: float = float(os.getenv("HTTP_BREAKER_COOLDOWN", "30"))
+    # LLM 调用限流（0 表示不限）与客户端自身的重试次数
+    LLM_RPS: float = float(os.getenv("LLM_RPS", "0"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+
+    # 购买决策：sequential（逐条）/ batched（单次结构化调用）/ concurrent（并发 abatch）
+    DECISION_MODE: str = os.getenv("DECISION_MODE", "sequential")
+    DECISION_MAX_CONCURRENCY: int = int(os.getenv("DECISION_MAX_CONCURRENCY", "8"))
+
+    # LLM 输入编码（verbose / compact）与 token 单价（每百万 token，按实际账单调整）；
+    # compact 需先用 bench/prompt_encoding.py 确认决策质量无回退后再按部署开启
+    PROMPT_ENCODING: str = os.getenv("PROMPT_ENCODING", "verbose")
+    LLM_PRICE_INPUT: float = float(os.getenv("LLM_PRICE_INPUT", "0.28"))
+    LLM_PRICE_OUTPUT: float = float(os.getenv("LLM_PRICE_OUTPUT", "0.42"))
+
+    # 候选预排序（答案明确时不调用 LLM，否则只发送 top-k 候选）
+    SELECTOR_RANKER_ENABLED: bool = os.getenv("SELECTOR_RANKER_ENABLED", "1") == "1"
+    SELECTOR_TOP_K: int = int(os.getenv("SELECTOR_TOP_K", "6"))
+    SELECTOR_MIN_SCORE: float = float(os.getenv("SELECTOR_MIN_SCORE", "0.6"))
+
+    # 决策规则引擎（明确情况不调用 LLM）
+    RULE_ENGINE_ENABLED: bool = os.getenv("RULE_ENGINE_ENABLED", "1") == "1"
+    RULE_BUY_MARGIN: float = float(os.getenv("RULE_BUY_MARGIN", "0.0"))
+    RULE_WAIT_DEPTH: float = float(os.getenv("RULE_WAIT_DEPTH", "0.5"))
+
+    # 本地标题索引（catalog 导出文件：jsonl/json/csv，含 id、title、type、aliases）
+    TITLE_INDEX_PATH: str = os.getenv("TITLE_INDEX_PATH", "")
+    TITLE_INDEX_MIN_SCORE: float = float(os.getenv("TITLE_INDEX_MIN_SCORE", "0.6"))
+
+    # LLM 结构化输出缓存
+    LLM_CACHE_ENABLED: bool = os.getenv("LLM_CACHE_ENABLED", "0") == "1"
+    LLM_CACHE_TTL: int = int(os.getenv("LLM_CACHE_TTL", str(7 * 86400)))
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "50000"))
+    # 设置后使用 Ollama 向量模型为实体解析做近似查询命中
+    LLM_CACHE_EMBEDDING_MODEL: str = os.getenv("LLM_CACHE_EMBEDDING_MODEL", "")
+    LLM_CACHE_SIMILARITY: float = float(os.getenv("LLM_CACHE_SIMILARITY", "0.95"))
+
+    # 批量查询
+    BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "8"))
+    # 批量查询检查点：中断后重跑同一批次时跳过已完成的节点
+    CHECKPOINT_ENABLED: bool = os.getenv("CHECKPOINT_ENABLED", "0") == "1"
+    CHECKPOINT_PATH: str = os.getenv("CHECKPOINT_PATH", "")  # 默认 CACHE_DIR/checkpoints.sqlite
+
+    # HTTP 服务
+    SERVER_HOST: str = os.getenv("SERVER_HOST", "127.0.0.1")
+    SERVER_PORT: int = int(os.getenv("SERVER_PORT", "8000"))
+    SERVER_MAX_INFLIGHT: int = int(os.getenv("SERVER_MAX_INFLIGHT", "16"))
+    SERVER_MAX_QUEUE: int = int(os.getenv("SERVER_MAX_QUEUE", "256"))
+    SERVER_QUEUE_TIMEOUT: float = float(os.getenv("SERVER_QUEUE_TIMEOUT", "30"))
+    SERVER_RUN_TIMEOUT: float = float(os.getenv("SERVER_RUN_TIMEOUT", "120"))
+    SERVER_MAX_BATCH: int = int(os.getenv("SERVER_MAX_BATCH", "64"))
+
+    # 图分支：price 与 Steam 元数据（meta）并行，超时后以部分数据继续决策
+    META_ENABLED: bool = os.getenv("META_ENABLED", "1") == "1"
+    META_TIMEOUT: float = float(os.getenv("META_TIMEOUT", "3"))
+    META_MAX_CONCURRENCY: int = int(os.getenv("META_MAX_CONCURRENCY", "8"))
+    PRICE_TIMEOUT: float = float(os.getenv("PRICE_TIMEOUT", "15"))
+
+    # 链路追踪：设置后 span 以 JSONL 写入该文件
+    TRACE_FILE: str = os.getenv("TRACE_FILE", "")
+
+    # 本地价格历史（Parquet），决策时附带最近 PRICE_HISTORY_DAYS 天的价格概况
+    PRICE_HISTORY_ENABLED: bool = os.getenv("PRICE_HISTORY_ENABLED", "0") == "1"
+    PRICE_HISTORY_DIR: str = os.getenv("PRICE_HISTORY_DIR", "")  # 默认 CACHE_DIR/price_history
+    PRICE_HISTORY_FLUSH_ROWS: int = int(os.getenv("PRICE_HISTORY_FLUSH_ROWS", "1000"))
+    PRICE_HISTORY_COMPACT_SEGMENTS: int = int(os.getenv("PRICE_HISTORY_COMPACT_SEGMENTS", "16"))
+    PRICE_HISTORY_DAYS: int = int(os.getenv("PRICE_HISTORY_DAYS", "90"))
+
+    # 关注列表轮询
+    WATCHLIST_PATH: str = os.getenv("WATCHLIST_PATH", "")  # 默认 CACHE_DIR/watchlist.sqlite
+    WATCHLIST_INTERVAL: float = float(os.getenv("WATCHLIST_INTERVAL", "3600"))
+    WATCHLIST_MAX_RPS: float = float(os.getenv("WATCHLIST_MAX_RPS", "2"))
+
+    # 价格查询地区与商店（game_price），以及价格矩阵的换算币种与汇率（"USD=7.1,EUR=7.8"）
+    ITAD_COUNTRY: str = os.getenv("ITAD_COUNTRY", "CN")
+    ITAD_SHOPS: str = os.getenv("ITAD_SHOPS", "61")  # 逗号分隔的 ITAD 商店 id，61 为 Steam
+    PRICE_MATRIX_CURRENCY: str = os.getenv("PRICE_MATRIX_CURRENCY", "CNY")
+    FX_RATES: str = os.getenv("FX_RATES", "")
+
+    # ITAD id ↔ Steam appid 本地映射索引；元数据节点对未命中的 id 最多等待 APP_ID_MAP_MISS_WAIT 秒的后台补全
+    APP_ID_MAP_ENABLED: bool = os.getenv("APP_ID_MAP_ENABLED", "1") == "1"
+    APP_ID_MAP_PATH: str = os.getenv("APP_ID_MAP_PATH", "")  # 默认 CACHE_DIR/app_ids.sqlite
+    APP_ID_MAP_NEGATIVE_TTL: float = float(os.getenv("APP_ID_MAP_NEGATIVE_TTL", str(7 * 86400)))
+    APP_ID_MAP_MISS_WAIT: float = float(os.getenv("APP_ID_MAP_MISS_WAIT", "0.5"))
+
+    # Steam 元数据离线快照（python -m tools.steam_catalog build 生成），超过 STEAM_CATALOG_MAX_AGE 秒的行视为过期
+    STEAM_CATALOG_ENABLED: bool = os.getenv("STEAM_CATALOG_ENABLED", "1") == "1"
+    STEAM_CATALOG_PATH: str = os.getenv("STEAM_CATALOG_PATH", "")  # 默认 CACHE_DIR/steam_catalog.parquet
+    STEAM_CATALOG_MAX_AGE: float = float(os.getenv("STEAM_CATALOG_MAX_AGE", str(3 * 86400)))
+    STEAM_CATALOG_CONCURRENCY: int = int(os.getenv("STEAM_CATALOG_CONCURRENCY", "16"))
+
 settings = Settings()
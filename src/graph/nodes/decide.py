@@ -1,9 +1,98 @@
+import asyncio
+from typing import NamedTuple, Optional
+
+from langgraph.config import get_stream_writer
+
+from agent.rule_engine import merge_decisions, split_decisions
+from config.settings import settings
 from graph.state import SteamPriceState
+from tools.price_history import get_price_history
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
 
 
 def make_decision(state: SteamPriceState, agents):
     if not state["price_infos"]:
         return {"result": "暂无价格信息"}
 
-    result = agents["decision"].decide(state["price_infos"])
-    return {"result": result}
+    price_infos = state["price_infos"]
+    steam_infos = _steam_infos(state, price_infos)
+    decisions, pending, emit = _prepare(price_infos, agents, steam_infos, _histories(price_infos))
+    llm_decisions = agents["decision"].decide(
+        pending.price_infos, on_decision=emit, steam_infos=pending.steam_infos, histories=pending.histories
+    ) if pending.price_infos else []
+    return {"result": merge_decisions(decisions, llm_decisions)}
+
+
+async def amake_decision(state: SteamPriceState, agents):
+    if not state["price_infos"]:
+        return {"result": "暂无价格信息"}
+
+    price_infos = state["price_infos"]
+    steam_infos = _steam_infos(state, price_infos)
+    histories = await asyncio.to_thread(_histories, price_infos)
+    decisions, pending, emit = _prepare(price_infos, agents, steam_infos, histories)
+    llm_decisions = await agents["decision"].adecide(
+        pending.price_infos, on_decision=emit, steam_infos=pending.steam_infos, histories=pending.histories
+    ) if pending.price_infos else []
+    return {"result": merge_decisions(decisions, llm_decisions)}
+
+
+class _Pending(NamedTuple):
+    """规则引擎未能判定、交给 LLM 的部分"""
+    price_infos: list
+    steam_infos: list
+    histories: Optional[list]
+
+
+def _prepare(price_infos, agents, steam_infos, histories):
+    """
+    规则引擎在评价与价格历史都已就绪后先判定明确的情况，只把模糊的交给 LLM；
+    每条决策产生时通过 stream writer 以 {"decision", "index"} 推送给 stream(custom) 调用方
+    """
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        # Python 3.10 下异步节点拿不到运行上下文，此时决策随节点输出一次性发出
+        writer = lambda chunk: None
+
+    rules = agents.get("rules")
+    decisions = (
+        rules.evaluate(price_infos, steam_infos=steam_infos, histories=histories)
+        if rules is not None else [None] * len(price_infos)
+    )
+    for index, decision in enumerate(decisions):
+        if decision is not None:
+            writer({"decision": decision, "index": index})
+
+    pending_index = [index for index, decision in enumerate(decisions) if decision is None]
+
+    def emit(position, decision):
+        writer({"decision": decision, "index": pending_index[position]})
+
+    pending = _Pending(
+        price_infos=split_decisions(decisions, price_infos),
+        steam_infos=[steam_infos[index] for index in pending_index],
+        histories=[histories[index] for index in pending_index] if histories is not None else None,
+    )
+    return decisions, pending, emit
+
+
+def _steam_infos(state: SteamPriceState, price_infos):
+    """按 game_id 取出 meta 分支的结果；分支超时或关闭时为空"""
+    steam_infos = state.get("steam_infos") or {}
+    return [steam_infos.get(price_info.game_id) for price_info in price_infos]
+
+
+def _histories(price_infos):
+    """从本地价格历史读取最近 PRICE_HISTORY_DAYS 天的概况；未启用或读取失败时为空"""
+    store = get_price_history()
+    if store is None:
+        return None
+    try:
+        summaries = store.summaries([p.game_id for p in price_infos if p.game_id], settings.PRICE_HISTORY_DAYS)
+    except Exception as e:
+        logger.warning(f"Failed to read local price history: {e}")
+        return None
+    return [summaries.get(price_info.game_id) for price_info in price_infos]
@@ -0,0 +1,62 @@
+from typing import Dict, List
+
+from config.settings import settings
+from graph.nodes.timeouts import arun_with_timeout, run_with_timeout
+from graph.state import SteamPriceState
+from schemas.steam_result import SteamInfo
+from tools.app_id_map import get_app_id_map
+from tools.itad_lookup import asteam_app_ids, steam_app_ids
+from tools.steam_meta import aget_steam_info_many, get_steam_info_many
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def fetch_meta(state: SteamPriceState):
+    selection = state["selection"]
+
+    if not selection or not selection.selected_ids:
+        return {"steam_infos": {}}
+
+    steam_infos = run_with_timeout(
+        lambda: _collect_meta(selection.selected_ids), settings.META_TIMEOUT, {}, "Steam metadata branch", optional=True
+    )
+    return {"steam_infos": steam_infos}
+
+
+async def afetch_meta(state: SteamPriceState):
+    selection = state["selection"]
+
+    if not selection or not selection.selected_ids:
+        return {"steam_infos": {}}
+
+    steam_infos = await arun_with_timeout(
+        _acollect_meta(selection.selected_ids), settings.META_TIMEOUT, {}, "Steam metadata branch", optional=True
+    )
+    return {"steam_infos": steam_infos}
+
+
+def _collect_meta(game_ids: List[str]) -> Dict[str, SteamInfo]:
+    index = get_app_id_map()
+    if index is not None:
+        app_ids = index.resolve(game_ids, wait=settings.APP_ID_MAP_MISS_WAIT)
+    else:
+        app_ids = steam_app_ids(game_ids)
+    infos, _ = get_steam_info_many(app_ids.values(), max_concurrency=settings.META_MAX_CONCURRENCY)
+    return _by_game_id(app_ids, infos)
+
+
+async def _acollect_meta(game_ids: List[str]) -> Dict[str, SteamInfo]:
+    index = get_app_id_map()
+    if index is not None:
+        # 映射未知的 id 由后台批量补全，超过 APP_ID_MAP_MISS_WAIT 仍未补全的本次不取元数据
+        app_ids = await index.aresolve(game_ids, wait=settings.APP_ID_MAP_MISS_WAIT)
+    else:
+        app_ids = await asteam_app_ids(game_ids)
+    infos, _ = await aget_steam_info_many(app_ids.values(), max_concurrency=settings.META_MAX_CONCURRENCY)
+    return _by_game_id(app_ids, infos)
+
+
+def _by_game_id(app_ids: Dict[str, str], infos: Dict[str, SteamInfo]) -> Dict[str, SteamInfo]:
+    """{itad_id: appid} + {appid: SteamInfo} -> {itad_id: SteamInfo}"""
+    return {game_id: infos[app_id] for game_id, app_id in app_ids.items() if app_id in infos}
@@ -1,5 +1,8 @@
+from config.settings import settings
+from graph.nodes.timeouts import arun_with_timeout, run_with_timeout
 from graph.state import SteamPriceState
-from tools.itad_price import game_price
+from tools.itad_price import agame_price, game_price
+from tools.price_batcher import get_price_batcher
 
 
 def fetch_prices(state: SteamPriceState):
@@ -8,5 +11,23 @@ def fetch_prices(state: SteamPriceState):
     if not selection or not selection.selected_ids:
         return {"price_infos": []}
 
-    prices = game_price(selection.selected_ids)
+    if settings.PRICE_BATCHING_ENABLED:
+        fetch = lambda: get_price_batcher().get_prices(selection.selected_ids)
+    else:
+        fetch = lambda: game_price(selection.selected_ids)
+    prices = run_with_timeout(fetch, settings.PRICE_TIMEOUT, [], "Price branch")
+    return {"price_infos": prices}
+
+
+async def afetch_prices(state: SteamPriceState):
+    selection = state["selection"]
+
+    if not selection or not selection.selected_ids:
+        return {"price_infos": []}
+
+    if settings.PRICE_BATCHING_ENABLED:
+        fetch = get_price_batcher().aget_prices(selection.selected_ids)
+    else:
+        fetch = agame_price(selection.selected_ids)
+    prices = await arun_with_timeout(fetch, settings.PRICE_TIMEOUT, [], "Price branch")
     return {"price_infos": prices}
@@ -3,3 +3,8 @@ from graph.state import SteamPriceState
 def resolve_entity(state: SteamPriceState, agents):
     entity = agents["resolver"].resolve(state["user_query"])
     return {"game_entity": entity}
+
+
+async def aresolve_entity(state: SteamPriceState, agents):
+    entity = await agents["resolver"].aresolve(state["user_query"])
+    return {"game_entity": entity}
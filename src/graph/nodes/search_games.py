@@ -1,5 +1,7 @@
+from config.settings import settings
 from graph.state import SteamPriceState
-from tools.itad_search import search_games
+from tools.app_id_map import get_app_id_map
+from tools.itad_search import asearch_games, search_games
 
 
 def search_candidates(state: SteamPriceState):
@@ -9,4 +11,25 @@ def search_candidates(state: SteamPriceState):
         return {"candidates": []}
 
     candidates = search_games(entity.game_name)
+    _prefetch_app_ids(candidates)
     return {"candidates": candidates}
+
+
+async def asearch_candidates(state: SteamPriceState):
+    entity = state["game_entity"]
+
+    if not entity or entity.confidence <= 0.2:
+        return {"candidates": []}
+
+    candidates = await asearch_games(entity.game_name)
+    _prefetch_app_ids(candidates)
+    return {"candidates": candidates}
+
+
+def _prefetch_app_ids(candidates: list) -> None:
+    """候选选择（通常需要一次 LLM 调用）期间在后台补全 Steam appid，元数据节点查询时即可命中"""
+    if not settings.META_ENABLED:
+        return
+    index = get_app_id_map()
+    if index is not None and candidates:
+        index.prefetch(candidate["id"] for candidate in candidates)
@@ -2,8 +2,21 @@ from graph.state import SteamPriceState
 
 
 def select_candidates(state: SteamPriceState, agents):
-    selection = agents["selector"].select(
-        state["user_query"],
-        state["candidates"]
-    )
+    selection, candidates = _prerank(state, agents)
+    if selection is None:
+        selection = agents["selector"].select(state["user_query"], candidates)
     return {"selection": selection}
+
+
+async def aselect_candidates(state: SteamPriceState, agents):
+    selection, candidates = _prerank(state, agents)
+    if selection is None:
+        selection = await agents["selector"].aselect(state["user_query"], candidates)
+    return {"selection": selection}
+
+
+def _prerank(state: SteamPriceState, agents):
+    ranker = agents.get("ranker")
+    if ranker is None:
+        return None, state["candidates"]
+    return ranker.rank(state["user_query"], state.get("game_entity"), state["candidates"])
@@ -0,0 +1,84 @@
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Any, Awaitable, Callable
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 分支节点在独立线程中执行，超时后节点直接返回默认值，不再等待。
+# 超时的线程仍在运行直到其请求结束，因此按实际结束计数在途任务，线程池占满后不再提交
+BRANCH_WORKERS = 32
+_branch_executor = ThreadPoolExecutor(max_workers=BRANCH_WORKERS, thread_name_prefix="graph-branch")
+_branch_inflight = 0
+_branch_lock = threading.Lock()
+
+
+def run_with_timeout(
+    func: Callable[[], Any],
+    timeout: float,
+    default: Any,
+    label: str,
+    optional: bool = False,
+) -> Any:
+    """
+    optional: 可选分支（如元数据）出现任何异常时同样记录日志并返回 default，不让整个图失败。
+    线程池被之前超时、仍未结束的任务占满时，可选分支直接返回 default（排队只会在开始前就超时），
+    必需分支在当前线程中直接执行
+    """
+    if not _reserve_worker():
+        if optional:
+            logger.warning(f"{label} skipped: all {BRANCH_WORKERS} branch workers are busy, continuing with partial data")
+            return default
+        logger.warning(f"{label} running inline: all {BRANCH_WORKERS} branch workers are busy")
+        return func()
+
+    # 在调用方的 context 中执行，链路追踪的父 span 得以延续到分支线程
+    future = _branch_executor.submit(contextvars.copy_context().run, func)
+    future.add_done_callback(_release_worker)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        logger.warning(f"{label} timed out after {timeout}s, continuing with partial data")
+        return default
+    except Exception as e:
+        if not optional:
+            raise
+        logger.warning(f"{label} failed, continuing with partial data: {e}")
+        return default
+
+
+def _reserve_worker() -> bool:
+    global _branch_inflight
+    with _branch_lock:
+        if _branch_inflight >= BRANCH_WORKERS:
+            return False
+        _branch_inflight += 1
+        return True
+
+
+def _release_worker(_future: Any) -> None:
+    global _branch_inflight
+    with _branch_lock:
+        _branch_inflight -= 1
+
+
+async def arun_with_timeout(
+    awaitable: Awaitable,
+    timeout: float,
+    default: Any,
+    label: str,
+    optional: bool = False,
+) -> Any:
+    try:
+        return await asyncio.wait_for(awaitable, timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"{label} timed out after {timeout}s, continuing with partial data")
+        return default
+    except Exception as e:
+        if not optional:
+            raise
+        logger.warning(f"{label} failed, continuing with partial data: {e}")
+        return default
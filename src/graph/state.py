@@ -1,8 +1,9 @@
-from typing import TypedDict, List, Optional
+from typing import Dict, TypedDict, List, Optional
 
 from schemas.game_entity import GameEntity
 from schemas.candidate_selection import CandidateSelection
 from schemas.price_result import PriceInfo
+from schemas.steam_result import SteamInfo
 
 
 class SteamPriceState(TypedDict):
@@ -13,5 +14,7 @@ class SteamPriceState(TypedDict):
 
     selection: Optional[CandidateSelection]
     price_infos: List[PriceInfo]
+    # ITAD game id -> Steam 元数据，与 price 分支并行获取，可能不完整
+    steam_infos: Dict[str, SteamInfo]
 
     result: Optional[str]
@@ -1,13 +1,19 @@
+from functools import partial
+
+from langchain_core.runnables import RunnableLambda
 from langgraph.graph import StateGraph, END
 
 from graph.state import SteamPriceState
-from graph.nodes.resolve_entity import resolve_entity
-from graph.nodes.search_games import search_candidates
-from graph.nodes.select_candidate import select_candidates
-from graph.nodes.fetch_price import fetch_prices
-from graph.nodes.decide import make_decision
+from graph.nodes.resolve_entity import resolve_entity, aresolve_entity
+from graph.nodes.search_games import search_candidates, asearch_candidates
+from graph.nodes.select_candidate import select_candidates, aselect_candidates
+from graph.nodes.fetch_price import fetch_prices, afetch_prices
+from graph.nodes.fetch_meta import fetch_meta, afetch_meta
+from graph.nodes.decide import make_decision, amake_decision
 
 from agent.factory import create_agents
+from config.settings import settings
+from utils.tracing import trace_node
 
 
 def has_candidates(state: SteamPriceState):
@@ -18,16 +24,36 @@ def has_selection(state: SteamPriceState):
     return "price" if state["selection"] and state["selection"].selected_ids else "end"
 
 
-def build_graph():
-    agents = create_agents()
+def selection_branches(state: SteamPriceState):
+    # price 与 meta 两个分支并行执行，在 decide 前汇合
+    return ["price", "meta"] if has_selection(state) == "price" else "end"
+
+
+def _node(name, func, afunc, agents=None):
+    if agents is not None:
+        func = partial(func, agents=agents)
+        afunc = partial(afunc, agents=agents)
+    return RunnableLambda(trace_node(name, func), afunc=trace_node(name, afunc), name=name)
+
+
+def build_graph(agents=None, checkpointer=None):
+    """
+    agents: 复用已创建的 agents（见 runtime.SteamPriceRuntime），为空时新建
+    checkpointer: 可选的检查点存储（见 graph.checkpoint），启用后调用时需在 configurable 中给出 thread_id
+    """
+    if agents is None:
+        agents = create_agents()
 
     graph = StateGraph(SteamPriceState)
 
-    graph.add_node("resolve", lambda s: resolve_entity(s, agents))
-    graph.add_node("search", search_candidates)
-    graph.add_node("select", lambda s: select_candidates(s, agents))
-    graph.add_node("price", fetch_prices)
-    graph.add_node("decide", lambda s: make_decision(s, agents))
+    # 每个节点同时提供同步与异步实现：invoke/stream 走同步，ainvoke/astream 走异步
+    graph.add_node("resolve", _node("resolve", resolve_entity, aresolve_entity, agents))
+    graph.add_node("search", _node("search", search_candidates, asearch_candidates))
+    graph.add_node("select", _node("select", select_candidates, aselect_candidates, agents))
+    graph.add_node("price", _node("price", fetch_prices, afetch_prices))
+    if settings.META_ENABLED:
+        graph.add_node("meta", _node("meta", fetch_meta, afetch_meta))
+    graph.add_node("decide", _node("decide", make_decision, amake_decision, agents))
 
     graph.set_entry_point("resolve")
 
@@ -38,12 +64,19 @@ def build_graph():
         "end": END
     })
 
-    graph.add_conditional_edges("select", has_selection, {
-        "price": "price",
-        "end": END
-    })
-
-    graph.add_edge("price", "decide")
+    if settings.META_ENABLED:
+        graph.add_conditional_edges("select", selection_branches, {
+            "price": "price",
+            "meta": "meta",
+            "end": END
+        })
+        graph.add_edge(["price", "meta"], "decide")
+    else:
+        graph.add_conditional_edges("select", has_selection, {
+            "price": "price",
+            "end": END
+        })
+        graph.add_edge("price", "decide")
     graph.add_edge("decide", END)
 
-    return graph.compile()
+    return graph.compile(checkpointer=checkpointer)
@@ -0,0 +1,77 @@
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, Literal, Optional
+
+from utils.serialization import to_jsonable
+
+EventKind = Literal["game_entity", "candidates", "selection", "price_infos", "steam_infos", "decision", "result", "done"]
+
+# 节点输出的状态字段 -> 事件类型
+STATE_EVENTS = ("game_entity", "candidates", "selection", "price_infos", "steam_infos")
+
+
+@dataclass
+class GraphEvent:
+    kind: EventKind
+    data: Any = None
+    node: Optional[str] = None
+    index: Optional[int] = None
+    elapsed: float = field(default=0.0)
+
+    def to_dict(self) -> dict:
+        event = {"kind": self.kind, "node": self.node, "elapsed": round(self.elapsed, 4), "data": to_jsonable(self.data)}
+        if self.index is not None:
+            event["index"] = self.index
+        return event
+
+
+class _EventMapper:
+    """把 stream(["updates", "custom"]) 的输出转换为 GraphEvent"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.decisions_streamed = False
+
+    def map(self, mode: str, chunk: Any) -> Iterator[GraphEvent]:
+        elapsed = time.perf_counter() - self.start
+
+        if mode == "custom":
+            if isinstance(chunk, dict) and "decision" in chunk:
+                self.decisions_streamed = True
+                yield GraphEvent("decision", chunk["decision"], node="decide", index=chunk.get("index"), elapsed=elapsed)
+            return
+
+        for node, update in (chunk or {}).items():
+            if not isinstance(update, dict):
+                continue
+            for key in STATE_EVENTS:
+                if key in update:
+                    yield GraphEvent(key, update[key], node=node, elapsed=elapsed)
+            if "result" in update:
+                result = update["result"]
+                # 决策已逐条推送时不再重复，只有文本结果（如“暂无价格信息”）单独发出
+                if isinstance(result, list) and not self.decisions_streamed:
+                    for index, decision in enumerate(result):
+                        yield GraphEvent("decision", decision, node=node, index=index, elapsed=elapsed)
+                elif not isinstance(result, list):
+                    yield GraphEvent("result", result, node=node, elapsed=elapsed)
+
+    def done(self) -> GraphEvent:
+        return GraphEvent("done", elapsed=time.perf_counter() - self.start)
+
+
+def stream_events(graph, user_query: str, config: Optional[dict] = None) -> Iterator[GraphEvent]:
+    """同步流式执行编译后的图，每个节点完成（以及每条决策产生）时立即产出事件"""
+    mapper = _EventMapper()
+    for mode, chunk in graph.stream({"user_query": user_query}, config, stream_mode=["updates", "custom"]):
+        yield from mapper.map(mode, chunk)
+    yield mapper.done()
+
+
+async def astream_events(graph, user_query: str, config: Optional[dict] = None) -> AsyncIterator[GraphEvent]:
+    """stream_events 的异步版本"""
+    mapper = _EventMapper()
+    async for mode, chunk in graph.astream({"user_query": user_query}, config, stream_mode=["updates", "custom"]):
+        for event in mapper.map(mode, chunk):
+            yield event
+    yield mapper.done()
@@ -1,17 +1,36 @@
-from graph.steam_price_graph import build_graph
+import sys
 
 from utils.logger import setup_logging,get_logger
+from utils.tracing import setup_tracing
 
 logger = get_logger(__name__)
 
 
 def main():
+    # python main.py batch ...：批量模式，参数见 batch.py
+    if len(sys.argv) > 1 and sys.argv[1] == "batch":
+        from batch import main as batch_main
+
+        batch_main(sys.argv[2:])
+        return
+
+    # python main.py watch ...：关注列表批量刷新，参数见 watchlist.py
+    if len(sys.argv) > 1 and sys.argv[1] == "watch":
+        from watchlist import main as watch_main
+
+        watch_main(sys.argv[2:])
+        return
+
     setup_logging()
+    setup_tracing()
     user_query = input("请输入你想查询的游戏： ")
-    graph = build_graph()
-    graph.invoke({"user_query": user_query})
+
+    # 延迟导入：langchain / langgraph 只在真正执行查询时加载
+    from graph.streaming import stream_events
+    from runtime import get_runtime
+
+    for event in stream_events(get_runtime().graph, user_query):
+        logger.info(f"[{event.elapsed:.2f}s] {event.kind}: {event.data}")
 
 if __name__ == "__main__":
     main()
-
-    
\ No newline at end of file
@@ -0,0 +1,77 @@
+import threading
+import time
+from typing import Any, Optional
+
+from config.settings import settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class SteamPriceRuntime:
+    """
+    常驻运行时：LLM 客户端、agents 与编译后的图只构建一次，供多次查询复用。
+    langchain / langgraph 等重量级依赖在首次使用时才导入。
+    """
+
+    def __init__(self, enable_cache: Optional[bool] = None, checkpointer: Any = None):
+        self.enable_cache = enable_cache
+        self.checkpointer = checkpointer
+        self._agents = None
+        self._graph = None
+        self._lock = threading.Lock()
+        self.timings: dict = {}
+
+    @property
+    def agents(self) -> dict:
+        if self._agents is None:
+            with self._lock:
+                if self._agents is None:
+                    start = time.perf_counter()
+                    from agent.factory import create_agents
+
+                    self._agents = create_agents(enable_cache=self.enable_cache)
+                    self.timings["agents"] = time.perf_counter() - start
+        return self._agents
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            agents = self.agents
+            with self._lock:
+                if self._graph is None:
+                    start = time.perf_counter()
+                    from graph.steam_price_graph import build_graph
+
+                    self._graph = build_graph(agents, checkpointer=self.checkpointer)
+                    self.timings["graph"] = time.perf_counter() - start
+        return self._graph
+
+    def warmup(self) -> "SteamPriceRuntime":
+        """提前完成导入、提示词加载、图编译以及本地索引加载"""
+        from tools.title_index import get_title_index
+
+        self.graph
+        if settings.TITLE_INDEX_PATH:
+            get_title_index()
+        logger.info(f"Runtime warmed up: {self.timings}")
+        return self
+
+    def invoke(self, user_query: str, config: Optional[dict] = None) -> dict:
+        return self.graph.invoke({"user_query": user_query}, config)
+
+    async def ainvoke(self, user_query: str, config: Optional[dict] = None) -> dict:
+        return await self.graph.ainvoke({"user_query": user_query}, config)
+
+
+_runtime: Optional[SteamPriceRuntime] = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> SteamPriceRuntime:
+    """进程内共享的运行时"""
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = SteamPriceRuntime()
+        return _runtime
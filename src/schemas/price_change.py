@@ -0,0 +1,11 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+from schemas.price_result import PriceInfo
+
+
+class PriceChange(BaseModel):
+    game_id: str = Field(..., description="ITAD game id")
+    previous: Optional[PriceInfo] = Field(None, description="Last known price, None on first observation")
+    current: PriceInfo = Field(..., description="Newly fetched price")
+    observed_at: float = Field(..., description="Unix timestamp of the sweep that observed the change")
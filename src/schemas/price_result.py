@@ -1,6 +1,8 @@
 from pydantic import BaseModel, Field
+from typing import Optional
 
 class PriceInfo(BaseModel):
+    game_id: Optional[str] = Field(None, description="ITAD game id")
     current_price: float = Field(..., description="Current lowest price")
     historical_low: float = Field(..., description="Historical lowest price")
     discount_percent: int = Field(..., ge=0, le=100)
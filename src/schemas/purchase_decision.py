@@ -1,7 +1,11 @@
 from pydantic import BaseModel, Field
-from typing import Literal
+from typing import List, Literal
 
 class PurchaseDecision(BaseModel):
     recommendation: Literal["buy", "wait"] = Field(...,description="Buy recommendation: 'buy' or 'wait'")
     reason: str = Field(...,description="Detailed explanation for the recommendation")
-    confidence: float = Field(...,ge=0,le=1,description="Confidence level between 0 and 1")
\ No newline at end of file
+    confidence: float = Field(...,ge=0,le=1,description="Confidence level between 0 and 1")
+
+
+class PurchaseDecisionBatch(BaseModel):
+    decisions: List[PurchaseDecision] = Field(...,description="One decision per price info, in the same order as the input")
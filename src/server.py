@@ -0,0 +1,342 @@
+"""
+HTTP 服务模式：编译一次图，对外提供查询与批量接口（纯 ASGI，由 uvicorn 运行）。
+
+    POST /query  {"query": "艾尔登法环"}
+    POST /batch  {"queries": ["艾尔登法环", "黑神话"]}  最多 SERVER_MAX_BATCH 个查询，超出返回 413
+    POST /stream {"query": "艾尔登法环"}  -> NDJSON，每个节点完成即推送一行事件
+    GET  /health
+    GET  /stats
+
+用法（在 src 目录下）：
+    python server.py --port 8000
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from config.settings import settings
+from tools.app_id_map import get_app_id_map
+from tools.http_client import payload_stats
+from tools.steam_snapshot import get_steam_snapshot
+from utils.logger import setup_logging, get_logger
+from utils.resilience import CircuitOpenError, outbound_stats
+from utils.serialization import to_jsonable
+from utils.text import normalize_keyword
+from utils.token_usage import usage_stats
+from utils.tracing import setup_tracing
+
+logger = get_logger(__name__)
+
+
+class ServiceOverloaded(Exception):
+    """排队请求数已达上限"""
+
+
+class QueueTimeout(Exception):
+    """排队等待超时"""
+
+
+class BadRequest(Exception):
+    """请求体不合法"""
+
+
+class BatchTooLarge(Exception):
+    """批量请求的查询数超过 max_batch"""
+
+
+class QueryService:
+    """
+    准入控制：最多 max_inflight 个图同时运行，超出的请求排队（最多 max_queue 个，
+    等待不超过 queue_timeout 秒）。归一化后相同的在途查询共享同一次执行。
+    批量请求最多 max_batch 个查询，超出时整体拒绝，而不是让大部分查询在排队时被拒绝。
+    """
+
+    def __init__(
+        self,
+        graph: Any = None,
+        max_inflight: int = 16,
+        max_queue: int = 256,
+        queue_timeout: float = 30,
+        run_timeout: float = 120,
+        max_batch: int = 64,
+    ):
+        self._graph = graph
+        self.max_inflight = max_inflight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.run_timeout = run_timeout
+        self.max_batch = max_batch
+
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._waiting = 0
+        self._stats = {"requests": 0, "executions": 0, "merged": 0, "rejected": 0, "timeouts": 0, "errors": 0}
+
+    @property
+    def graph(self):
+        if self._graph is None:
+            from runtime import get_runtime
+
+            self._graph = get_runtime().graph
+        return self._graph
+
+    async def query(self, user_query: str) -> dict:
+        self._stats["requests"] += 1
+        key = normalize_keyword(user_query)
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self._stats["merged"] += 1
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(self._execute(user_query))
+        self._inflight[key] = future
+        future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    async def batch(self, queries: List[str]) -> List[dict]:
+        if len(queries) > self.max_batch:
+            self._stats["rejected"] += 1
+            raise BatchTooLarge(f"batch of {len(queries)} queries exceeds the limit of {self.max_batch}")
+        results = await asyncio.gather(*(self.query(query) for query in queries), return_exceptions=True)
+        return [
+            {"query": query, "ok": False, "error": _error_name(result)}
+            if isinstance(result, Exception)
+            else {"query": query, "ok": True, "state": result}
+            for query, result in zip(queries, results)
+        ]
+
+    def stats(self) -> dict:
+        return {
+            **self._stats,
+            "inflight": len(self._inflight),
+            "waiting": self._waiting,
+            "max_inflight": self.max_inflight,
+            "max_queue": self.max_queue,
+            "max_batch": self.max_batch,
+            "outbound": outbound_stats(),
+            "payload": payload_stats(),
+            "llm_usage": usage_stats(),
+            "app_id_map": app_id_map.stats() if (app_id_map := get_app_id_map()) is not None else None,
+            "steam_snapshot": snapshot.stats() if (snapshot := get_steam_snapshot()) is not None else None,
+        }
+
+    async def stream(self, user_query: str) -> AsyncIterator[dict]:
+        """流式执行（不参与在途合并），同样受准入控制约束"""
+        from graph.streaming import astream_events
+
+        self._stats["requests"] += 1
+        await self._acquire()
+        try:
+            self._stats["executions"] += 1
+            async for event in astream_events(self.graph, user_query):
+                yield event.to_dict()
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        finally:
+            self._semaphore.release()
+
+    async def _acquire(self) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_inflight)
+
+        if self._semaphore.locked():
+            if self._waiting >= self.max_queue:
+                self._stats["rejected"] += 1
+                raise ServiceOverloaded()
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self._stats["timeouts"] += 1
+                raise QueueTimeout() from None
+            finally:
+                self._waiting -= 1
+        else:
+            await self._semaphore.acquire()
+
+    async def _execute(self, user_query: str) -> dict:
+        await self._acquire()
+        try:
+            self._stats["executions"] += 1
+            state = await asyncio.wait_for(
+                self.graph.ainvoke({"user_query": user_query}), timeout=self.run_timeout
+            )
+            return to_jsonable(state)
+        except Exception:
+            self._stats["errors"] += 1
+            raise
+        finally:
+            self._semaphore.release()
+
+
+def _error_name(error: Exception) -> str:
+    if isinstance(error, ServiceOverloaded):
+        return "overloaded"
+    if isinstance(error, QueueTimeout):
+        return "queue_timeout"
+    if isinstance(error, BatchTooLarge):
+        return "batch_too_large"
+    if isinstance(error, asyncio.TimeoutError):
+        return "run_timeout"
+    return str(error) or type(error).__name__
+
+
+ERROR_STATUS = {
+    ServiceOverloaded: 429,
+    QueueTimeout: 503,
+    asyncio.TimeoutError: 504,
+    BadRequest: 400,
+    BatchTooLarge: 413,
+    CircuitOpenError: 503,
+}
+
+
+def create_app(service: Optional[QueryService] = None) -> Callable:
+    service = service or QueryService(
+        max_inflight=settings.SERVER_MAX_INFLIGHT,
+        max_queue=settings.SERVER_MAX_QUEUE,
+        queue_timeout=settings.SERVER_QUEUE_TIMEOUT,
+        run_timeout=settings.SERVER_RUN_TIMEOUT,
+        max_batch=settings.SERVER_MAX_BATCH,
+    )
+
+    async def app(scope: dict, receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await _lifespan(service, receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        method, path = scope["method"], scope["path"]
+        try:
+            if method == "GET" and path == "/health":
+                await _send_json(send, 200, {"status": "ok"})
+            elif method == "GET" and path == "/stats":
+                await _send_json(send, 200, service.stats())
+            elif method == "POST" and path == "/query":
+                body = await _read_json(receive)
+                query = (body.get("query") or "").strip()
+                if not query:
+                    raise BadRequest("missing query")
+                start = time.perf_counter()
+                state = await service.query(query)
+                await _send_json(send, 200, {"query": query, "state": state, "latency": time.perf_counter() - start})
+            elif method == "POST" and path == "/stream":
+                body = await _read_json(receive)
+                query = (body.get("query") or "").strip()
+                if not query:
+                    raise BadRequest("missing query")
+                await _send_stream(send, service.stream(query))
+            elif method == "POST" and path == "/batch":
+                body = await _read_json(receive)
+                queries = [q.strip() for q in body.get("queries") or [] if isinstance(q, str) and q.strip()]
+                if not queries:
+                    raise BadRequest("missing queries")
+                await _send_json(send, 200, {"results": await service.batch(queries)})
+            else:
+                await _send_json(send, 404, {"error": "not found"})
+        except Exception as e:
+            status = next((code for exc, code in ERROR_STATUS.items() if isinstance(e, exc)), 500)
+            if status == 500:
+                logger.exception(f"Request {method} {path} failed")
+            await _send_json(send, status, {"error": _error_name(e)})
+
+    app.service = service
+    return app
+
+
+async def _lifespan(service: QueryService, receive: Callable, send: Callable) -> None:
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            # 启动时编译图，避免首个请求承担冷启动开销
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, lambda: service.graph)
+            except Exception as e:
+                logger.exception("Failed to build graph on startup")
+                await send({"type": "lifespan.startup.failed", "message": str(e)})
+                return
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            from tools.http_client import aclose_async_client
+
+            await aclose_async_client()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def _read_json(receive: Callable[[], Awaitable[dict]]) -> dict:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    try:
+        body = json.loads(b"".join(chunks) or b"{}")
+    except ValueError:
+        raise BadRequest("invalid JSON body") from None
+    if not isinstance(body, dict):
+        raise BadRequest("JSON body must be an object")
+    return body
+
+
+async def _send_json(send: Callable, status: int, payload: Any) -> None:
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json; charset=utf-8"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def _send_stream(send: Callable, events: AsyncIterator[dict]) -> None:
+    # 先取第一条事件，准入失败时仍可返回普通的错误状态码
+    try:
+        first = await events.__anext__()
+    except StopAsyncIteration:
+        from graph.streaming import GraphEvent
+
+        # 没有任何事件时只返回终止事件，而不是让 StopAsyncIteration 变成 500
+        first = GraphEvent("done").to_dict()
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/x-ndjson; charset=utf-8")],
+    })
+
+    async def write(event: dict) -> None:
+        line = json.dumps(event, ensure_ascii=False).encode("utf-8") + b"\n"
+        await send({"type": "http.response.body", "body": line, "more_body": True})
+
+    await write(first)
+    try:
+        async for event in events:
+            await write(event)
+    except Exception as e:
+        logger.exception("Streaming query failed")
+        await write({"kind": "error", "data": _error_name(e)})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the Steam price graph over HTTP")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    args = parser.parse_args()
+
+    setup_logging()
+    setup_tracing()
+
+    import uvicorn
+
+    uvicorn.run(create_app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
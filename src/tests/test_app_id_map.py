@@ -0,0 +1,56 @@
+import math
+import threading
+from typing import Dict, List
+
+from tools.app_id_map import AppIdMap
+
+
+class CountingLookup:
+    """记录每次上游 lookup 的 id 数，每个 id 映射到固定的 appid"""
+
+    def __init__(self):
+        self.calls: List[int] = []
+        self._lock = threading.Lock()
+
+    def __call__(self, game_ids: List[str]) -> Dict[str, str]:
+        with self._lock:
+            self.calls.append(len(game_ids))
+        return {game_id: f"app-{game_id}" for game_id in game_ids}
+
+
+def test_concurrent_prefetches_are_merged_into_bulk_lookups(tmp_path):
+    lookup = CountingLookup()
+    index = AppIdMap(str(tmp_path / "app_ids.sqlite"), window=0.2, batch_size=20, fetch=lookup)
+    callers = 50
+    barrier = threading.Barrier(callers)
+    futures = []
+
+    def search(i: int) -> None:
+        barrier.wait()
+        futures.extend(index.prefetch([f"game-{i}", "shared"]))
+
+    threads = [threading.Thread(target=search, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for future in futures:
+        future.result(timeout=5)
+
+    # 51 个不同的 id（含所有调用方共享的一个）合并为 ceil(51 / 20) 次上游请求
+    assert len(lookup.calls) == math.ceil((callers + 1) / 20)
+    assert sum(lookup.calls) == callers + 1
+    assert index.resolve(["game-7", "shared"]) == {"game-7": "app-game-7", "shared": "app-shared"}
+    assert index.stats()["pending"] == 0
+    index.close()
+
+
+def test_resolve_waits_for_background_fill(tmp_path):
+    lookup = CountingLookup()
+    index = AppIdMap(str(tmp_path / "app_ids.sqlite"), window=0.01, fetch=lookup)
+
+    assert index.resolve(["a", "b"], wait=5) == {"a": "app-a", "b": "app-b"}
+    # 已知映射不再访问上游
+    assert index.resolve(["a"]) == {"a": "app-a"}
+    assert lookup.calls == [2]
+    index.close()
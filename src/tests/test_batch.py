@@ -0,0 +1,72 @@
+import asyncio
+import io
+import json
+from types import SimpleNamespace
+from typing import List, TypedDict
+
+from langgraph.graph import END, StateGraph
+
+from batch import run_batch
+from graph.checkpoint import SqliteCheckpointSaver, thread_id_for
+
+
+class State(TypedDict, total=False):
+    user_query: str
+    price_infos: List[str]
+    result: str
+
+
+def _runtime(path: str, calls: List[str], failing: set) -> SimpleNamespace:
+    """price -> decide 两个节点的图；failing 中的查询在 decide 失败"""
+
+    def price(state: State) -> dict:
+        calls.append(f"price:{state['user_query']}")
+        return {"price_infos": [state["user_query"]]}
+
+    def decide(state: State) -> dict:
+        calls.append(f"decide:{state['user_query']}")
+        if state["user_query"] in failing:
+            raise RuntimeError("upstream failed")
+        return {"result": "buy"}
+
+    builder = StateGraph(State)
+    builder.add_node("price", price)
+    builder.add_node("decide", decide)
+    builder.set_entry_point("price")
+    builder.add_edge("price", "decide")
+    builder.add_edge("decide", END)
+    checkpointer = SqliteCheckpointSaver(path)
+    return SimpleNamespace(graph=builder.compile(checkpointer=checkpointer), checkpointer=checkpointer)
+
+
+def _run(runtime, queries: List[str]) -> dict:
+    out = io.StringIO()
+    summary = asyncio.run(run_batch(queries, out, concurrency=2, runtime=runtime, run_id="nightly"))
+    summary["records"] = {record["query"]: record for record in map(json.loads, out.getvalue().splitlines())}
+    return summary
+
+
+def test_written_results_do_not_survive_a_partially_failed_batch(tmp_path):
+    path = str(tmp_path / "checkpoints.sqlite")
+    calls: List[str] = []
+    runtime = _runtime(path, calls, failing={"Hades"})
+
+    first = _run(runtime, ["Elden Ring", "Hades"])
+    assert first["failed"] == 1
+    # 成功写出的查询立即清理检查点，失败的查询保留以便继续
+    assert runtime.checkpointer.get_tuple({"configurable": {"thread_id": thread_id_for("Elden Ring", "nightly")}}) is None
+    assert runtime.checkpointer.get_tuple({"configurable": {"thread_id": thread_id_for("Hades", "nightly")}}) is not None
+
+    calls.clear()
+    runtime = _runtime(path, calls, failing=set())
+    second = _run(runtime, ["Elden Ring", "Hades"])
+
+    assert second["failed"] == 0
+    # 成功过的查询重新获取价格，而不是复用上一次运行的结果
+    assert second["records"]["Elden Ring"]["checkpoint"] == "fresh"
+    assert "price:Elden Ring" in calls
+    # 失败的查询从 decide 继续，不再重复 price
+    assert second["records"]["Hades"]["checkpoint"] == "resumed"
+    assert "price:Hades" not in calls
+    assert "decide:Hades" in calls
+    assert list(runtime.checkpointer.list(None)) == []
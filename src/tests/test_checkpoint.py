@@ -0,0 +1,107 @@
+import asyncio
+from typing import List, TypedDict
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+from langgraph.graph import END, StateGraph
+
+from graph.checkpoint import SqliteCheckpointSaver, thread_id_for
+
+NODES = ["resolve", "search", "price", "decide"]
+
+
+class State(TypedDict, total=False):
+    user_query: str
+    steps: List[str]
+
+
+def _graph(checkpointer: SqliteCheckpointSaver, calls: List[str], interrupt: bool):
+    """按 NODES 顺序串联的图，每个节点记录自己被执行；interrupt 时在 price 之后中断"""
+
+    def node(name: str):
+        def run(state: State) -> dict:
+            calls.append(name)
+            return {"steps": state.get("steps", []) + [name]}
+
+        async def arun(state: State) -> dict:
+            return run(state)
+
+        return run, arun
+
+    builder = StateGraph(State)
+    for name in NODES:
+        run, arun = node(name)
+        builder.add_node(name, RunnableLambda(run, afunc=arun, name=name))
+    builder.set_entry_point(NODES[0])
+    for current, following in zip(NODES, NODES[1:]):
+        builder.add_edge(current, following)
+    builder.add_edge(NODES[-1], END)
+    return builder.compile(checkpointer=checkpointer, interrupt_after=["price"] if interrupt else None)
+
+
+@pytest.mark.parametrize("use_async", [False, True])
+def test_resume_after_interrupt_runs_only_remaining_nodes(tmp_path, use_async):
+    path = str(tmp_path / "checkpoints.sqlite")
+    config = {"configurable": {"thread_id": thread_id_for("Elden Ring", "run")}}
+    calls: List[str] = []
+
+    saver = SqliteCheckpointSaver(path)
+    graph = _graph(saver, calls, interrupt=True)
+    if use_async:
+        asyncio.run(graph.ainvoke({"user_query": "Elden Ring"}, config))
+    else:
+        graph.invoke({"user_query": "Elden Ring"}, config)
+    assert calls == ["resolve", "search", "price"]
+    saver.close()
+
+    # 新的 saver 实例（相当于进程重启）从同一文件读回检查点
+    calls.clear()
+    saver = SqliteCheckpointSaver(path)
+    graph = _graph(saver, calls, interrupt=False)
+    snapshot = graph.get_state(config)
+    assert snapshot.next == ("decide",)
+    assert snapshot.values["steps"] == ["resolve", "search", "price"]
+
+    if use_async:
+        state = asyncio.run(graph.ainvoke(None, config))
+    else:
+        state = graph.invoke(None, config)
+    assert calls == ["decide"]
+    assert state["steps"] == NODES
+    assert graph.get_state(config).next == ()
+    saver.close()
+
+
+def test_list_get_tuple_and_delete_thread(tmp_path):
+    saver = SqliteCheckpointSaver(str(tmp_path / "checkpoints.sqlite"))
+    calls: List[str] = []
+    graph = _graph(saver, calls, interrupt=False)
+    first = {"configurable": {"thread_id": "run:a"}}
+    second = {"configurable": {"thread_id": "run:b"}}
+    graph.invoke({"user_query": "a"}, first)
+    graph.invoke({"user_query": "b"}, second)
+
+    history = list(saver.list(first))
+    # 最新的检查点在前，每个都可以按 checkpoint_id 单独取回，父子关系连续
+    assert history[0].checkpoint["id"] == saver.get_tuple(first).checkpoint["id"]
+    assert [item.checkpoint["id"] for item in history] == sorted((item.checkpoint["id"] for item in history), reverse=True)
+    for newer, older in zip(history, history[1:]):
+        assert newer.parent_config["configurable"]["checkpoint_id"] == older.checkpoint["id"]
+        assert saver.get_tuple(older.config).checkpoint["id"] == older.checkpoint["id"]
+    assert len(list(saver.list(first, limit=2))) == 2
+    assert len(list(saver.list(first, before=history[0].config))) == len(history) - 1
+    assert [item.metadata["step"] for item in saver.list(first, filter={"step": 0})] == [0]
+
+    async def async_view():
+        items = [item async for item in saver.alist(second)]
+        return items, await saver.aget_tuple(second)
+
+    items, latest = asyncio.run(async_view())
+    assert items[0].checkpoint["id"] == latest.checkpoint["id"]
+
+    asyncio.run(saver.adelete_thread("run:b"))
+    saver.delete_thread("run:a")
+    assert saver.get_tuple(first) is None
+    assert saver.get_tuple(second) is None
+    assert list(saver.list(None)) == []
+    saver.close()
@@ -0,0 +1,99 @@
+import threading
+import time
+
+from pydantic import BaseModel
+
+from agent.llm_cache import StructuredOutputCache, _key
+
+VECTORS = {
+    "elden ring": [1.0, 0.0, 0.0],
+    # 与 elden ring 的余弦相似度恰为 0.6，与 hades 正交
+    "elden ring goty": [3.0, 4.0, 0.0],
+    "hades": [0.0, 0.0, 1.0],
+}
+
+
+class Answer(BaseModel):
+    title: str
+
+
+def _embed(text: str):
+    return VECTORS.get(text, [1.0, 1.0, 1.0])
+
+
+def _rows(cache: StructuredOutputCache) -> int:
+    with cache.store.locked_connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+def test_exact_hit(tmp_path):
+    cache = StructuredOutputCache(path=str(tmp_path / "llm.sqlite"), embed_fn=_embed)
+    cache.set("scope", "Elden Ring", Answer(title="ELDEN RING"))
+
+    assert cache.get("scope", " elden  ring ") == {"title": "ELDEN RING"}
+    assert cache.get("other", "Elden Ring") is None
+    # 未开启 semantic 时不做近似匹配
+    assert cache.get("scope", "Elden Ring GOTY") is None
+
+
+def test_semantic_hit_at_threshold(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    cache = StructuredOutputCache(path=path, embed_fn=_embed, similarity_threshold=0.6)
+    cache.set("scope", "Elden Ring", Answer(title="ELDEN RING"), semantic=True)
+
+    assert cache.get("scope", "Elden Ring GOTY", semantic=True) == {"title": "ELDEN RING"}
+    assert cache.get("scope", "Hades", semantic=True) is None
+
+    stricter = StructuredOutputCache(path=path, embed_fn=_embed, similarity_threshold=0.6001)
+    assert stricter.get("scope", "Elden Ring GOTY", semantic=True) is None
+
+
+def test_vector_evicted_with_expired_cache_row(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    cache = StructuredOutputCache(path=path, ttl=0.05, embed_fn=_embed, similarity_threshold=0.6)
+    cache.set("scope", "Elden Ring", Answer(title="ELDEN RING"), semantic=True)
+    cache.set("scope", "Hades", Answer(title="Hades"), semantic=True)
+    assert _rows(cache) == 2
+    time.sleep(0.06)
+
+    # 近似命中指向已过期的条目：返回未命中，向量同时从内存与表中删除
+    assert cache.get("scope", "Elden Ring GOTY", semantic=True) is None
+    assert cache._vectors["scope"][0] == [_key("scope", "Hades")]
+    assert _rows(cache) == 1
+
+    # 重新打开时清理剩余的过期向量
+    reopened = StructuredOutputCache(path=path, ttl=0.05, embed_fn=_embed)
+    assert reopened._vectors == {}
+    assert _rows(reopened) == 0
+
+
+def test_vectors_capped_per_scope(tmp_path):
+    cache = StructuredOutputCache(path=str(tmp_path / "llm.sqlite"), max_entries=3, embed_fn=lambda text: [1.0, len(text)])
+    for i in range(10):
+        cache.set("scope", f"query {i}", Answer(title=str(i)), semantic=True)
+
+    assert len(cache._vectors["scope"][0]) == 3
+    assert cache._vectors["scope"][1].shape == (3, 2)
+    assert _rows(cache) == 3
+
+
+def test_concurrent_semantic_writes_share_one_connection(tmp_path):
+    cache = StructuredOutputCache(path=str(tmp_path / "llm.sqlite"), embed_fn=lambda text: [1.0, len(text)])
+    errors = []
+
+    def write(worker: int) -> None:
+        try:
+            for i in range(60):
+                cache.set(f"scope-{worker % 2}", f"worker {worker} query {i}", Answer(title=str(i)), semantic=True)
+                cache.get(f"scope-{worker % 2}", f"worker {worker} query {i}x", semantic=True)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(worker,)) for worker in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert _rows(cache) == 8 * 60
@@ -0,0 +1,108 @@
+import os
+import threading
+import time
+
+from schemas.price_result import PriceInfo
+from tools.price_history import PriceHistoryStore
+
+BATCH = 25
+BATCHES = 30
+
+
+def _prices(game_id: str, count: int):
+    return [
+        PriceInfo(game_id=game_id, current_price=10.0 + i, historical_low=5.0, discount_percent=i % 100, store="Steam")
+        for i in range(count)
+    ]
+
+
+def test_rows_counted_once_across_flush_and_compaction(tmp_path):
+    store = PriceHistoryStore(str(tmp_path), flush_rows=40, compact_segments=1000, max_compacted=3)
+    game_ids = [f"game-{i}" for i in range(BATCHES)]
+    stop = threading.Event()
+    errors = []
+    reads = []
+
+    def reader() -> None:
+        # 每个游戏的行要么全部可见、要么（尚未记录时）全部不可见；一旦可见就不会再消失
+        seen = set()
+        try:
+            while not stop.is_set():
+                summaries = store.summaries(game_ids)
+                counts = {game_id: summary["observations"] for game_id, summary in summaries.items()}
+                assert all(count == BATCH for count in counts.values()), counts
+                assert seen <= set(counts), seen - set(counts)
+                seen = set(counts)
+                reads.append(len(counts))
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+
+    readers = [threading.Thread(target=reader) for _ in range(3)]
+    for thread in readers:
+        thread.start()
+    try:
+        for i, game_id in enumerate(game_ids):
+            # 超过 flush_rows 时在后台落盘，另外穿插显式落盘、增量合并与全量合并
+            store.record(_prices(game_id, BATCH))
+            if i % 3 == 0:
+                store.flush()
+            if i % 5 == 0:
+                store.compact()
+            if i % 7 == 0:
+                store.compact(full=True)
+            if stop.is_set():
+                break
+        store.flush()
+        store.compact(full=True)
+    finally:
+        stop.set()
+        for thread in readers:
+            thread.join()
+
+    assert errors == []
+    assert reads
+    summaries = store.summaries(game_ids)
+    assert {game_id: summary["observations"] for game_id, summary in summaries.items()} == {
+        game_id: BATCH for game_id in game_ids
+    }
+    assert store.read().num_rows == BATCH * BATCHES
+    stats = store.stats()
+    assert stats["flushes"] > 0 and stats["compactions"] > 0
+    assert stats["buffered"] == 0 and stats["files"] == 1
+    store.close()
+
+
+def test_read_retries_when_compaction_removes_its_files(tmp_path, monkeypatch):
+    import tools.price_history as price_history
+
+    store = PriceHistoryStore(str(tmp_path), flush_rows=10_000, compact_segments=1000)
+    for game_id in ("a", "b", "c"):
+        store.record(_prices(game_id, BATCH))
+        store.flush()
+
+    read_table = price_history.pq.read_table
+    calls = []
+    missing = []
+
+    def compact_during_first_read(path, **kwargs):
+        # 第一次读取开始时另一个线程完成合并并删除了分段文件
+        calls.append(path)
+        if len(calls) == 1:
+            threading.Thread(target=store.compact).start()
+            while any(os.path.exists(f) for f in first_files):
+                time.sleep(0.001)
+        try:
+            return read_table(path, **kwargs)
+        except FileNotFoundError:
+            missing.append(path)
+            raise
+
+    first_files = list(store._files)
+    monkeypatch.setattr(price_history.pq, "read_table", compact_during_first_read)
+
+    summaries = store.summaries(["a", "b", "c"])
+    assert {game_id: summary["observations"] for game_id, summary in summaries.items()} == {"a": BATCH, "b": BATCH, "c": BATCH}
+    # 第一次读取遇到已删除的文件，重新取文件清单后读到合并文件，每行只计一次
+    assert missing == first_files[:1]
+    store.close()
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+from utils.resilience import CircuitBreaker, CircuitOpenError, OutboundGuard
+
+
+def test_rate_limited_probe_closes_half_open_breaker():
+    guard = OutboundGuard("test", max_retries=3, backoff_base=0.0, breaker_threshold=1, breaker_cooldown=0.05)
+    guard.before_attempt()
+    # 连接错误使熔断器打开，且打开后不再重试
+    assert guard.on_error(0) is None
+    assert guard.breaker.state == "open"
+
+    time.sleep(0.06)
+    guard.before_attempt()
+    assert guard.breaker.state == "half_open"
+
+    # 试探请求被限流：返回重试延迟，熔断器关闭，重试可以发出
+    assert guard.on_response(429, "0", 0) == 0.0
+    assert guard.breaker.state == "closed"
+    assert guard.breaker.allow()
+    guard.before_attempt()
+
+
+def test_failed_probe_reopens_breaker():
+    guard = OutboundGuard("test", breaker_threshold=1, breaker_cooldown=0.05)
+    guard.on_failure()
+    time.sleep(0.06)
+    guard.before_attempt()
+    guard.on_failure()
+    assert guard.breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        guard.before_attempt()
+
+
+def test_half_open_without_result_reopens_after_cooldown():
+    breaker = CircuitBreaker(threshold=1, cooldown=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert not breaker.allow()
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+
+
+def test_cancellation_does_not_count_toward_threshold():
+    guard = OutboundGuard("test", breaker_threshold=2, breaker_cooldown=0.05)
+    for _ in range(5):
+        guard.before_attempt()
+        guard.on_cancel()
+    assert guard.breaker.state == "closed"
+    assert guard.stats()["failures"] == 0
+    assert guard.stats()["cancelled"] == 5
+
+
+def test_cancelled_probe_releases_half_open_slot():
+    guard = OutboundGuard("test", breaker_threshold=1, breaker_cooldown=0.05)
+    guard.on_failure()
+    time.sleep(0.06)
+    guard.before_attempt()
+    assert guard.breaker.state == "half_open"
+
+    # 试探请求被取消：不重新计算冷却，下一次调用立即成为新的试探请求
+    guard.on_cancel()
+    assert guard.breaker.state == "open"
+    guard.before_attempt()
+    assert guard.breaker.state == "half_open"
+    guard.breaker.record_success()
+    assert guard.breaker.state == "closed"
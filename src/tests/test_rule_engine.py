@@ -0,0 +1,79 @@
+from typing import Optional
+
+import pytest
+
+from agent.rule_engine import DecisionRuleEngine, DecisionRules
+from schemas.price_result import PriceInfo
+from schemas.steam_result import SteamInfo
+
+GOOD = "特别好评"
+
+
+def _price(current: float, low: float, discount: int) -> PriceInfo:
+    return PriceInfo(game_id="g", current_price=current, historical_low=low, discount_percent=discount, store="Steam")
+
+
+def _steam(rating: Optional[str]) -> Optional[SteamInfo]:
+    if rating is None:
+        return None
+    return SteamInfo(recent_rating=rating, tags=[], release_type="老作")
+
+
+def _history(min_price: Optional[float]) -> Optional[dict]:
+    return None if min_price is None else {"observations": 3, "min_price": min_price}
+
+
+@pytest.mark.parametrize(
+    "current, low, discount, rating, history_min, expected",
+    [
+        # at_low：当前价等于或低于史低，评价与历史都中性时直接买入
+        (10.0, 10.0, 50, GOOD, None, "buy"),
+        (9.5, 10.0, 50, "多半好评", None, "buy"),
+        (10.0, 10.0, 0, GOOD, None, "buy"),
+        (10.0, 10.0, 50, GOOD, 10.0, "buy"),
+        (10.01, 10.0, 50, GOOD, None, None),
+        # 评价未知或偏负面：交给 LLM，而不是退回到 wait
+        (10.0, 10.0, 50, None, None, None),
+        (10.0, 10.0, 50, "暂无评价", None, None),
+        (10.0, 10.0, 50, "褒贬不一", None, None),
+        (10.0, 10.0, 0, "差评如潮", None, None),
+        # 本地价格历史中出现过更低的价格
+        (10.0, 10.0, 50, GOOD, 9.99, None),
+        # wait：无折扣且史低不高于当前价的 (1 - wait_depth)，边界包含在内，与评价无关
+        (20.0, 10.0, 0, GOOD, None, "wait"),
+        (20.0, 10.0, 0, "差评", None, "wait"),
+        (20.0, 10.0, 0, None, None, "wait"),
+        (19.98, 10.0, 0, GOOD, None, None),
+        (20.0, 10.0, 10, GOOD, None, None),
+        # 其余情况交给 LLM
+        (15.0, 10.0, 25, GOOD, None, None),
+    ],
+)
+def test_rule_boundaries(current, low, discount, rating, history_min, expected):
+    engine = DecisionRuleEngine(DecisionRules(buy_margin=0.0, wait_depth=0.5))
+    [decision] = engine.evaluate(
+        [_price(current, low, discount)], steam_infos=[_steam(rating)], histories=[_history(history_min)]
+    )
+    assert (decision.recommendation if decision is not None else None) == expected
+
+
+@pytest.mark.parametrize("current, expected", [(11.0, "buy"), (11.01, None)])
+def test_buy_margin_boundary(current, expected):
+    engine = DecisionRuleEngine(DecisionRules(buy_margin=0.1))
+    [decision] = engine.evaluate([_price(current, 10.0, 30)], steam_infos=[_steam(GOOD)])
+    assert (decision.recommendation if decision is not None else None) == expected
+
+
+def test_buy_requires_context_and_results_keep_input_order():
+    engine = DecisionRuleEngine(DecisionRules())
+    prices = [_price(10.0, 10.0, 50), _price(20.0, 10.0, 0), _price(15.0, 10.0, 25)]
+
+    # 不提供评价时没有买入捷径
+    assert [d and d.recommendation for d in engine.evaluate(prices)] == [None, "wait", None]
+    decisions = engine.evaluate(prices, steam_infos=[_steam(GOOD)] * 3, histories=None)
+    assert [d and d.recommendation for d in decisions] == ["buy", "wait", None]
+    assert engine.evaluate([]) == []
+
+    stats = engine.stats()
+    assert stats["evaluated"] == 6
+    assert stats["short_circuited"] == 3
@@ -0,0 +1,124 @@
+import asyncio
+import json
+
+import httpx
+
+from server import QueryService, create_app
+
+
+class StubGraph:
+    """在 release 之前阻塞的图，记录每次执行的查询"""
+
+    def __init__(self):
+        self.calls = []
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def ainvoke(self, state: dict) -> dict:
+        self.calls.append(state["user_query"])
+        self.started.set()
+        await self.release.wait()
+        return {"user_query": state["user_query"], "result": "ok"}
+
+
+def _client(service: QueryService) -> httpx.AsyncClient:
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=create_app(service)), base_url="http://test")
+
+
+def test_identical_inflight_queries_share_one_execution():
+    async def scenario():
+        graph = StubGraph()
+        service = QueryService(graph)
+        async with _client(service) as client:
+            first = asyncio.ensure_future(client.post("/query", json={"query": "Elden Ring"}))
+            await graph.started.wait()
+            # 归一化后相同的查询合并到正在执行的那一次
+            second = asyncio.ensure_future(client.post("/query", json={"query": " elden  ring "}))
+            while service._stats["merged"] < 1:
+                await asyncio.sleep(0.01)
+            graph.release.set()
+            responses = await asyncio.gather(first, second)
+
+        assert [response.status_code for response in responses] == [200, 200]
+        assert responses[0].json()["state"] == responses[1].json()["state"]
+        assert graph.calls == ["Elden Ring"]
+        assert service._stats["executions"] == 1
+        assert service._stats["merged"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_rejects_with_429():
+    async def scenario():
+        graph = StubGraph()
+        service = QueryService(graph, max_inflight=1, max_queue=0)
+        async with _client(service) as client:
+            first = asyncio.ensure_future(client.post("/query", json={"query": "Elden Ring"}))
+            await graph.started.wait()
+            rejected = await client.post("/query", json={"query": "Hades"})
+            graph.release.set()
+            assert (await first).status_code == 200
+
+        assert rejected.status_code == 429
+        assert rejected.json() == {"error": "overloaded"}
+        assert graph.calls == ["Elden Ring"]
+        assert service._stats["rejected"] == 1
+
+    asyncio.run(scenario())
+
+
+def test_queued_query_times_out_with_503():
+    async def scenario():
+        graph = StubGraph()
+        service = QueryService(graph, max_inflight=1, max_queue=1, queue_timeout=0.05)
+        async with _client(service) as client:
+            first = asyncio.ensure_future(client.post("/query", json={"query": "Elden Ring"}))
+            await graph.started.wait()
+            timed_out = await client.post("/query", json={"query": "Hades"})
+            graph.release.set()
+            assert (await first).status_code == 200
+
+        assert timed_out.status_code == 503
+        assert timed_out.json() == {"error": "queue_timeout"}
+        assert graph.calls == ["Elden Ring"]
+        assert service._stats["timeouts"] == 1
+        assert service._waiting == 0
+
+    asyncio.run(scenario())
+
+
+def test_oversized_batch_rejected_with_413():
+    async def scenario():
+        graph = StubGraph()
+        graph.release.set()
+        service = QueryService(graph, max_batch=2)
+        async with _client(service) as client:
+            rejected = await client.post("/batch", json={"queries": ["Elden Ring", "Hades", "Celeste"]})
+            accepted = await client.post("/batch", json={"queries": ["Elden Ring", "Hades"]})
+
+        assert rejected.status_code == 413
+        assert rejected.json() == {"error": "batch_too_large"}
+        assert accepted.status_code == 200
+        assert [result["ok"] for result in accepted.json()["results"]] == [True, True]
+        assert sorted(graph.calls) == ["Elden Ring", "Hades"]
+
+    asyncio.run(scenario())
+
+
+def test_empty_stream_sends_terminal_event():
+    async def scenario():
+        service = QueryService(StubGraph())
+
+        async def no_events(user_query: str):
+            return
+            yield
+
+        service.stream = no_events
+        async with _client(service) as client:
+            response = await client.post("/stream", json={"query": "Elden Ring"})
+
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["kind"] for line in lines] == ["done"]
+
+    asyncio.run(scenario())
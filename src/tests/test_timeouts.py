@@ -0,0 +1,44 @@
+import threading
+import time
+
+import graph.nodes.timeouts as timeouts
+from graph.nodes.timeouts import BRANCH_WORKERS, run_with_timeout
+
+
+def _wait_for_idle_workers(deadline: float = 5.0) -> None:
+    end = time.monotonic() + deadline
+    while timeouts._branch_inflight and time.monotonic() < end:
+        time.sleep(0.01)
+    assert timeouts._branch_inflight == 0
+
+
+def test_saturated_pool_skips_optional_branch_and_recovers():
+    release = threading.Event()
+    try:
+        # 每个调用都超时返回，但线程一直占用到 release
+        for _ in range(BRANCH_WORKERS):
+            assert run_with_timeout(release.wait, 0.001, "default", "slow branch", optional=True) == "default"
+        assert timeouts._branch_inflight == BRANCH_WORKERS
+
+        ran = []
+        start = time.monotonic()
+        assert run_with_timeout(lambda: ran.append("meta"), 5, "default", "meta", optional=True) == "default"
+        # 不排队等待，也不执行
+        assert time.monotonic() - start < 1
+        assert ran == []
+
+        # 必需分支在调用方线程中直接执行
+        assert run_with_timeout(lambda: threading.current_thread().name, 5, None, "price") == threading.current_thread().name
+    finally:
+        release.set()
+
+    _wait_for_idle_workers()
+    assert run_with_timeout(lambda: "fresh", 5, "default", "meta", optional=True) == "fresh"
+
+
+def test_optional_branch_errors_return_default():
+    def fail():
+        raise RuntimeError("upstream down")
+
+    assert run_with_timeout(fail, 5, {}, "meta", optional=True) == {}
+    _wait_for_idle_workers()
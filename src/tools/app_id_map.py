@@ -0,0 +1,296 @@
+"""
+ITAD game id ↔ Steam appid 的本地双向映射索引。
+
+映射持久化在 SQLite 中，启动时整表载入内存 dict，热路径查询为 O(1) 且不访问网络；
+未命中的 id 进入共享队列，由单个后台线程在短窗口后合并各调用方的 id、按 FILL_BATCH_SIZE 大批量调用 lookup 接口补全，"在 Steam 上没有应用"的结果同样缓存
+（APP_ID_MAP_NEGATIVE_TTL 后重新确认）。搜索节点拿到候选后即预取，元数据节点查询时通常已经命中。
+
+批量预填充 / 查看统计（在 src 目录下）：
+    python -m tools.app_id_map fill --file itad_ids.txt
+    python -m tools.app_id_map fill --watchlist
+    python -m tools.app_id_map stats
+"""
+import argparse
+import asyncio
+import atexit
+import concurrent.futures
+import itertools
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.settings import settings
+from tools.itad_lookup import LOOKUP_CHUNK_SIZE, steam_app_ids
+from utils.logger import setup_logging, get_logger
+
+logger = get_logger(__name__)
+
+# 后台补全每次提交给 lookup 的 id 数（steam_app_ids 内部再按 LOOKUP_CHUNK_SIZE 分块）
+FILL_BATCH_SIZE = LOOKUP_CHUNK_SIZE * 10
+
+
+class AppIdMap:
+    """SQLite 持久化、内存查询的双向映射；统计命中、否定命中（确认无 Steam 应用）与未命中次数"""
+
+    def __init__(
+        self,
+        path: str,
+        negative_ttl: float = 7 * 86400,
+        window: float = 0.02,
+        batch_size: int = FILL_BATCH_SIZE,
+        fetch: Callable[[List[str]], Dict[str, str]] = steam_app_ids,
+    ):
+        """
+        window: 后台补全开始前等待的秒数，期间到达的未命中 id 合并到同一批
+        batch_size: 每次 lookup 提交的最大 id 数
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.negative_ttl = negative_ttl
+        self.window = window
+        self.batch_size = batch_size
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS app_ids (game_id TEXT PRIMARY KEY, app_id TEXT, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS app_ids_app_id ON app_ids (app_id)")
+        self._conn.commit()
+
+        # game_id -> (app_id 或 None, updated_at)；app_id -> game_id
+        self._forward: Dict[str, Tuple[Optional[str], float]] = {}
+        self._reverse: Dict[str, str] = {}
+        for game_id, app_id, updated_at in self._conn.execute("SELECT game_id, app_id, updated_at FROM app_ids"):
+            self._forward[game_id] = (app_id, updated_at)
+            if app_id is not None:
+                self._reverse[app_id] = game_id
+
+        # 排队或正在补全的 id -> 补全结束时完成的 Future；_queue 为尚未提交的 id（有序去重）
+        self._pending: Dict[str, concurrent.futures.Future] = {}
+        self._queue: Dict[str, None] = {}
+        self._draining = False
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="app-id-fill")
+        self._stats = {"hits": 0, "negative_hits": 0, "misses": 0, "filled": 0, "fill_requests": 0, "fill_errors": 0}
+
+    def lookup(self, game_ids: Iterable[str]) -> Tuple[Dict[str, str], List[str]]:
+        """
+        只查内存，不访问网络。
+        Returns:
+            ({itad_id: appid}, 未知或已过期需要补全的 itad_id 列表)；确认没有 Steam 应用的 id 两边都不出现
+        """
+        app_ids, misses, negative_hits = self._peek(game_ids)
+        with self._lock:
+            self._stats["hits"] += len(app_ids)
+            self._stats["negative_hits"] += negative_hits
+            self._stats["misses"] += len(misses)
+        return app_ids, misses
+
+    def game_id(self, app_id: str) -> Optional[str]:
+        """反向查询：Steam appid -> ITAD game id"""
+        return self._reverse.get(str(app_id))
+
+    def app_ids(self) -> List[str]:
+        """已映射的全部 Steam appid（供 steam_catalog 批量富化）"""
+        return list(self._reverse)
+
+    def resolve(self, game_ids: List[str], wait: float = 0.0) -> Dict[str, str]:
+        """
+        查询映射；未命中的 id 提交后台补全，并最多等待 wait 秒（0 表示不等待，本次只返回已知映射）
+        """
+        app_ids, misses = self.lookup(game_ids)
+        if misses:
+            futures = self.prefetch(misses)
+            if wait > 0 and futures:
+                concurrent.futures.wait(futures, timeout=wait)
+                app_ids.update(self._peek(misses)[0])
+        return app_ids
+
+    async def aresolve(self, game_ids: List[str], wait: float = 0.0) -> Dict[str, str]:
+        app_ids, misses = self.lookup(game_ids)
+        if misses:
+            futures = self.prefetch(misses)
+            if wait > 0 and futures:
+                await asyncio.wait([asyncio.wrap_future(future) for future in futures], timeout=wait)
+                app_ids.update(self._peek(misses)[0])
+        return app_ids
+
+    def prefetch(self, game_ids: Iterable[str]) -> List[concurrent.futures.Future]:
+        """
+        把未知（或否定结果已过期）的 id 加入共享队列，与其他调用方的 id 合并成批补全；
+        返回每个 id 补全结束时完成的 Future，已在排队或补全中的 id 复用同一个 Future
+        """
+        misses = self._peek(game_ids)[1]
+        futures: List[concurrent.futures.Future] = []
+        start = False
+        with self._lock:
+            for game_id in misses:
+                future = self._pending.get(game_id)
+                if future is None:
+                    future = concurrent.futures.Future()
+                    self._pending[game_id] = future
+                    self._queue[game_id] = None
+                futures.append(future)
+            if self._queue and not self._draining:
+                self._draining = start = True
+        if start:
+            self._executor.submit(self._drain)
+        return futures
+
+    def fill(self, game_ids: Iterable[str], refresh: bool = False) -> int:
+        """同步批量补全（预填充用），refresh=True 时已知的 id 也重新查询；返回写入的条数"""
+        game_ids = list(dict.fromkeys(game_ids))
+        if not refresh:
+            game_ids = self._peek(game_ids)[1]
+        written = 0
+        for i in range(0, len(game_ids), self.batch_size):
+            written += self._fill(game_ids[i:i + self.batch_size])
+        return written
+
+    def put(self, app_ids: Dict[str, Optional[str]], updated_at: Optional[float] = None) -> None:
+        """写入映射，值为 None 表示该游戏在 Steam 上没有应用"""
+        updated_at = updated_at or time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO app_ids (game_id, app_id, updated_at) VALUES (?, ?, ?)",
+                [(game_id, app_id, updated_at) for game_id, app_id in app_ids.items()],
+            )
+            self._conn.commit()
+            for game_id, app_id in app_ids.items():
+                previous = self._forward.get(game_id)
+                if previous is not None and previous[0] is not None and self._reverse.get(previous[0]) == game_id:
+                    del self._reverse[previous[0]]
+                self._forward[game_id] = (app_id, updated_at)
+                if app_id is not None:
+                    self._reverse[app_id] = game_id
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["pending"] = len(self._pending)
+        stats["mapped"] = len(self._reverse)
+        stats["entries"] = len(self._forward)
+        lookups = stats["hits"] + stats["negative_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["hits"] + stats["negative_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._conn.close()
+
+    def _peek(self, game_ids: Iterable[str]) -> Tuple[Dict[str, str], List[str], int]:
+        """返回 (已知映射, 需要补全的 id, 否定结果命中数)，不计入统计"""
+        now = time.time()
+        app_ids: Dict[str, str] = {}
+        misses: List[str] = []
+        negative_hits = 0
+        for game_id in dict.fromkeys(game_ids):
+            entry = self._forward.get(game_id)
+            if entry is None or (entry[0] is None and now - entry[1] > self.negative_ttl):
+                misses.append(game_id)
+            elif entry[0] is None:
+                negative_hits += 1
+            else:
+                app_ids[game_id] = entry[0]
+        return app_ids, misses, negative_hits
+
+    def _drain(self) -> None:
+        """唯一的补全线程：等待 window 让并发的未命中合并，然后按 batch_size 分批取空队列"""
+        if self.window > 0:
+            time.sleep(self.window)
+        while True:
+            with self._lock:
+                batch = list(itertools.islice(self._queue, self.batch_size))
+                if not batch:
+                    self._draining = False
+                    return
+                for game_id in batch:
+                    del self._queue[game_id]
+            self._fill(batch)
+
+    def _fill(self, game_ids: List[str]) -> int:
+        try:
+            with self._lock:
+                self._stats["fill_requests"] += 1
+            try:
+                resolved = self._fetch(game_ids)
+                self.put({game_id: resolved.get(game_id) for game_id in game_ids})
+            except Exception as e:
+                # 失败的 id 不写入，下次查询时重新补全
+                with self._lock:
+                    self._stats["fill_errors"] += 1
+                logger.warning(f"Steam app id lookup for {len(game_ids)} ids failed: {e}")
+                return 0
+            with self._lock:
+                self._stats["filled"] += len(game_ids)
+            return len(game_ids)
+        finally:
+            with self._lock:
+                futures = [self._pending.pop(game_id, None) for game_id in game_ids]
+            for future in futures:
+                if future is None:
+                    continue
+                try:
+                    future.set_result(None)
+                except concurrent.futures.InvalidStateError:
+                    pass
+
+
+_app_id_map: Optional[AppIdMap] = None
+_app_id_map_lock = threading.Lock()
+
+
+def get_app_id_map() -> Optional[AppIdMap]:
+    """进程内共享的映射索引；APP_ID_MAP_ENABLED 未开启时返回 None"""
+    global _app_id_map
+    if not settings.APP_ID_MAP_ENABLED:
+        return None
+    with _app_id_map_lock:
+        if _app_id_map is None:
+            _app_id_map = AppIdMap(
+                settings.APP_ID_MAP_PATH or os.path.join(settings.CACHE_DIR, "app_ids.sqlite"),
+                negative_ttl=settings.APP_ID_MAP_NEGATIVE_TTL,
+            )
+            atexit.register(_app_id_map.close)
+        return _app_id_map
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Maintain the local ITAD id <-> Steam appid index")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    fill_parser = subparsers.add_parser("fill", help="bulk-resolve ITAD ids into the index")
+    fill_parser.add_argument("--file", help="file with one ITAD game id per line")
+    fill_parser.add_argument("--watchlist", action="store_true", help="include every game on the watchlist")
+    fill_parser.add_argument("--refresh", action="store_true", help="re-resolve ids that are already indexed")
+    subparsers.add_parser("stats", help="print index statistics")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    settings.APP_ID_MAP_ENABLED = True
+    index = get_app_id_map()
+
+    if args.command == "stats":
+        print(index.stats())
+        return 0
+
+    game_ids: List[str] = []
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            game_ids.extend(line.strip() for line in f if line.strip())
+    if args.watchlist:
+        from watchlist import get_watchlist_store
+
+        store = get_watchlist_store()
+        try:
+            game_ids.extend(store.game_ids())
+        finally:
+            store.close()
+    logger.info(f"Resolved {index.fill(game_ids, refresh=args.refresh)} ids into the app id index")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+import asyncio
+import threading
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+
+from config.settings import settings
+from utils.resilience import get_guard
+from utils.tracing import record_http, span
+
+DEFAULT_TIMEOUT = 10
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+# httpx.AsyncClient 绑定到创建它的事件循环，因此按循环分别维护；
+# 以循环对象本身为弱引用键，循环被回收后条目随之消失，不会被复用同一 id 的新循环拿到
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+_async_clients_lock = threading.Lock()
+
+_payload_stats: Dict[str, dict] = {}
+_payload_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """进程内共享的 requests.Session，复用 TCP/TLS 连接"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(
+                pool_connections=settings.HTTP_POOL_SIZE,
+                pool_maxsize=settings.HTTP_POOL_SIZE,
+            )
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """当前事件循环共享的 httpx.AsyncClient（连接池）"""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.get(loop)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=DEFAULT_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.HTTP_POOL_SIZE,
+                    max_keepalive_connections=settings.HTTP_POOL_SIZE,
+                ),
+            )
+            _async_clients[loop] = client
+        return client
+
+
+async def aclose_async_client() -> None:
+    """关闭当前事件循环的共享客户端（在服务/批处理退出时调用）"""
+    loop = asyncio.get_running_loop()
+    with _async_clients_lock:
+        client = _async_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+
+
+def request_json(method: str, url: str, **kwargs) -> Any:
+    """
+    通过共享 Session 发送请求并生成 http span（记录状态码、收发字节数与重试次数）。
+    按 host 限流；429 / 5xx / 连接错误按指数退避重试，连续失败后熔断（见 utils.resilience）。
+    随后 raise_for_status + orjson 解码，解码耗时记录在同一个 span 与 payload_stats 中
+    """
+    with span(f"http {method} {_span_target(url)}") as current:
+        resp = _send(current, method, url, **kwargs)
+        resp.raise_for_status()
+        return _decode(current, url, resp.content)
+
+
+async def arequest_json(method: str, url: str, **kwargs) -> Any:
+    """request_json 的异步版本"""
+    with span(f"http {method} {_span_target(url)}") as current:
+        resp = await _asend(current, method, url, **kwargs)
+        resp.raise_for_status()
+        return _decode(current, url, resp.content)
+
+
+def payload_stats() -> Dict[str, dict]:
+    """按接口累计的调用次数、传输字节数（压缩后）、解码前字节数与 JSON 解码耗时"""
+    with _payload_lock:
+        return {target: dict(stats) for target, stats in _payload_stats.items()}
+
+
+def _send(current: Any, method: str, url: str, **kwargs) -> requests.Response:
+    kwargs.setdefault("timeout", DEFAULT_TIMEOUT)
+    guard = get_guard(httpx.URL(url).host)
+    attempt = 0
+    while True:
+        guard.before_attempt()
+        try:
+            resp = get_session().request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout):
+            delay = guard.on_error(attempt)
+            if delay is None:
+                raise
+        except Exception:
+            guard.on_failure()
+            raise
+        except BaseException:
+            guard.on_cancel()
+            raise
+        else:
+            delay = guard.on_response(resp.status_code, resp.headers.get("Retry-After"), attempt)
+            if delay is None:
+                break
+        attempt += 1
+        time.sleep(delay)
+
+    _record_response(current, method, url, resp.status_code, len(resp.request.body or b""), resp.headers, resp.content)
+    current.set_attribute("http.retries", attempt)
+    return resp
+
+
+async def _asend(current: Any, method: str, url: str, **kwargs) -> httpx.Response:
+    guard = get_guard(httpx.URL(url).host)
+    attempt = 0
+    while True:
+        await guard.abefore_attempt()
+        try:
+            resp = await get_async_client().request(method, url, **kwargs)
+        except httpx.TransportError:
+            delay = guard.on_error(attempt)
+            if delay is None:
+                raise
+        except Exception:
+            guard.on_failure()
+            raise
+        except BaseException:
+            # 取消（如 meta 分支超时）不计入失败，只释放半开状态下的试探名额
+            guard.on_cancel()
+            raise
+        else:
+            delay = guard.on_response(resp.status_code, resp.headers.get("Retry-After"), attempt)
+            if delay is None:
+                break
+        attempt += 1
+        await asyncio.sleep(delay)
+
+    _record_response(current, method, url, resp.status_code, len(resp.request.content), resp.headers, resp.content)
+    current.set_attribute("http.retries", attempt)
+    return resp
+
+
+def _record_response(current: Any, method: str, url: str, status: int, request_bytes: int, headers, content: bytes) -> None:
+    # Content-Length 是压缩后的实际传输字节数；没有该头时退回解压后的长度
+    wire_bytes = int(headers.get("Content-Length") or len(content))
+    record_http(current, method, url, status, request_bytes, len(content))
+    current.set_attribute("http.response.wire_bytes", wire_bytes)
+
+    target = _span_target(url)
+    with _payload_lock:
+        stats = _payload_stats.setdefault(target, {"calls": 0, "wire_bytes": 0, "bytes": 0, "decode_ms": 0.0})
+        stats["calls"] += 1
+        stats["wire_bytes"] += wire_bytes
+        stats["bytes"] += len(content)
+
+
+def _decode(current: Any, url: str, content: bytes) -> Any:
+    start = time.perf_counter()
+    data = orjson.loads(content)
+    decode_ms = (time.perf_counter() - start) * 1000
+    current.set_attribute("http.decode_ms", decode_ms)
+    with _payload_lock:
+        _payload_stats[_span_target(url)]["decode_ms"] += decode_ms
+    return data
+
+
+def _span_target(url: str) -> str:
+    """span 名称只保留 host 与固定路径，避免 appid 等变量导致名称发散"""
+    parsed = httpx.URL(url)
+    path = "/".join("{id}" if part.isdigit() else part for part in parsed.path.split("/"))
+    return f"{parsed.host}{path}"
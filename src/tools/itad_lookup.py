@@ -0,0 +1,64 @@
+import asyncio
+from typing import Dict, List, Optional
+
+from config.settings import settings
+from tools.http_client import arequest_json, request_json
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STEAM_SHOP_ID = 61
+# lookup 接口单次请求的 id 数上限
+LOOKUP_CHUNK_SIZE = 200
+
+
+def steam_app_ids(game_ids: List[str]) -> Dict[str, str]:
+    """
+    将 ITAD game id 批量映射为 Steam appID
+
+    Returns:
+        {itad_id: appid}，在 Steam 上没有对应应用的 id 不会出现在结果中
+    """
+    url = f"{settings.ITAD_BASE_URL}/lookup/shop/{STEAM_SHOP_ID}/id/v1"
+    app_ids: Dict[str, str] = {}
+    for chunk in _chunk_ids(game_ids):
+        data = request_json("POST", url, params={"key": settings.ITAD_API_KEY}, json=chunk, timeout=10)
+        _index_app_ids(data, app_ids)
+
+    logger.info(f"Resolved {len(app_ids)}/{len(set(game_ids))} ITAD ids to Steam app ids")
+    return app_ids
+
+
+async def asteam_app_ids(game_ids: List[str]) -> Dict[str, str]:
+    """steam_app_ids 的异步版本，各分块并发请求"""
+    url = f"{settings.ITAD_BASE_URL}/lookup/shop/{STEAM_SHOP_ID}/id/v1"
+
+    async def fetch_chunk(chunk: List[str]) -> Dict:
+        return await arequest_json("POST", url, params={"key": settings.ITAD_API_KEY}, json=chunk, timeout=10)
+
+    app_ids: Dict[str, str] = {}
+    for data in await asyncio.gather(*(fetch_chunk(chunk) for chunk in _chunk_ids(game_ids))):
+        _index_app_ids(data, app_ids)
+
+    logger.info(f"Resolved {len(app_ids)}/{len(set(game_ids))} ITAD ids to Steam app ids")
+    return app_ids
+
+
+def _chunk_ids(game_ids: List[str]) -> List[List[str]]:
+    unique_ids = list(dict.fromkeys(game_ids))
+    return [unique_ids[i:i + LOOKUP_CHUNK_SIZE] for i in range(0, len(unique_ids), LOOKUP_CHUNK_SIZE)]
+
+
+def _index_app_ids(data: Dict, app_ids: Dict[str, str]) -> None:
+    # 响应格式：{itad_id: ["app/1245620", "sub/..."] 或 null}
+    for game_id, shop_ids in data.items():
+        app_id = _first_app_id(shop_ids)
+        if app_id is not None:
+            app_ids[game_id] = app_id
+
+
+def _first_app_id(shop_ids: Optional[List[str]]) -> Optional[str]:
+    for shop_id in shop_ids or []:
+        if shop_id.startswith("app/"):
+            return shop_id[len("app/"):]
+    return None
@@ -1,68 +1,110 @@
-import requests
-from typing import List, Dict, Union
+import asyncio
+from typing import List, Dict
 from schemas.price_result import PriceInfo
 from config.settings import settings
+from tools.http_client import arequest_json, request_json
+from tools.price_history import record_prices
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-BASE_URL = "https://api.isthereanydeal.com"
+# overview 接口单次请求允许的最大 id 数
+OVERVIEW_CHUNK_SIZE = 200
 
 
-def game_price(game_ids: List[Dict]) -> List[PriceInfo]:
+def game_price(game_ids: List[str]) -> List[PriceInfo]:
     """
     Get game price information (current lowest price, historical low, discount, etc.) from ITAD.
 
     Args:
-        game_ids: List of game dicts containing "id" (ITAD game id) and other optional fields
+        game_ids: List of ITAD game ids
 
     Returns:
         List[PriceInfo]: List of price information objects for each game
     """
+    logger.info(f"Querying price info for game IDs: {game_ids}")
+    return _collect_prices(game_ids, fetch_price_map(game_ids))
+
+
+async def agame_price(game_ids: List[str]) -> List[PriceInfo]:
+    """game_price 的异步版本"""
+    logger.info(f"Querying price info for game IDs: {game_ids}")
+    return _collect_prices(game_ids, await afetch_price_map(game_ids))
+
+
+def fetch_price_map(game_ids: List[str]) -> Dict[str, PriceInfo]:
+    """
+    去重后按 OVERVIEW_CHUNK_SIZE 分块请求 /games/overview/v2，返回 {game_id: PriceInfo}
+    """
+    price_map: Dict[str, PriceInfo] = {}
+    for chunk in _chunk_ids(game_ids):
+        # Send POST request with game ids
+        data = request_json("POST", _overview_url(), params=_overview_params(), json=chunk, timeout=10)
+        _index_prices(data, price_map)
+
+    record_prices(price_map.values())
+    return price_map
+
+
+async def afetch_price_map(game_ids: List[str]) -> Dict[str, PriceInfo]:
+    """fetch_price_map 的异步版本，各分块并发请求"""
+
+    async def fetch_chunk(chunk: List[str]) -> Dict:
+        return await arequest_json("POST", _overview_url(), params=_overview_params(), json=chunk, timeout=10)
 
-    # Build request URL and parameters
-    url = f"{BASE_URL}/games/overview/v2"
-    params = {
+    price_map: Dict[str, PriceInfo] = {}
+    for data in await asyncio.gather(*(fetch_chunk(chunk) for chunk in _chunk_ids(game_ids))):
+        _index_prices(data, price_map)
+
+    record_prices(price_map.values())
+    return price_map
+
+
+def _overview_url() -> str:
+    return f"{settings.ITAD_BASE_URL}/games/overview/v2"
+
+
+def _overview_params() -> Dict:
+    return {
         "key": settings.ITAD_API_KEY,
-        "country": "CN",
-        "shops": "61"  # Steam shop ID, adjust if needed
+        "country": settings.ITAD_COUNTRY,
+        "shops": settings.ITAD_SHOPS
     }
 
-    logger.info(f"Querying price info for game IDs: {game_ids}")
 
-    # Send POST request with game ids
-    resp = requests.post(url, params=params, json=game_ids, timeout=10)
-    resp.raise_for_status()
-    data = resp.json()
+def _chunk_ids(game_ids: List[str]) -> List[List[str]]:
+    unique_ids = list(dict.fromkeys(game_ids))
+    return [unique_ids[i:i + OVERVIEW_CHUNK_SIZE] for i in range(0, len(unique_ids), OVERVIEW_CHUNK_SIZE)]
 
-    # Process price data
+
+def _index_prices(data: Dict, price_map: Dict[str, PriceInfo]) -> None:
+    for price_data in data.get("prices", []):
+        price_map[price_data["id"]] = parse_price_data(price_data)
+
+
+def _collect_prices(game_ids: List[str], price_map: Dict[str, PriceInfo]) -> List[PriceInfo]:
     price_results = []
-    price_data_list = data.get("prices", [])
-    if not price_data_list:
+    if not price_map:
         logger.info("No price data found for the provided game IDs")
         return price_results
 
     for game_id in game_ids:
-        # Find matching price data for the game
-        match_price_data = next((p for p in price_data_list if p["id"] == game_id), None)
-        if not match_price_data:
+        price_info = price_map.get(game_id)
+        if price_info is None:
             logger.warning(f"No price data found for game ID: {game_id}")
             continue
-
-        # Extract price details
-        current_price = match_price_data["current"]["price"]["amount"]
-        historical_low = match_price_data["lowest"]["price"]["amount"]
-        discount_percent = match_price_data["current"]["cut"]
-        store = match_price_data["current"]["shop"]["name"]
-
-        # Create PriceInfo object
-        price_info = PriceInfo(
-            current_price=current_price,
-            historical_low=historical_low,
-            discount_percent=discount_percent,
-            store=store
-        )
         price_results.append(price_info)
 
     logger.info(f"Successfully fetched price info for {len(price_results)} games")
-    return price_results
\ No newline at end of file
+    return price_results
+
+
+def parse_price_data(price_data: Dict) -> PriceInfo:
+    """将 overview 响应中的单条价格数据转换为 PriceInfo"""
+    return PriceInfo(
+        game_id=price_data["id"],
+        current_price=price_data["current"]["price"]["amount"],
+        historical_low=price_data["lowest"]["price"]["amount"],
+        discount_percent=price_data["current"]["cut"],
+        store=price_data["current"]["shop"]["name"]
+    )
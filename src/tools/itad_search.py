@@ -1,12 +1,33 @@
-import requests
-from typing import List, Dict
+import os
+import threading
+from typing import List, Dict, Optional
 
 from config.settings import settings
+from tools.http_client import arequest_json, request_json
+from tools.title_index import get_title_index
+from utils.cache import TwoTierCache
 from utils.logger import get_logger
+from utils.text import normalize_keyword
 
 logger = get_logger(__name__)
 
-BASE_URL = "https://api.isthereanydeal.com"
+_search_cache: Optional[TwoTierCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> TwoTierCache:
+    """搜索结果缓存（进程内单例）"""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = TwoTierCache(
+                "itad_search",
+                path=os.path.join(settings.CACHE_DIR, "itad_search.sqlite"),
+                ttl=settings.SEARCH_CACHE_TTL,
+                negative_ttl=settings.SEARCH_CACHE_NEGATIVE_TTL,
+                max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+            )
+        return _search_cache
 
 
 def search_games(keyword: str, limit: int = 10) -> List[Dict]:
@@ -20,21 +41,89 @@ def search_games(keyword: str, limit: int = 10) -> List[Dict]:
         type: str
     }
     """
-    url = f"{BASE_URL}/games/search/v1"
+    local_results = _search_local(keyword, limit)
+    if local_results:
+        return local_results
+
+    if not settings.SEARCH_CACHE_ENABLED:
+        return _search_itad(keyword, limit)
+
+    cache = get_search_cache()
+    cache_key = _cache_key(keyword, limit)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Search cache hit for keyword: {keyword} ({len(cached)} candidates)")
+        return [dict(item) for item in cached]
+
+    results = _search_itad(keyword, limit)
+    cache.set(cache_key, results)
+    return results
+
+
+async def asearch_games(keyword: str, limit: int = 10) -> List[Dict]:
+    """search_games 的异步版本，使用共享的 httpx 连接池"""
+    local_results = _search_local(keyword, limit)
+    if local_results:
+        return local_results
+
+    if not settings.SEARCH_CACHE_ENABLED:
+        return await _asearch_itad(keyword, limit)
+
+    cache = get_search_cache()
+    cache_key = _cache_key(keyword, limit)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Search cache hit for keyword: {keyword} ({len(cached)} candidates)")
+        return [dict(item) for item in cached]
+
+    results = await _asearch_itad(keyword, limit)
+    cache.set(cache_key, results)
+    return results
+
 
-    params = {
+def _search_local(keyword: str, limit: int) -> List[Dict]:
+    """优先查询本地标题索引，无匹配时由调用方回退到 ITAD"""
+    index = get_title_index()
+    if index is None:
+        return []
+
+    results = index.search(keyword, limit, min_score=settings.TITLE_INDEX_MIN_SCORE)
+    if results:
+        logger.info(f"Found {len(results)} candidates from local title index for keyword: {keyword}")
+    return results
+
+
+def _cache_key(keyword: str, limit: int) -> str:
+    return f"{normalize_keyword(keyword)}|{limit}"
+
+
+def _search_params(keyword: str, limit: int) -> Dict:
+    return {
         "key": settings.ITAD_API_KEY,
         "title": keyword,
         "limit": limit
     }
 
+
+def _search_itad(keyword: str, limit: int) -> List[Dict]:
+    url = f"{settings.ITAD_BASE_URL}/games/search/v1"
+
+    logger.info(f"Searching ITAD games with keyword: {keyword}")
+
+    data = request_json("GET", url, params=_search_params(keyword, limit), timeout=10)
+    return _parse_search_results(data)
+
+
+async def _asearch_itad(keyword: str, limit: int) -> List[Dict]:
+    url = f"{settings.ITAD_BASE_URL}/games/search/v1"
+
     logger.info(f"Searching ITAD games with keyword: {keyword}")
 
-    resp = requests.get(url, params=params, timeout=10)
-    resp.raise_for_status()
+    data = await arequest_json("GET", url, params=_search_params(keyword, limit), timeout=10)
+    return _parse_search_results(data)
 
-    data = resp.json()
 
+def _parse_search_results(data: List[Dict]) -> List[Dict]:
     results = []
     for item in data:
         results.append(
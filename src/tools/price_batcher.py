@@ -0,0 +1,139 @@
+import asyncio
+import threading
+from concurrent.futures import Future, InvalidStateError
+from typing import Callable, Dict, List, Optional
+
+from config.settings import settings
+from schemas.price_result import PriceInfo
+from tools.itad_price import OVERVIEW_CHUNK_SIZE, fetch_price_map
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class PriceBatcher:
+    """
+    合并并发调用方的价格查询：在一个短窗口内收集 game id，去重后发起一次分块的
+    overview 请求，再按 id 把 PriceInfo 分发回各个调用方。
+    """
+
+    def __init__(
+        self,
+        window: float = 0.05,
+        max_batch: int = OVERVIEW_CHUNK_SIZE,
+        fetch: Callable[[List[str]], Dict[str, PriceInfo]] = fetch_price_map,
+    ):
+        self.window = window
+        self.max_batch = max_batch
+        self._fetch = fetch
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._timer: Optional[threading.Timer] = None
+        self._stats = {"requested_ids": 0, "fetched_ids": 0, "flushes": 0}
+
+    def submit(self, game_ids: List[str]) -> List[Future]:
+        """登记一组 id，返回与之一一对应的 Future（结果为 PriceInfo 或 None）"""
+        futures = []
+        flush_now = False
+        with self._lock:
+            self._stats["requested_ids"] += len(game_ids)
+            for game_id in game_ids:
+                future = self._pending.get(game_id)
+                if future is None:
+                    future = Future()
+                    self._pending[game_id] = future
+                futures.append(future)
+
+            if len(self._pending) >= self.max_batch:
+                flush_now = True
+            elif self._timer is None and self._pending:
+                self._timer = threading.Timer(self.window, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if flush_now:
+            # 在后台线程中发送，避免阻塞调用方（包括事件循环）
+            threading.Thread(target=self.flush, daemon=True).start()
+        return futures
+
+    def get_prices(self, game_ids: List[str], timeout: Optional[float] = 30) -> List[PriceInfo]:
+        """与 game_price 相同的返回形式：按输入顺序返回有价格数据的 PriceInfo"""
+        logger.info(f"Querying price info for game IDs (batched): {game_ids}")
+
+        futures = self.submit(game_ids)
+        price_results = []
+        for game_id, future in zip(game_ids, futures):
+            price_info = future.result(timeout=timeout)
+            if price_info is None:
+                logger.warning(f"No price data found for game ID: {game_id}")
+                continue
+            price_results.append(price_info)
+        return price_results
+
+    async def aget_prices(self, game_ids: List[str], timeout: Optional[float] = 30) -> List[PriceInfo]:
+        """get_prices 的异步版本：在事件循环中等待批次结果，不占用线程"""
+        logger.info(f"Querying price info for game IDs (batched): {game_ids}")
+
+        futures = [asyncio.wrap_future(future) for future in self.submit(game_ids)]
+        # shield：超时只影响当前调用方，不取消其他调用方共享的 Future
+        results = await asyncio.wait_for(asyncio.shield(asyncio.gather(*futures)), timeout=timeout)
+
+        price_results = []
+        for game_id, price_info in zip(game_ids, results):
+            if price_info is None:
+                logger.warning(f"No price data found for game ID: {game_id}")
+                continue
+            price_results.append(price_info)
+        return price_results
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return
+
+        game_ids = list(pending)
+        try:
+            price_map = self._fetch(game_ids)
+        except Exception as e:
+            logger.error(f"Batched price request for {len(game_ids)} ids failed: {e}")
+            for future in pending.values():
+                # 调用方可能在任意时刻取消，先检查再设置存在竞态
+                try:
+                    future.set_exception(e)
+                except InvalidStateError:
+                    pass
+            return
+
+        with self._lock:
+            self._stats["flushes"] += 1
+            self._stats["fetched_ids"] += len(game_ids)
+
+        logger.info(f"Batched price request resolved {len(price_map)}/{len(game_ids)} ids")
+        for game_id, future in pending.items():
+            try:
+                future.set_result(price_map.get(game_id))
+            except InvalidStateError:
+                pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(self._stats)
+
+
+_price_batcher: Optional[PriceBatcher] = None
+_price_batcher_lock = threading.Lock()
+
+
+def get_price_batcher() -> PriceBatcher:
+    """进程内共享的 PriceBatcher"""
+    global _price_batcher
+    with _price_batcher_lock:
+        if _price_batcher is None:
+            _price_batcher = PriceBatcher(window=settings.PRICE_BATCH_WINDOW_MS / 1000)
+        return _price_batcher
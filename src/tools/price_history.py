@@ -0,0 +1,294 @@
+"""
+本地价格历史：每次从 ITAD 获取到的 PriceInfo 以 (game_id, store, ts) 追加写入 Parquet。
+
+写入先进入内存缓冲，满 flush_rows 行后由后台线程写成一个小的分段文件；分段累计到
+compact_segments 个时合并为按 (game_id, ts) 排序的大文件，按游戏 / 时间范围查询时
+可借助 row group 统计信息跳过无关数据。读取使用内存映射，缓冲中尚未落盘的行同样可见。
+"""
+import atexit
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from config.settings import settings
+from schemas.price_result import PriceInfo
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = pa.schema([
+    ("game_id", pa.string()),
+    ("store", pa.string()),
+    ("ts", pa.timestamp("ms", tz="UTC")),
+    ("current_price", pa.float64()),
+    ("historical_low", pa.float64()),
+    ("discount_percent", pa.int16()),
+])
+
+SEGMENT_PREFIX = "segment-"
+COMPACTED_PREFIX = "compacted-"
+ROW_GROUP_SIZE = 64 * 1024
+
+
+class PriceHistoryStore:
+    def __init__(
+        self,
+        path: str,
+        flush_rows: int = 1000,
+        compact_segments: int = 16,
+        max_compacted: int = 8,
+    ):
+        """
+        flush_rows: 缓冲达到该行数时触发后台落盘
+        compact_segments: 分段文件达到该数量时合并
+        max_compacted: 合并文件超过该数量时做一次全量合并
+        """
+        self.path = path
+        self.flush_rows = flush_rows
+        self.compact_segments = compact_segments
+        self.max_compacted = max_compacted
+        os.makedirs(path, exist_ok=True)
+
+        # _lock 保护缓冲与文件清单；_write_lock 串行化落盘与合并
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._buffer: List[dict] = []
+        self._flushing: List[dict] = []
+        self._files: List[str] = sorted(
+            os.path.join(path, name) for name in os.listdir(path)
+            if name.endswith(".parquet") and name.startswith((SEGMENT_PREFIX, COMPACTED_PREFIX))
+        )
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="price-history")
+        self._pending: Optional[Future] = None
+        self._stats = {"recorded": 0, "flushes": 0, "compactions": 0}
+
+    def record(self, price_infos: Iterable[PriceInfo], ts: Optional[datetime] = None) -> int:
+        ts = ts or datetime.now(timezone.utc)
+        rows = [
+            {
+                "game_id": price_info.game_id,
+                "store": price_info.store,
+                "ts": ts,
+                "current_price": price_info.current_price,
+                "historical_low": price_info.historical_low,
+                "discount_percent": price_info.discount_percent,
+            }
+            for price_info in price_infos
+            if price_info.game_id
+        ]
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._buffer.extend(rows)
+            self._stats["recorded"] += len(rows)
+            should_flush = len(self._buffer) >= self.flush_rows and (self._pending is None or self._pending.done())
+            if should_flush:
+                self._pending = self._executor.submit(self._flush_background)
+        return len(rows)
+
+    def flush(self) -> Optional[str]:
+        """把缓冲写成一个分段文件，必要时合并；返回新文件路径"""
+        with self._write_lock:
+            with self._lock:
+                if not self._buffer:
+                    return None
+                rows, self._buffer = self._buffer, []
+                self._flushing = rows
+
+            path = self._new_file(SEGMENT_PREFIX)
+            _write_table(pa.Table.from_pylist(rows, schema=SCHEMA), path)
+
+            with self._lock:
+                self._files.append(path)
+                self._flushing = []
+                self._stats["flushes"] += 1
+                segments = len(self._segment_files())
+
+        if segments >= self.compact_segments:
+            self.compact()
+        return path
+
+    def compact(self, full: bool = False) -> Optional[str]:
+        """
+        合并所有分段文件为一个排序后的大文件；合并文件过多或 full=True 时连同已合并文件一起重写
+        """
+        with self._write_lock:
+            with self._lock:
+                compacted = [f for f in self._files if os.path.basename(f).startswith(COMPACTED_PREFIX)]
+                sources = list(self._files) if full or len(compacted) >= self.max_compacted else self._segment_files()
+            if not sources or (len(sources) == 1 and sources[0] in compacted):
+                return None
+
+            start = time.perf_counter()
+            table = pa.concat_tables(pq.read_table(f, memory_map=True) for f in sources)
+            table = table.sort_by([("game_id", "ascending"), ("ts", "ascending")])
+            path = self._new_file(COMPACTED_PREFIX)
+            _write_table(table, path)
+
+            with self._lock:
+                self._files = [f for f in self._files if f not in sources] + [path]
+                self._files.sort()
+                self._stats["compactions"] += 1
+
+            for f in sources:
+                try:
+                    os.remove(f)
+                except OSError as e:
+                    logger.warning(f"Failed to remove compacted price history file {f}: {e}")
+
+        logger.info(
+            f"Compacted {len(sources)} price history files ({table.num_rows} rows) "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+        return path
+
+    def read(
+        self,
+        game_ids: Optional[Iterable[str]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+    ) -> pa.Table:
+        """按游戏与时间范围读取历史（包含尚未落盘的缓冲行），按 (game_id, ts) 排序"""
+        game_ids = list(dict.fromkeys(game_ids)) if game_ids is not None else None
+        expression = _filter_expression(game_ids, since, until)
+
+        for attempt in range(3):
+            with self._lock:
+                files = list(self._files)
+                pending = self._flushing + self._buffer
+            try:
+                tables = [pq.read_table(f, filters=expression, memory_map=True, schema=SCHEMA) for f in files]
+                break
+            except FileNotFoundError:
+                # 读取期间文件被合并删除，重新取一次文件清单
+                if attempt == 2:
+                    raise
+
+        if pending:
+            buffered = pa.Table.from_pylist(pending, schema=SCHEMA)
+            tables.append(buffered.filter(expression) if expression is not None else buffered)
+
+        if not tables:
+            return SCHEMA.empty_table()
+        return pa.concat_tables(tables).sort_by([("game_id", "ascending"), ("ts", "ascending")])
+
+    def summaries(self, game_ids: Iterable[str], days: Optional[int] = None) -> Dict[str, dict]:
+        """
+        最近 days 天内每个游戏的价格概况：{game_id: {observations, min_price, max_price, max_discount_percent, first_seen}}
+        """
+        since = datetime.now(timezone.utc) - timedelta(days=days) if days else None
+        table = self.read(game_ids, since=since)
+        if table.num_rows == 0:
+            return {}
+
+        grouped = table.group_by("game_id").aggregate([
+            ("ts", "count"),
+            ("current_price", "min"),
+            ("current_price", "max"),
+            ("discount_percent", "max"),
+            ("ts", "min"),
+        ])
+        summaries = {}
+        for row in grouped.to_pylist():
+            summaries[row["game_id"]] = {
+                "days": days,
+                "observations": row["ts_count"],
+                "min_price": row["current_price_min"],
+                "max_price": row["current_price_max"],
+                "max_discount_percent": row["discount_percent_max"],
+                "first_seen": row["ts_min"].date().isoformat(),
+            }
+        return summaries
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                **self._stats,
+                "buffered": len(self._buffer) + len(self._flushing),
+                "files": len(self._files),
+                "segments": len(self._segment_files()),
+            }
+
+    def close(self) -> None:
+        self.flush()
+        self._executor.shutdown(wait=True)
+
+    def _flush_background(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            logger.warning(f"Failed to flush price history: {e}")
+
+    def _segment_files(self) -> List[str]:
+        return [f for f in self._files if os.path.basename(f).startswith(SEGMENT_PREFIX)]
+
+    def _new_file(self, prefix: str) -> str:
+        # 文件名按时间排序，便于启动时恢复清单
+        return os.path.join(self.path, f"{prefix}{time.time_ns()}-{uuid.uuid4().hex[:8]}.parquet")
+
+
+def _write_table(table: pa.Table, path: str) -> None:
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path, row_group_size=ROW_GROUP_SIZE, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def _filter_expression(
+    game_ids: Optional[List[str]],
+    since: Optional[datetime],
+    until: Optional[datetime],
+) -> Optional[pc.Expression]:
+    conditions = []
+    if game_ids is not None:
+        conditions.append(pc.field("game_id").isin(game_ids))
+    if since is not None:
+        conditions.append(pc.field("ts") >= pa.scalar(since, type=SCHEMA.field("ts").type))
+    if until is not None:
+        conditions.append(pc.field("ts") < pa.scalar(until, type=SCHEMA.field("ts").type))
+    if not conditions:
+        return None
+    expression = conditions[0]
+    for condition in conditions[1:]:
+        expression = expression & condition
+    return expression
+
+
+_price_history: Optional[PriceHistoryStore] = None
+_price_history_lock = threading.Lock()
+
+
+def get_price_history() -> Optional[PriceHistoryStore]:
+    """进程内共享的价格历史；PRICE_HISTORY_ENABLED 未开启时返回 None"""
+    global _price_history
+    if not settings.PRICE_HISTORY_ENABLED:
+        return None
+    with _price_history_lock:
+        if _price_history is None:
+            _price_history = PriceHistoryStore(
+                settings.PRICE_HISTORY_DIR or os.path.join(settings.CACHE_DIR, "price_history"),
+                flush_rows=settings.PRICE_HISTORY_FLUSH_ROWS,
+                compact_segments=settings.PRICE_HISTORY_COMPACT_SEGMENTS,
+            )
+            # 进程退出前把缓冲写盘
+            atexit.register(_price_history.close)
+        return _price_history
+
+
+def record_prices(price_infos: Iterable[PriceInfo]) -> None:
+    """记录一批价格；历史写入失败不影响价格查询本身"""
+    store = get_price_history()
+    if store is None:
+        return
+    try:
+        store.record(price_infos)
+    except Exception as e:
+        logger.warning(f"Failed to record price history: {e}")
@@ -0,0 +1,174 @@
+"""
+价格矩阵：game ids × 国家/地区 × 商店，一次调用取回全部报价。
+
+每个国家并发发出一组按 id 分块的 /games/prices/v3 请求（overview 只返回各商店中的最优价，
+无法得到逐商店的报价），结果整理为一个紧凑的 pandas DataFrame（分类列 + 数值列），
+并按汇率表向量化地把金额换算为同一币种。
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from config.settings import settings
+from tools.http_client import arequest_json, request_json
+from tools.itad_price import OVERVIEW_CHUNK_SIZE
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+COLUMNS = ["game_id", "country", "shop_id", "shop", "currency", "price", "regular", "cut", "store_low", "history_low"]
+
+
+def fetch_price_matrix(
+    game_ids: List[str],
+    countries: Iterable[str],
+    shops: Iterable[int],
+    currency: Optional[str] = None,
+    rates: Optional[Dict[str, float]] = None,
+) -> pd.DataFrame:
+    """
+    Args:
+        game_ids: ITAD game ids
+        countries: 两位国家代码，如 ["CN", "US", "DE"]
+        shops: ITAD 商店 id，如 [61, 35]（Steam、GOG）
+        currency: 换算的目标币种，默认 settings.PRICE_MATRIX_CURRENCY
+        rates: {币种: 1 单位折合目标币种的金额}，默认取 settings.FX_RATES
+
+    Returns:
+        每行一个 (game_id, country, shop) 报价，另含 price_converted / regular_converted 两列
+    """
+    countries = list(dict.fromkeys(c.upper() for c in countries))
+    shops = list(dict.fromkeys(shops))
+    chunks = _chunk_ids(game_ids)
+
+    jobs = [(country, chunk) for country in countries for chunk in chunks]
+    if not jobs:
+        return _to_frame([], currency, rates)
+    with ThreadPoolExecutor(max_workers=min(len(jobs), 16), thread_name_prefix="price-matrix") as executor:
+        results = list(executor.map(lambda job: _fetch_prices(job[0], shops, job[1]), jobs))
+
+    rows = [row for (country, _), data in zip(jobs, results) for row in _rows(country, data)]
+    return _to_frame(rows, currency, rates)
+
+
+async def afetch_price_matrix(
+    game_ids: List[str],
+    countries: Iterable[str],
+    shops: Iterable[int],
+    currency: Optional[str] = None,
+    rates: Optional[Dict[str, float]] = None,
+) -> pd.DataFrame:
+    """fetch_price_matrix 的异步版本，所有国家与分块并发请求"""
+    countries = list(dict.fromkeys(c.upper() for c in countries))
+    shops = list(dict.fromkeys(shops))
+    jobs = [(country, chunk) for country in countries for chunk in _chunk_ids(game_ids)]
+
+    results = await asyncio.gather(*(_afetch_prices(country, shops, chunk) for country, chunk in jobs))
+
+    rows = [row for (country, _), data in zip(jobs, results) for row in _rows(country, data)]
+    return _to_frame(rows, currency, rates)
+
+
+def convert_currency(
+    amounts: pd.Series,
+    currencies: pd.Series,
+    rates: Dict[str, float],
+    currency: str,
+) -> pd.Series:
+    """向量化换算：按币种查汇率后整列相乘；没有汇率的币种得到 NaN"""
+    factors = currencies.astype(object).map({**rates, currency: 1.0}).astype("float64")
+    return (amounts * factors).round(2)
+
+
+def cheapest(frame: pd.DataFrame) -> pd.DataFrame:
+    """每个游戏换算后最便宜的一条报价（跨国家与商店）"""
+    valid = frame[frame["price_converted"].notna()]
+    return valid.loc[valid.groupby("game_id", observed=True)["price_converted"].idxmin()].reset_index(drop=True)
+
+
+def parse_rates(spec: str) -> Dict[str, float]:
+    """解析 "USD=7.1,EUR=7.8" 形式的汇率表"""
+    rates = {}
+    for item in spec.split(","):
+        if "=" in item:
+            code, value = item.split("=", 1)
+            rates[code.strip().upper()] = float(value)
+    return rates
+
+
+def _prices_url() -> str:
+    return f"{settings.ITAD_BASE_URL}/games/prices/v3"
+
+
+def _prices_params(country: str, shops: List[int]) -> Dict:
+    return {
+        "key": settings.ITAD_API_KEY,
+        "country": country,
+        "shops": ",".join(str(shop) for shop in shops),
+    }
+
+
+def _fetch_prices(country: str, shops: List[int], chunk: List[str]) -> List[Dict]:
+    return request_json("POST", _prices_url(), params=_prices_params(country, shops), json=chunk, timeout=10)
+
+
+async def _afetch_prices(country: str, shops: List[int], chunk: List[str]) -> List[Dict]:
+    return await arequest_json("POST", _prices_url(), params=_prices_params(country, shops), json=chunk, timeout=10)
+
+
+def _chunk_ids(game_ids: List[str]) -> List[List[str]]:
+    unique_ids = list(dict.fromkeys(game_ids))
+    return [unique_ids[i:i + OVERVIEW_CHUNK_SIZE] for i in range(0, len(unique_ids), OVERVIEW_CHUNK_SIZE)]
+
+
+def _rows(country: str, data: List[Dict]) -> Iterable[tuple]:
+    # 响应格式：[{id, historyLow: {all: {amount}}, deals: [{shop, price, regular, cut, storeLow}]}]
+    for game in data:
+        history_low = _amount((game.get("historyLow") or {}).get("all"))
+        for deal in game.get("deals") or []:
+            price = deal.get("price") or {}
+            yield (
+                game["id"],
+                country,
+                deal["shop"]["id"],
+                deal["shop"]["name"],
+                price.get("currency"),
+                price.get("amount"),
+                _amount(deal.get("regular")),
+                deal.get("cut") or 0,
+                _amount(deal.get("storeLow")),
+                history_low,
+            )
+
+
+def _amount(price: Optional[Dict]) -> Optional[float]:
+    return price.get("amount") if price else None
+
+
+def _to_frame(rows: List[tuple], currency: Optional[str], rates: Optional[Dict[str, float]]) -> pd.DataFrame:
+    currency = (currency or settings.PRICE_MATRIX_CURRENCY).upper()
+    rates = parse_rates(settings.FX_RATES) if rates is None else {k.upper(): v for k, v in rates.items()}
+
+    frame = pd.DataFrame.from_records(rows, columns=COLUMNS)
+    frame = frame.astype({
+        "game_id": "category",
+        "country": "category",
+        "shop_id": "int32",
+        "shop": "category",
+        "currency": "category",
+        "price": "float64",
+        "regular": "float64",
+        "cut": "int16",
+        "store_low": "float64",
+        "history_low": "float64",
+    })
+    frame["price_converted"] = convert_currency(frame["price"], frame["currency"], rates, currency)
+    frame["regular_converted"] = convert_currency(frame["regular"], frame["currency"], rates, currency)
+
+    missing = frame.loc[frame["price_converted"].isna() & frame["price"].notna(), "currency"].unique()
+    if len(missing):
+        logger.warning(f"No exchange rate to {currency} for: {', '.join(map(str, missing))}")
+    frame.attrs["currency"] = currency
+    return frame
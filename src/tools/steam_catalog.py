@@ -0,0 +1,224 @@
+"""
+Steam 目录离线富化：按给定 appid 列表以有限并发抓取商店数据与近期评测，
+用 pandas 向量化地解析发售日期、映射评测等级并整理标签，合并写入 Parquet 快照（tools.steam_snapshot），
+get_steam_info 在请求时直接读取快照，不再逐个应用实时请求与解析。
+
+用法（在 src 目录下）：
+    python -m tools.steam_catalog build --file appids.txt --concurrency 16
+    python -m tools.steam_catalog build --from-app-id-map --stale-only
+    python -m tools.steam_catalog stats
+"""
+import argparse
+import asyncio
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from config.settings import settings
+from tools.http_client import aclose_async_client, arequest_json
+from tools.steam_meta import RATING_MAP, _review_params, _store_params
+from tools.steam_snapshot import SCHEMA, read_snapshot, snapshot_path, write_snapshot
+from utils.logger import setup_logging, get_logger
+
+logger = get_logger(__name__)
+
+RAW_COLUMNS = ["app_id", "release_date", "user_tags", "genres", "categories", "rating", "fetched_at"]
+# 与 steam_meta._judge_release_type 支持的格式一致：中文（2011年4月19日）与 ISO（2024-12-15）
+DATE_FORMATS = ("%Y年%m月%d日", "%Y-%m-%d")
+MAX_TAGS = 10
+
+
+async def afetch_raw(app_ids: List[str], concurrency: int = 16) -> Tuple[List[dict], Dict[str, str]]:
+    """
+    最多 concurrency 个应用同时抓取，每个应用的商店数据与评测并发请求；只做字段投影，不做解析
+
+    Returns:
+        (原始行, 失败的 {appid: 错误信息})
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(app_id: str) -> dict:
+        async with semaphore:
+            store_data, review_data = await asyncio.gather(
+                arequest_json("GET", f"{settings.STEAM_STORE_BASE_URL}/api/appdetails",
+                              params=_store_params(app_id), timeout=10),
+                arequest_json("GET", f"{settings.STEAM_STORE_BASE_URL}/appreviews/{app_id}",
+                              params=_review_params(settings.STEAM_API_KEY), timeout=10),
+            )
+        return _raw_row(app_id, store_data, review_data)
+
+    results = await asyncio.gather(*(fetch(app_id) for app_id in app_ids), return_exceptions=True)
+
+    rows: List[dict] = []
+    errors: Dict[str, str] = {}
+    for app_id, result in zip(app_ids, results):
+        if isinstance(result, Exception):
+            errors[app_id] = str(result)
+        else:
+            rows.append(result)
+    return rows, errors
+
+
+def _raw_row(app_id: str, store_data: dict, review_data: dict) -> dict:
+    entry = store_data.get(app_id) or {}
+    if not entry.get("success"):
+        raise ValueError(f"Store data unavailable for App ID: {app_id}")
+    if not review_data.get("success"):
+        raise ValueError(f"Failed to get review data for App ID: {app_id}")
+
+    game_data = entry.get("data") or {}
+    return {
+        "app_id": app_id,
+        "release_date": (game_data.get("release_date") or {}).get("date"),
+        "user_tags": [tag["description"] for tag in game_data.get("tags") or []],
+        "genres": [genre["description"] for genre in game_data.get("genres") or []],
+        "categories": [category["description"] for category in game_data.get("categories") or []],
+        "rating": (review_data.get("query_summary") or {}).get("review_score_desc"),
+        "fetched_at": datetime.now(timezone.utc),
+    }
+
+
+def parse_catalog(rows: List[dict]) -> pd.DataFrame:
+    """原始行 -> 快照列（app_id, recent_rating, tags, release_date, fetched_at），整列一次解析"""
+    frame = pd.DataFrame.from_records(rows, columns=RAW_COLUMNS)
+
+    # 两种格式各整列解析一次，无法解析的为 NaT，后一种格式只补前一种的空缺
+    dates = frame["release_date"].fillna("").str.replace(" ", "", regex=False)
+    parsed = pd.to_datetime(dates, format=DATE_FORMATS[0], errors="coerce")
+    for date_format in DATE_FORMATS[1:]:
+        parsed = parsed.fillna(pd.to_datetime(dates, format=date_format, errors="coerce"))
+    unparsed = int((parsed.isna() & (dates != "")).sum())
+    if unparsed:
+        logger.warning(f"{unparsed} release dates in unsupported formats, stored as missing")
+
+    return pd.DataFrame({
+        "app_id": frame["app_id"].astype(str),
+        "recent_rating": frame["rating"].map(RATING_MAP).fillna("暂无评价"),
+        "tags": extract_tags(frame),
+        "release_date": parsed.dt.date.astype(object).where(parsed.notna(), None),
+        # 快照按毫秒存储，先截断以免转换时因精度损失报错
+        "fetched_at": pd.to_datetime(frame["fetched_at"], utc=True).dt.floor("ms"),
+    })
+
+
+def extract_tags(frame: pd.DataFrame) -> pd.Series:
+    """
+    与 steam_meta._extract_tags 规则一致：有玩家标签时取前 10 个玩家标签，
+    否则取官方类型 + 分类去重后的前 10 个（appdetails 不返回玩家标签，实际总是后者）。展开为长表后分组处理，不逐行循环
+    """
+    parts = []
+    for source, column in enumerate(("user_tags", "genres", "categories")):
+        part = frame[["app_id", column]].explode(column).rename(columns={column: "tag"})
+        parts.append(part.assign(source=source))
+    long = pd.concat(parts, ignore_index=True).dropna(subset=["tag"])
+
+    has_user_tags = long.loc[long["source"] == 0, "app_id"].unique()
+    long = long[(long["source"] == 0) | ~long["app_id"].isin(has_user_tags)]
+    # concat 按来源顺序排列，保留的第一次出现即为优先级最高、位置最靠前的那个
+    long = long.drop_duplicates(["app_id", "tag"]).groupby("app_id", sort=False).head(MAX_TAGS)
+
+    tags = long.groupby("app_id", sort=False)["tag"].agg(list)
+    return frame["app_id"].map(tags).apply(lambda value: value if isinstance(value, list) else [])
+
+
+def merge_snapshot(existing: pa.Table, frame: pd.DataFrame) -> pa.Table:
+    """新抓取的行替换快照中相同 appid 的旧行"""
+    fresh = pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+    kept = existing.filter(pc.invert(pc.is_in(existing.column("app_id"), value_set=fresh.column("app_id"))))
+    return pa.concat_tables([kept, fresh])
+
+
+def stale_app_ids(existing: pa.Table, app_ids: Iterable[str], max_age: float) -> List[str]:
+    """快照中缺失或早于 max_age 秒前抓取的 appid"""
+    cutoff = time.time() - max_age
+    fetched = {
+        app_id: ts.timestamp()
+        for app_id, ts in zip(existing.column("app_id").to_pylist(), existing.column("fetched_at").to_pylist())
+    }
+    return [app_id for app_id in app_ids if fetched.get(app_id, 0.0) < cutoff]
+
+
+async def abuild_snapshot(
+    app_ids: Iterable[str],
+    path: Optional[str] = None,
+    concurrency: int = 16,
+    stale_only: bool = False,
+    chunk_size: int = 5000,
+) -> dict:
+    """
+    抓取并合并写入快照；每 chunk_size 个应用写一次，长时间运行中断时已完成的部分不会丢失
+    """
+    path = path or snapshot_path()
+    app_ids = list(dict.fromkeys(str(app_id) for app_id in app_ids))
+    snapshot = read_snapshot(path)
+    if stale_only:
+        app_ids = stale_app_ids(snapshot, app_ids, settings.STEAM_CATALOG_MAX_AGE)
+
+    stats = {"requested": len(app_ids), "written": 0, "failed": 0}
+    start = time.perf_counter()
+    try:
+        for i in range(0, len(app_ids), chunk_size):
+            rows, errors = await afetch_raw(app_ids[i:i + chunk_size], concurrency)
+            stats["failed"] += len(errors)
+            for app_id, error in list(errors.items())[:5]:
+                logger.warning(f"Failed to fetch Steam catalog data for App ID {app_id}: {error}")
+            if rows:
+                snapshot = merge_snapshot(snapshot, parse_catalog(rows))
+                write_snapshot(snapshot, path)
+                stats["written"] += len(rows)
+            logger.info(f"Steam catalog: {min(i + chunk_size, len(app_ids))}/{len(app_ids)} apps processed")
+    finally:
+        await aclose_async_client()
+
+    stats["rows"] = snapshot.num_rows
+    stats["elapsed"] = time.perf_counter() - start
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the offline Steam metadata snapshot")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="fetch apps and merge them into the snapshot")
+    build_parser.add_argument("--file", help="file with one Steam appid per line")
+    build_parser.add_argument("--from-app-id-map", action="store_true",
+                              help="include every appid in the local ITAD id <-> appid index")
+    build_parser.add_argument("--stale-only", action="store_true",
+                              help="skip apps fetched within STEAM_CATALOG_MAX_AGE")
+    build_parser.add_argument("--concurrency", type=int, default=settings.STEAM_CATALOG_CONCURRENCY)
+    build_parser.add_argument("--output", help="snapshot path (default: STEAM_CATALOG_PATH)")
+    subparsers.add_parser("stats", help="print snapshot statistics")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+
+    if args.command == "stats":
+        table = read_snapshot(snapshot_path())
+        print({
+            "path": snapshot_path(),
+            "rows": table.num_rows,
+            "stale": len(stale_app_ids(table, table.column("app_id").to_pylist(), settings.STEAM_CATALOG_MAX_AGE)),
+        })
+        return 0
+
+    app_ids: List[str] = []
+    if args.file:
+        with open(args.file, encoding="utf-8") as f:
+            app_ids.extend(line.strip() for line in f if line.strip())
+    if args.from_app_id_map:
+        from tools.app_id_map import get_app_id_map
+
+        settings.APP_ID_MAP_ENABLED = True
+        app_ids.extend(get_app_id_map().app_ids())
+
+    stats = asyncio.run(abuild_snapshot(app_ids, args.output, args.concurrency, args.stale_only))
+    logger.info(f"Steam catalog snapshot updated: {stats}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,16 +1,15 @@
-import requests
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Union
+from typing import Dict, Iterable, Tuple, Union
 from schemas.steam_result import SteamInfo
 from config.settings import settings
+from tools.http_client import arequest_json, request_json
+from tools.steam_snapshot import get_steam_snapshot
 from utils.logger import get_logger
 
 logger = get_logger(__name__)
 
-# Steam API 基础配置
-STORE_API_BASE = "https://store.steampowered.com/api"
-REVIEW_API_BASE = "https://store.steampowered.com/appreviews"
-
 # 评测等级映射
 RATING_MAP = {
     "Overwhelmingly Positive": "好评如潮",
@@ -24,6 +23,13 @@ RATING_MAP = {
     "Overwhelmingly Negative": "差评如潮"
 }
 
+# 精简模式下 appdetails 只返回这些字段（_extract_tags 与 _judge_release_type 所需）。
+# appdetails 不提供玩家标签（也没有对应的 filters 字段），标签实际来自官方类型 + 分类
+STORE_FIELDS = "genres,categories,release_date"
+
+# 商店数据与评测请求互相独立，用共享线程池并发发出
+_fetch_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="steam-meta")
+
 
 def get_steam_info(app_id: Union[str, int]) -> SteamInfo:
     """
@@ -35,18 +41,99 @@ def get_steam_info(app_id: Union[str, int]) -> SteamInfo:
     Returns:
         SteamInfo: 归一化的游戏信息对象
     """
+    # 离线快照中有足够新的数据时直接返回（见 tools.steam_catalog）
+    snapshot = get_steam_snapshot()
+    if snapshot is not None and (info := snapshot.get(app_id)) is not None:
+        return info
+
+    logger.info(f"Querying Steam info for App ID: {app_id}")
+
+    # 并发获取商店基础数据与近期评测
+    store_future = _fetch_executor.submit(_fetch_store_data, app_id)
+    rating_future = _fetch_executor.submit(_get_recent_rating, app_id, settings.STEAM_API_KEY)
+    store_data = store_future.result()
+    recent_rating = rating_future.result()
+
+    return _build_steam_info(app_id, store_data, recent_rating)
+
+
+async def aget_steam_info(app_id: Union[str, int]) -> SteamInfo:
+    """get_steam_info 的异步版本，商店数据与评测并发请求"""
+    snapshot = get_steam_snapshot()
+    if snapshot is not None and (info := snapshot.get(app_id)) is not None:
+        return info
 
     logger.info(f"Querying Steam info for App ID: {app_id}")
 
-    # 获取商店基础数据
-    store_data = _fetch_store_data(app_id)
+    store_data, recent_rating = await asyncio.gather(
+        _afetch_store_data(app_id),
+        _aget_recent_rating(app_id, settings.STEAM_API_KEY),
+    )
+
+    return _build_steam_info(app_id, store_data, recent_rating)
+
+
+def get_steam_info_many(
+    app_ids: Iterable[Union[str, int]],
+    max_concurrency: int = 8
+) -> Tuple[Dict[str, SteamInfo], Dict[str, str]]:
+    """
+    批量查询多个appID，最多 max_concurrency 个游戏同时请求
+
+    Returns:
+        (infos, errors): {appID: SteamInfo} 以及查询失败的 {appID: 错误信息}
+    """
+    unique_ids = list(dict.fromkeys(str(app_id) for app_id in app_ids))
+    infos: Dict[str, SteamInfo] = {}
+    errors: Dict[str, str] = {}
+    if not unique_ids:
+        return infos, errors
+
+    with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="steam-meta-many") as executor:
+        futures = {app_id: executor.submit(get_steam_info, app_id) for app_id in unique_ids}
+        for app_id, future in futures.items():
+            try:
+                infos[app_id] = future.result()
+            except Exception as e:
+                logger.warning(f"Failed to fetch Steam info for App ID {app_id}: {e}")
+                errors[app_id] = str(e)
+
+    return infos, errors
+
+
+async def aget_steam_info_many(
+    app_ids: Iterable[Union[str, int]],
+    max_concurrency: int = 8
+) -> Tuple[Dict[str, SteamInfo], Dict[str, str]]:
+    """get_steam_info_many 的异步版本"""
+    unique_ids = list(dict.fromkeys(str(app_id) for app_id in app_ids))
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def fetch(app_id: str) -> SteamInfo:
+        async with semaphore:
+            return await aget_steam_info(app_id)
+
+    results = await asyncio.gather(*(fetch(app_id) for app_id in unique_ids), return_exceptions=True)
+
+    infos: Dict[str, SteamInfo] = {}
+    errors: Dict[str, str] = {}
+    for app_id, result in zip(unique_ids, results):
+        if isinstance(result, Exception):
+            logger.warning(f"Failed to fetch Steam info for App ID {app_id}: {result}")
+            errors[app_id] = str(result)
+        else:
+            infos[app_id] = result
+
+    return infos, errors
+
+
+def _build_steam_info(app_id: Union[str, int], store_data: dict, recent_rating: str) -> SteamInfo:
     app_id_str = str(app_id)
     game_data = store_data[app_id_str]["data"]
 
     # 提取核心数据
     tags = _extract_tags(game_data)
     release_type = _judge_release_type(game_data)
-    recent_rating = _get_recent_rating(app_id, settings.STEAM_API_KEY)
 
     logger.info(f"Successfully fetched Steam info for App ID: {app_id}")
 
@@ -59,16 +146,23 @@ def get_steam_info(app_id: Union[str, int]) -> SteamInfo:
 
 def _fetch_store_data(app_id: Union[str, int]) -> dict:
     """获取Steam商店的游戏基础数据"""
-    url = f"{STORE_API_BASE}/appdetails"
+    return request_json("GET", f"{settings.STEAM_STORE_BASE_URL}/api/appdetails", params=_store_params(app_id), timeout=10)
+
+
+async def _afetch_store_data(app_id: Union[str, int]) -> dict:
+    return await arequest_json("GET", f"{settings.STEAM_STORE_BASE_URL}/api/appdetails", params=_store_params(app_id), timeout=10)
+
+
+def _store_params(app_id: Union[str, int]) -> dict:
     params = {
         "appids": app_id,
         "l": "schinese",
         "cc": "cn"
     }
-
-    resp = requests.get(url, params=params, timeout=10)
-    resp.raise_for_status()
-    return resp.json()
+    if settings.STEAM_SLIM_FETCH:
+        # 只请求用到的字段，跳过描述、截图、视频与配置需求等大块 HTML
+        params["filters"] = STORE_FIELDS
+    return params
 
 
 def _extract_tags(game_data: dict) -> list:
@@ -119,8 +213,17 @@ def _judge_release_type(game_data: dict) -> str:
 
 def _get_recent_rating(app_id: Union[str, int], api_key: str) -> str:
     """获取游戏近期评测等级"""
-    url = f"{REVIEW_API_BASE}/{app_id}"
-    params = {
+    data = request_json("GET", f"{settings.STEAM_STORE_BASE_URL}/appreviews/{app_id}", params=_review_params(api_key), timeout=10)
+    return _parse_recent_rating(app_id, data)
+
+
+async def _aget_recent_rating(app_id: Union[str, int], api_key: str) -> str:
+    data = await arequest_json("GET", f"{settings.STEAM_STORE_BASE_URL}/appreviews/{app_id}", params=_review_params(api_key), timeout=10)
+    return _parse_recent_rating(app_id, data)
+
+
+def _review_params(api_key: str) -> dict:
+    return {
         "json": 1,
         "filter": "recent",
         "language": "all",
@@ -130,13 +233,11 @@ def _get_recent_rating(app_id: Union[str, int], api_key: str) -> str:
         "key": api_key
     }
 
-    resp = requests.get(url, params=params, timeout=10)
-    resp.raise_for_status()
-    review_data = resp.json()
 
+def _parse_recent_rating(app_id: Union[str, int], review_data: dict) -> str:
     if not review_data.get("success"):
         raise ValueError(f"Failed to get review data for App ID: {app_id}")
 
     review_summary = review_data.get("query_summary", {})
     rating_en = review_summary.get("review_score_desc", "No Rating")
-    return RATING_MAP.get(rating_en, "暂无评价")
\ No newline at end of file
+    return RATING_MAP.get(rating_en, "暂无评价")
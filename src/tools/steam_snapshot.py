@@ -0,0 +1,150 @@
+"""
+Steam 元数据快照的读取端：由 tools.steam_catalog 离线批量生成的 Parquet 文件，
+get_steam_info 先查这里，命中且未超过 STEAM_CATALOG_MAX_AGE 时不再发起请求。
+
+快照保存发售日期而不是新作 / 老作判定，判定在读取时按当前日期计算，快照不会因此过期。
+文件被重新生成后按修改时间自动重新载入。
+"""
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional, Tuple, Union
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config.settings import settings
+from schemas.steam_result import SteamInfo
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SCHEMA = pa.schema([
+    ("app_id", pa.string()),
+    ("recent_rating", pa.string()),
+    ("tags", pa.list_(pa.string())),
+    ("release_date", pa.date32()),
+    ("fetched_at", pa.timestamp("ms", tz="UTC")),
+])
+
+
+class SteamSnapshot:
+    def __init__(self, path: str, max_age: float, reload_interval: float = 60.0):
+        """
+        max_age: 快照行的最大年龄（秒），超过后视为未命中，回退到实时请求
+        reload_interval: 检查文件是否被重新生成的最小间隔（秒）
+        """
+        self.path = path
+        self.max_age = max_age
+        self.reload_interval = reload_interval
+        self._lock = threading.Lock()
+        # app_id -> (recent_rating, tags, release_date, fetched_at 秒级时间戳)
+        self._rows: Dict[str, Tuple[str, list, Optional[date], float]] = {}
+        self._mtime = 0.0
+        self._checked_at = 0.0
+        self._stats = {"hits": 0, "misses": 0, "stale": 0, "reloads": 0}
+        self._maybe_reload(force=True)
+
+    def get(self, app_id: Union[str, int]) -> Optional[SteamInfo]:
+        self._maybe_reload()
+        row = self._rows.get(str(app_id))
+        if row is None:
+            self._count("misses")
+            return None
+        recent_rating, tags, release_date, fetched_at = row
+        if time.time() - fetched_at > self.max_age:
+            self._count("stale")
+            return None
+
+        self._count("hits")
+        return SteamInfo(recent_rating=recent_rating, tags=tags, release_type=release_type(release_date))
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["rows"] = len(self._rows)
+        lookups = stats["hits"] + stats["misses"] + stats["stale"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _maybe_reload(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.reload_interval:
+            return
+        with self._lock:
+            if not force and now - self._checked_at < self.reload_interval:
+                return
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except FileNotFoundError:
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                table = pq.read_table(self.path, memory_map=True, schema=SCHEMA)
+            except Exception as e:
+                logger.warning(f"Failed to load Steam catalog snapshot {self.path}: {e}")
+                return
+
+            fetched_at = [ts.timestamp() for ts in table.column("fetched_at").to_pylist()]
+            self._rows = dict(zip(
+                table.column("app_id").to_pylist(),
+                zip(
+                    table.column("recent_rating").to_pylist(),
+                    table.column("tags").to_pylist(),
+                    table.column("release_date").to_pylist(),
+                    fetched_at,
+                ),
+            ))
+            self._mtime = mtime
+            self._stats["reloads"] += 1
+        logger.info(f"Loaded Steam catalog snapshot with {len(self._rows)} apps from {self.path}")
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+
+def release_type(release_date: Optional[date]) -> str:
+    """一年内发售为新作，与 steam_meta._judge_release_type 的规则一致；没有日期时为暂无数据"""
+    if release_date is None:
+        return "暂无数据"
+    one_year_ago = (datetime.now() - timedelta(days=365)).date()
+    return "新作" if release_date >= one_year_ago else "老作"
+
+
+def read_snapshot(path: str) -> pa.Table:
+    """读取整个快照，文件不存在时返回空表"""
+    if not os.path.exists(path):
+        return SCHEMA.empty_table()
+    return pq.read_table(path, memory_map=True, schema=SCHEMA)
+
+
+def write_snapshot(table: pa.Table, path: str) -> None:
+    """按 app_id 排序后原子替换快照文件"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    table = table.cast(SCHEMA).sort_by("app_id")
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, path)
+
+
+def snapshot_path() -> str:
+    return settings.STEAM_CATALOG_PATH or os.path.join(settings.CACHE_DIR, "steam_catalog.parquet")
+
+
+_snapshot: Optional[SteamSnapshot] = None
+_snapshot_lock = threading.Lock()
+
+
+def get_steam_snapshot() -> Optional[SteamSnapshot]:
+    """进程内共享的快照；STEAM_CATALOG_ENABLED 未开启时返回 None（快照文件不存在时所有查询均未命中）"""
+    global _snapshot
+    if not settings.STEAM_CATALOG_ENABLED:
+        return None
+    with _snapshot_lock:
+        if _snapshot is None:
+            _snapshot = SteamSnapshot(snapshot_path(), max_age=settings.STEAM_CATALOG_MAX_AGE)
+        return _snapshot
@@ -0,0 +1,143 @@
+import csv
+import json
+import os
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set
+
+from config.settings import settings
+from utils.logger import get_logger
+from utils.text import normalize_keyword
+
+logger = get_logger(__name__)
+
+NGRAM_SIZES = (2, 3)
+
+
+class TitleIndex:
+    """
+    本地游戏标题索引：字符 n-gram + jieba 分词的倒排索引，返回按相似度排序的模糊匹配。
+
+    catalog 条目格式：{"id": str, "title": str, "type": str, "aliases": [str, ...]}
+    """
+
+    def __init__(self, entries: Iterable[Dict]):
+        self._entries: List[Dict] = []
+        # 每个名称（标题或别名）对应一个文档
+        self._doc_entry: List[int] = []
+        self._doc_features: List[Set[str]] = []
+        self._doc_names: List[str] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._exact: Dict[str, Set[int]] = defaultdict(set)
+
+        for entry in entries:
+            self._add(entry)
+
+        logger.info(f"Title index built with {len(self._entries)} games, {len(self._doc_names)} names")
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def search(self, keyword: str, limit: int = 10, min_score: float = 0.6) -> List[Dict]:
+        """返回与 search_games 相同格式的候选列表，按相似度降序"""
+        name = normalize_keyword(keyword)
+        if not name:
+            return []
+
+        scores: Dict[int, float] = {}
+        for entry_idx in self._exact.get(name, ()):
+            scores[entry_idx] = 1.0
+
+        query_features = _features(name)
+        if query_features:
+            overlaps: Dict[int, int] = defaultdict(int)
+            for feature in query_features:
+                for doc in self._postings.get(feature, ()):
+                    overlaps[doc] += 1
+
+            for doc, overlap in overlaps.items():
+                score = 2 * overlap / (len(query_features) + len(self._doc_features[doc]))
+                entry_idx = self._doc_entry[doc]
+                if score > scores.get(entry_idx, 0.0):
+                    scores[entry_idx] = score
+
+        ranked = sorted(
+            ((score, idx) for idx, score in scores.items() if score >= min_score),
+            key=lambda item: (-item[0], item[1])
+        )
+        return [dict(self._entries[idx]) for _, idx in ranked[:limit]]
+
+    def _add(self, entry: Dict) -> None:
+        entry_idx = len(self._entries)
+        self._entries.append({
+            "id": entry["id"],
+            "title": entry["title"],
+            "type": entry.get("type") or "game",
+        })
+
+        names = [entry["title"], *(entry.get("aliases") or [])]
+        for raw_name in dict.fromkeys(names):
+            name = normalize_keyword(raw_name)
+            if not name:
+                continue
+            doc = len(self._doc_names)
+            features = _features(name)
+            self._doc_names.append(name)
+            self._doc_entry.append(entry_idx)
+            self._doc_features.append(features)
+            self._exact[name].add(entry_idx)
+            for feature in features:
+                self._postings[feature].append(doc)
+
+
+def _features(name: str) -> Set[str]:
+    """字符 n-gram（去空白和标点） + jieba 分词结果"""
+    compact = "".join(ch for ch in name if ch.isalnum())
+    features = set()
+    for n in NGRAM_SIZES:
+        features.update(compact[i:i + n] for i in range(len(compact) - n + 1))
+    if len(compact) < min(NGRAM_SIZES):
+        features.add(compact)
+    features.update(f"w:{token}" for token in _tokenize(name))
+    return features
+
+
+def _tokenize(name: str) -> List[str]:
+    import jieba
+
+    return [token for token in jieba.lcut_for_search(name) if any(ch.isalnum() for ch in token)]
+
+
+def load_catalog(path: str) -> List[Dict]:
+    """读取 catalog 导出文件（.jsonl/.json/.csv），aliases 在 csv 中以 | 分隔"""
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            aliases = row.get("aliases") or ""
+            row["aliases"] = [alias for alias in aliases.split("|") if alias]
+        return rows
+
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".json"):
+            return json.load(f)
+        return [json.loads(line) for line in f if line.strip()]
+
+
+_title_index: Optional[TitleIndex] = None
+_title_index_loaded = False
+_title_index_lock = threading.Lock()
+
+
+def get_title_index() -> Optional[TitleIndex]:
+    """按 settings.TITLE_INDEX_PATH 加载的进程内索引；未配置时返回 None"""
+    global _title_index, _title_index_loaded
+    with _title_index_lock:
+        if not _title_index_loaded:
+            _title_index_loaded = True
+            path = settings.TITLE_INDEX_PATH
+            if path and os.path.exists(path):
+                _title_index = TitleIndex(load_catalog(path))
+            elif path:
+                logger.warning(f"Title index catalog not found: {path}")
+        return _title_index
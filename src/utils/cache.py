@@ -0,0 +1,199 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Set
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_MISSING = object()
+
+EVICTION_CHECK_INTERVAL = 100
+
+
+class TwoTierCache:
+    """
+    两级缓存：进程内 LRU（带 TTL） + SQLite 持久层（重启后仍可命中）
+
+    值必须可以 JSON 序列化。空结果（None / [] / {}）按 negative_ttl 缓存。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        path: Optional[str] = None,
+        ttl: float = 86400,
+        negative_ttl: Optional[float] = None,
+        max_entries: int = 1024,
+        max_disk_entries: Optional[int] = None,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.negative_ttl = ttl if negative_ttl is None else negative_ttl
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+
+        self._memory: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+        # 可重入：locked_connection 的调用方在锁内还可以调用 live_keys 等方法
+        self._lock = threading.RLock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "sets": 0, "evictions": 0}
+
+        self._conn = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+            )
+            self._conn.commit()
+
+    def get(self, key: str, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return value
+                del self._memory[key]
+
+            value = self._disk_get(key, now)
+            if value is _MISSING:
+                self._stats["misses"] += 1
+                return default
+
+            self._stats["disk_hits"] += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        if ttl is None:
+            ttl = self.ttl if value else self.negative_ttl
+        if ttl <= 0:
+            return
+
+        expires_at = time.time() + ttl
+        with self._lock:
+            self._stats["sets"] += 1
+            self._memory_put(key, expires_at, value)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                    (self.name, key, json.dumps(value, ensure_ascii=False), expires_at),
+                )
+                self._conn.commit()
+                # 每写入一定次数检查一次容量，避免每次 set 都 COUNT
+                if self.max_disk_entries and self._stats["sets"] % EVICTION_CHECK_INTERVAL == 0:
+                    self._evict_disk()
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._memory.pop(key, None)
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.name, key))
+                self._conn.commit()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM cache WHERE namespace = ?", (self.name,))
+                self._conn.commit()
+
+    def purge_expired(self) -> int:
+        """清理已过期的持久化条目，返回删除的行数"""
+        if self._conn is None:
+            return 0
+        with self._lock:
+            cur = self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?", (self.name, time.time())
+            )
+            self._conn.commit()
+            return cur.rowcount
+
+    def live_keys(self) -> Set[str]:
+        """未过期的全部键：有持久层时以持久层为准，否则为内存层"""
+        now = time.time()
+        with self._lock:
+            if self._conn is None:
+                return {key for key, (expires_at, _) in self._memory.items() if expires_at > now}
+            rows = self._conn.execute(
+                "SELECT key FROM cache WHERE namespace = ? AND expires_at > ?", (self.name, now)
+            )
+            return {key for (key,) in rows}
+
+    @contextmanager
+    def locked_connection(self) -> Iterator[Optional[sqlite3.Connection]]:
+        """
+        在缓存锁内使用持久层的连接（没有持久层时为 None），退出时提交。
+        供在同一文件中保存附属表的调用方复用，避免第二个连接并发写入导致 database is locked；
+        附属表不要使用 cache 这个表名
+        """
+        with self._lock:
+            yield self._conn
+            if self._conn is not None:
+                self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _memory_put(self, key: str, expires_at: float, value: Any) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _evict_disk(self) -> None:
+        """持久层超出 max_disk_entries 时，先清理过期条目，再按过期时间从早到晚淘汰"""
+        self._conn.execute(
+            "DELETE FROM cache WHERE namespace = ? AND expires_at <= ?", (self.name, time.time())
+        )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM cache WHERE namespace = ?", (self.name,)).fetchone()
+        overflow = count - self.max_disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM cache WHERE namespace = ? AND key IN ("
+                "SELECT key FROM cache WHERE namespace = ? ORDER BY expires_at LIMIT ?)",
+                (self.name, self.name, overflow),
+            )
+            self._stats["evictions"] += overflow
+        self._conn.commit()
+
+    def _disk_get(self, key: str, now: float) -> Any:
+        if self._conn is None:
+            return _MISSING
+
+        row = self._conn.execute(
+            "SELECT value, expires_at FROM cache WHERE namespace = ? AND key = ?", (self.name, key)
+        ).fetchone()
+        if row is None:
+            return _MISSING
+
+        raw, expires_at = row
+        if expires_at <= now:
+            self._conn.execute("DELETE FROM cache WHERE namespace = ? AND key = ?", (self.name, key))
+            self._conn.commit()
+            return _MISSING
+
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            logger.warning(f"Corrupted cache entry in {self.name}: {key}")
+            return _MISSING
+
+        # 回填内存层
+        self._memory_put(key, expires_at, value)
+        return value
@@ -0,0 +1,286 @@
+"""
+出站调用保护：按 host（以及 LLM）共享的令牌桶限流、带抖动的指数退避重试（遵循 Retry-After）与熔断器。
+
+限流配置格式（settings.HTTP_RATE_LIMITS）："api.isthereanydeal.com=5:10,store.steampowered.com=3"
+即 host=每秒请求数[:突发容量]；未配置的 host 不限流。
+"""
+import asyncio
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from config.settings import settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 可重试的状态码：限流与网关 / 服务端临时错误
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """熔断器处于打开状态，调用未发出即被拒绝"""
+
+
+class TokenBucket:
+    """线程安全的令牌桶；令牌不足时预占并返回需要等待的时间，同步与异步调用方共享同一个桶"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+    def pause(self, seconds: float) -> None:
+        """上游返回 429 时暂停整个桶，让所有并发调用方一起退让"""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+class CircuitBreaker:
+    """
+    连续失败 threshold 次后打开，cooldown 秒内直接拒绝；冷却结束后放行一个试探请求（半开），
+    成功则关闭，失败则重新打开；试探请求超过 cooldown 仍没有结果时同样重新打开，避免卡在半开状态
+    """
+
+    def __init__(self, threshold: int = 5, cooldown: float = 30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            now = time.monotonic()
+            if self.state == "open" and now - self._opened_at >= self.cooldown:
+                self.state = "half_open"
+                self._probe_at = now
+                return True
+            if self.state == "half_open" and now - self._probe_at >= self.cooldown:
+                self.state = "open"
+                self._opened_at = now
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+
+    def release_probe(self) -> None:
+        """试探请求被取消、没有结果：半开时回到打开且冷却已到期，下一次调用重新试探；其他状态不变"""
+        with self._lock:
+            if self.state == "half_open":
+                self.state = "open"
+                self._opened_at = time.monotonic() - self.cooldown
+
+    def record_failure(self) -> bool:
+        """记录一次失败，返回熔断器是否因此打开"""
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or (self.state == "closed" and self._failures >= self.threshold):
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                return True
+            return False
+
+
+class OutboundGuard:
+    """单个 host 的出站调用保护，并记录 throttled / retried / tripped 等指标"""
+
+    def __init__(
+        self,
+        name: str,
+        rate: float = 0.0,
+        burst: Optional[float] = None,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20.0,
+        breaker_threshold: int = 5,
+        breaker_cooldown: float = 30.0,
+    ):
+        self.name = name
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.bucket = TokenBucket(rate, burst) if rate > 0 else None
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0, "throttled": 0, "throttled_seconds": 0.0, "rate_limited": 0,
+            "retried": 0, "failures": 0, "tripped": 0, "rejected": 0, "cancelled": 0,
+        }
+
+    def before_attempt(self) -> None:
+        """同步调用方：检查熔断并按令牌桶等待"""
+        self._check_breaker()
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def abefore_attempt(self) -> None:
+        self._check_breaker()
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def throttle(self) -> None:
+        """只限流、不做熔断检查（供 LLM 客户端的 rate_limiter 使用）"""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def athrottle(self) -> None:
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def on_response(self, status: int, retry_after: Optional[str], attempt: int) -> Optional[float]:
+        """根据响应状态决定是否重试，返回退避秒数；不需要或不能再重试时返回 None"""
+        if status not in RETRY_STATUS:
+            self.breaker.record_success()
+            return None
+
+        if status == 429:
+            # 限流说明上游健康，按成功计入熔断（半开状态的试探请求由此关闭熔断器）
+            self.breaker.record_success()
+            self._count("rate_limited")
+            delay = parse_retry_after(retry_after)
+            if delay is not None and self.bucket is not None:
+                self.bucket.pause(delay)
+        else:
+            self._record_failure()
+            delay = None
+        return self._retry_delay(attempt, delay)
+
+    def on_error(self, attempt: int) -> Optional[float]:
+        """连接错误 / 超时：计入熔断，返回退避秒数或 None"""
+        self._record_failure()
+        return self._retry_delay(attempt, None)
+
+    def on_failure(self) -> None:
+        """不可重试的异常：只计入熔断，保证试探请求总有结果"""
+        self._record_failure()
+
+    def on_cancel(self) -> None:
+        """
+        调用被取消（如外层 wait_for 超时）或中断：不说明上游不健康，不计入失败次数，
+        只释放半开状态下的试探名额，避免熔断器卡在半开
+        """
+        self._count("cancelled")
+        self.breaker.release_probe()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "circuit": self.breaker.state}
+
+    def _retry_delay(self, attempt: int, retry_after: Optional[float]) -> Optional[float]:
+        if attempt >= self.max_retries or self.breaker.state == "open":
+            return None
+        self._count("retried")
+        if retry_after is not None:
+            return min(retry_after, self.backoff_max)
+        # full jitter：[0, min(max, base * 2^attempt)] 内均匀取值，避免并发调用方同步重试
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _check_breaker(self) -> None:
+        self._count("calls")
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"Circuit open for {self.name}")
+
+    def _reserve(self) -> float:
+        if self.bucket is None:
+            return 0.0
+        wait = self.bucket.reserve()
+        if wait > 0:
+            with self._lock:
+                self._stats["throttled"] += 1
+                self._stats["throttled_seconds"] += wait
+        return wait
+
+    def _record_failure(self) -> None:
+        self._count("failures")
+        if self.breaker.record_failure():
+            self._count("tripped")
+            logger.warning(f"Circuit opened for {self.name} after repeated failures")
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._stats[key] += 1
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-After 可以是秒数或 HTTP 日期"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, Optional[float]]]:
+    limits = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        host, value = item.split("=", 1)
+        rate, _, burst = value.partition(":")
+        limits[host.strip()] = (float(rate), float(burst) if burst else None)
+    return limits
+
+
+_guards: Dict[str, OutboundGuard] = {}
+_guards_lock = threading.Lock()
+
+
+def get_guard(name: str, rate: Optional[float] = None, burst: Optional[float] = None) -> OutboundGuard:
+    """
+    按名称（host 或 "llm"）共享的 OutboundGuard；未显式给出 rate 时取 HTTP_RATE_LIMITS 中的配置
+    """
+    with _guards_lock:
+        guard = _guards.get(name)
+        if guard is None:
+            if rate is None:
+                rate, burst = parse_rate_limits(settings.HTTP_RATE_LIMITS).get(name, (0.0, None))
+            guard = OutboundGuard(
+                name,
+                rate=rate,
+                burst=burst,
+                max_retries=settings.HTTP_MAX_RETRIES,
+                backoff_base=settings.HTTP_BACKOFF_BASE,
+                backoff_max=settings.HTTP_BACKOFF_MAX,
+                breaker_threshold=settings.HTTP_BREAKER_THRESHOLD,
+                breaker_cooldown=settings.HTTP_BREAKER_COOLDOWN,
+            )
+            _guards[name] = guard
+        return guard
+
+
+def outbound_stats() -> Dict[str, dict]:
+    with _guards_lock:
+        guards = list(_guards.values())
+    return {guard.name: guard.stats() for guard in guards}
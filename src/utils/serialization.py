@@ -0,0 +1,14 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+
+def to_jsonable(value: Any) -> Any:
+    """把图状态（含 pydantic 对象）转换为可 JSON 序列化的结构"""
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json")
+    if isinstance(value, dict):
+        return {key: to_jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_jsonable(item) for item in value]
+    return value
@@ -0,0 +1,25 @@
+import math
+from typing import Dict, Sequence
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    """最近秩法百分位数，q 取 0~100"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_latencies(samples: Sequence[float]) -> Dict[str, float]:
+    """返回 count / mean / p50 / p95 / p99 / max（单位与输入一致）"""
+    if not samples:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    return {
+        "count": len(samples),
+        "mean": sum(samples) / len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+        "max": max(samples),
+    }
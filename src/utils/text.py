@@ -0,0 +1,7 @@
+import unicodedata
+
+
+def normalize_keyword(keyword: str) -> str:
+    """统一全半角、大小写与空白，作为缓存键和索引键"""
+    keyword = unicodedata.normalize("NFKC", keyword)
+    return " ".join(keyword.casefold().split())
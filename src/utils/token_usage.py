@@ -0,0 +1,115 @@
+"""
+按 agent 汇总的 LLM token 用量与费用。
+
+优先使用模型返回的 usage_metadata；缺失时（如部分兼容接口不返回用量）用 tiktoken 在本地估算，
+并计入 estimated_calls。费用按 settings.LLM_PRICE_INPUT / LLM_PRICE_OUTPUT（每百万 token）计算。
+"""
+import json
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+from config.settings import settings
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+_lock = threading.Lock()
+_usage: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+
+def count_tokens(text: str) -> int:
+    """tiktoken cl100k_base 计数；编码表不可用（如离线）时按约 4 字符 / token、CJK 1 字 / token 估算"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    cjk = sum(1 for ch in text if ord(ch) > 0x2E80)
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+def estimate_usage(prompt: str, input: dict, result: Any) -> Dict[str, int]:
+    """由系统提示词、输入消息和最后一条模型消息估算一次调用的用量"""
+    messages = input.get("messages")
+    if not isinstance(messages, list):
+        messages = [messages]
+    input_tokens = count_tokens(prompt) + sum(count_tokens(str(getattr(m, "content", m))) for m in messages)
+
+    output_tokens = 0
+    reply = (result.get("messages") or [None])[-1] if isinstance(result, dict) else None
+    if reply is not None:
+        tool_calls = getattr(reply, "tool_calls", None) or []
+        output_tokens = count_tokens(str(reply.content)) + sum(
+            count_tokens(json.dumps(call.get("args", {}), ensure_ascii=False)) for call in tool_calls
+        )
+    return {"input_tokens": input_tokens, "output_tokens": output_tokens, "total_tokens": input_tokens + output_tokens}
+
+
+def record_usage(
+    agent: str,
+    usage: Dict[str, int],
+    latency: float,
+    estimated: bool = False,
+    cache_hit: bool = False,
+) -> None:
+    with _lock:
+        stats = _usage[agent]
+        stats["calls"] += 1
+        stats["latency_seconds"] += latency
+        stats["cache_hits"] += cache_hit
+        stats["estimated_calls"] += estimated
+        for key in ("input_tokens", "output_tokens"):
+            stats[key] += usage.get(key, 0)
+
+
+def usage_stats() -> Dict[str, dict]:
+    """{agent: {calls, input_tokens, output_tokens, cost, avg_latency_ms, ...}}，另含 total 汇总"""
+    with _lock:
+        snapshot = {agent: dict(stats) for agent, stats in _usage.items()}
+
+    total: Dict[str, float] = defaultdict(float)
+    for stats in snapshot.values():
+        for key, value in stats.items():
+            total[key] += value
+    if snapshot:
+        snapshot["total"] = dict(total)
+
+    for stats in snapshot.values():
+        for key in ("calls", "cache_hits", "estimated_calls", "input_tokens", "output_tokens"):
+            stats[key] = int(stats.get(key, 0))
+        llm_calls = stats["calls"] - stats["cache_hits"]
+        stats["avg_input_tokens"] = stats["input_tokens"] / llm_calls if llm_calls else 0.0
+        stats["avg_latency_ms"] = stats.pop("latency_seconds", 0.0) * 1000 / stats["calls"] if stats["calls"] else 0.0
+        stats["cost"] = round(usage_cost(stats), 6)
+    return snapshot
+
+
+def usage_cost(usage: Dict[str, Any]) -> float:
+    return (
+        usage.get("input_tokens", 0) * settings.LLM_PRICE_INPUT
+        + usage.get("output_tokens", 0) * settings.LLM_PRICE_OUTPUT
+    ) / 1_000_000
+
+
+def reset_usage() -> None:
+    with _lock:
+        _usage.clear()
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if _encoding_loaded:
+        return _encoding
+    with _encoding_lock:
+        if not _encoding_loaded:
+            try:
+                import tiktoken
+
+                _encoding = tiktoken.get_encoding("cl100k_base")
+            except Exception as e:
+                logger.warning(f"tiktoken unavailable, falling back to character-based token estimates: {e}")
+            _encoding_loaded = True
+    return _encoding
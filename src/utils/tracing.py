@@ -0,0 +1,245 @@
+"""
+链路追踪：图节点、外部 HTTP 调用与每次 agent 调用都会生成 OpenTelemetry span。
+
+设置 TRACE_FILE 后 span 以 JSONL 写入本地文件，可用以下命令查看各阶段 p50/p95/p99：
+    python -m utils.tracing summary traces.jsonl
+"""
+import argparse
+import functools
+import inspect
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+from config.settings import settings
+from utils.logger import get_logger
+from utils.stats import summarize_latencies
+from utils.token_usage import estimate_usage, record_usage
+
+logger = get_logger(__name__)
+
+tracer = trace.get_tracer("steam_price_agent")
+
+_setup_lock = threading.Lock()
+_configured = False
+
+
+class JsonlFileSpanExporter(SpanExporter):
+    """把结束的 span 追加写入 JSONL 文件"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = []
+        for span in spans:
+            lines.append(json.dumps({
+                "name": span.name,
+                "trace_id": format(span.context.trace_id, "032x"),
+                "span_id": format(span.context.span_id, "016x"),
+                "parent_id": format(span.parent.span_id, "016x") if span.parent else None,
+                "start": span.start_time,
+                "duration_ms": (span.end_time - span.start_time) / 1e6,
+                "status": span.status.status_code.name,
+                "attributes": dict(span.attributes or {}),
+            }, ensure_ascii=False, default=str))
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def setup_tracing(path: Optional[str] = None) -> bool:
+    """配置了 TRACE_FILE（或传入 path）时安装文件导出器；否则保持 OpenTelemetry 默认的空实现"""
+    global _configured
+    path = path or settings.TRACE_FILE
+    if not path:
+        return False
+
+    with _setup_lock:
+        if _configured:
+            return True
+        provider = TracerProvider()
+        provider.add_span_processor(BatchSpanProcessor(JsonlFileSpanExporter(path)))
+        trace.set_tracer_provider(provider)
+        _configured = True
+
+    logger.info(f"Tracing spans to {path}")
+    return True
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[trace.Span]:
+    with tracer.start_as_current_span(name) as current:
+        for key, value in attributes.items():
+            if value is not None:
+                current.set_attribute(key, value)
+        yield current
+
+
+def trace_node(name: str, func: Callable) -> Callable:
+    """包装图节点（同步或异步），记录节点耗时与输出规模"""
+    if inspect.iscoroutinefunction(func) or inspect.iscoroutinefunction(getattr(func, "func", None)):
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            with span(f"node.{name}", **{"graph.node": name}) as current:
+                update = await func(*args, **kwargs)
+                _record_update(current, update)
+                return update
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with span(f"node.{name}", **{"graph.node": name}) as current:
+            update = func(*args, **kwargs)
+            _record_update(current, update)
+            return update
+    return wrapper
+
+
+def _record_update(current: trace.Span, update: Any) -> None:
+    if not isinstance(update, dict):
+        return
+    for key, value in update.items():
+        if isinstance(value, (list, dict)):
+            current.set_attribute(f"output.{key}.count", len(value))
+    selection = update.get("selection")
+    if selection is not None and getattr(selection, "selected_ids", None) is not None:
+        current.set_attribute("output.selection.count", len(selection.selected_ids))
+
+
+def record_http(current: trace.Span, method: str, url: str, status: int, request_bytes: int, response_bytes: int) -> None:
+    current.set_attribute("http.method", method)
+    current.set_attribute("http.url", url)
+    current.set_attribute("http.status_code", status)
+    current.set_attribute("http.request.bytes", request_bytes)
+    current.set_attribute("http.response.bytes", response_bytes)
+
+
+class TracedAgent:
+    """
+    为 create_agent 返回的 agent 的每次调用生成 llm.<name> span，并按 agent 记录 token 用量与费用；
+    prompt 为系统提示词，模型未返回用量时用于本地估算
+    """
+
+    def __init__(self, agent: Any, name: str, prompt: str = ""):
+        self.agent = agent
+        self.name = name
+        self.prompt = prompt
+
+    def invoke(self, input: dict, config: Any = None, **kwargs) -> dict:
+        with span(f"llm.{self.name}", **_input_attributes(input)) as current:
+            start = time.perf_counter()
+            result = self.agent.invoke(input, config, **kwargs)
+            self._account(input, result, time.perf_counter() - start)
+            record_llm_usage(current, result)
+            return result
+
+    async def ainvoke(self, input: dict, config: Any = None, **kwargs) -> dict:
+        with span(f"llm.{self.name}", **_input_attributes(input)) as current:
+            start = time.perf_counter()
+            result = await self.agent.ainvoke(input, config, **kwargs)
+            self._account(input, result, time.perf_counter() - start)
+            record_llm_usage(current, result)
+            return result
+
+    def batch(self, inputs: list, config: Any = None, **kwargs) -> list:
+        with span(f"llm.{self.name}.batch", **{"llm.batch_size": len(inputs)}) as current:
+            start = time.perf_counter()
+            results = self.agent.batch(inputs, config, **kwargs)
+            self._account_batch(inputs, results, time.perf_counter() - start)
+            record_llm_usage(current, *results)
+            return results
+
+    async def abatch(self, inputs: list, config: Any = None, **kwargs) -> list:
+        with span(f"llm.{self.name}.batch", **{"llm.batch_size": len(inputs)}) as current:
+            start = time.perf_counter()
+            results = await self.agent.abatch(inputs, config, **kwargs)
+            self._account_batch(inputs, results, time.perf_counter() - start)
+            record_llm_usage(current, *results)
+            return results
+
+    def _account(self, input: dict, result: Any, latency: float) -> None:
+        if not isinstance(result, dict):
+            return
+        cache_hit = not result.get("messages")
+        usage = llm_usage(result)
+        estimated = not cache_hit and not usage.get("total_tokens")
+        if estimated:
+            usage = estimate_usage(self.prompt, input, result)
+        record_usage(self.name, usage, latency, estimated=estimated, cache_hit=cache_hit)
+
+    def _account_batch(self, inputs: list, results: list, elapsed: float) -> None:
+        # 并发执行的批次无法拆分单条耗时，按条数平摊
+        latency = elapsed / len(results) if results else 0.0
+        for input, result in zip(inputs, results):
+            self._account(input, result, latency)
+
+
+def _input_attributes(input: dict) -> dict:
+    messages = input.get("messages")
+    if not isinstance(messages, list):
+        messages = [messages]
+    chars = sum(len(str(getattr(message, "content", message))) for message in messages)
+    return {"llm.input.chars": chars}
+
+
+def record_llm_usage(current: trace.Span, *results: Any) -> Dict[str, int]:
+    """汇总 agent 结果中各 AIMessage 的 usage_metadata 并写入 span（缓存命中时没有 messages）"""
+    usage = llm_usage(*results)
+    current.set_attribute("llm.cache_hit", not any(isinstance(r, dict) and r.get("messages") for r in results))
+    for key, value in usage.items():
+        current.set_attribute(f"llm.usage.{key}", value)
+    return usage
+
+
+def llm_usage(*results: Any) -> Dict[str, int]:
+    usage: Dict[str, int] = defaultdict(int)
+    for result in results:
+        if not isinstance(result, dict):
+            continue
+        for message in result.get("messages") or []:
+            metadata = getattr(message, "usage_metadata", None) or {}
+            for key in ("input_tokens", "output_tokens", "total_tokens"):
+                usage[key] += metadata.get(key, 0) or 0
+    return dict(usage)
+
+
+def summarize_trace_file(path: str) -> Dict[str, dict]:
+    durations: Dict[str, list] = defaultdict(list)
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                durations[record["name"]].append(record["duration_ms"])
+    return {name: summarize_latencies(samples) for name, samples in sorted(durations.items())}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tracing utilities")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    summary_parser = subparsers.add_parser("summary", help="print p50/p95/p99 per stage")
+    summary_parser.add_argument("path", nargs="?", default=settings.TRACE_FILE)
+    args = parser.parse_args()
+
+    summary = summarize_trace_file(args.path)
+    print(f"{'stage':<32}{'count':>8}{'p50 ms':>12}{'p95 ms':>12}{'p99 ms':>12}{'max ms':>12}")
+    for name, stats in summary.items():
+        print(
+            f"{name:<32}{stats['count']:>8}{stats['p50']:>12.1f}{stats['p95']:>12.1f}"
+            f"{stats['p99']:>12.1f}{stats['max']:>12.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+"""
+关注列表轮询：不经过图与 LLM，直接用 /games/overview/v2 按最大分块批量刷新关注游戏的价格，
+与上一次快照比较后只输出发生变化的价格（JSONL，每行一个 PriceChange）。
+
+一个周期内的请求均匀分布在 interval 内，且请求间隔不小于 1 / max_rps；
+10k 个游戏每轮只需 50 次请求（每次 200 个 id）。
+
+用法（在 src 目录下）：
+    python main.py watch add <itad_id> ... | --file ids.txt
+    python main.py watch remove <itad_id> ...
+    python main.py watch list
+    python main.py watch run --interval 3600 --output changes.jsonl
+    python main.py watch run --once
+"""
+import argparse
+import asyncio
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from typing import Awaitable, Callable, Dict, IO, Iterable, List, Optional
+
+from config.settings import settings
+from schemas.price_change import PriceChange
+from schemas.price_result import PriceInfo
+from tools.itad_price import OVERVIEW_CHUNK_SIZE, afetch_price_map
+from utils.logger import setup_logging, get_logger
+from utils.tracing import setup_tracing
+
+logger = get_logger(__name__)
+
+PRICE_FIELDS = ("store", "current_price", "historical_low", "discount_percent")
+
+
+class WatchlistStore:
+    """SQLite 持久化的关注列表，以及每个游戏最近一次的价格快照"""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS watchlist (game_id TEXT PRIMARY KEY, added_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot ("
+            "game_id TEXT PRIMARY KEY, store TEXT NOT NULL, current_price REAL NOT NULL, "
+            "historical_low REAL NOT NULL, discount_percent INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def add(self, game_ids: Iterable[str]) -> int:
+        now = time.time()
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO watchlist (game_id, added_at) VALUES (?, ?)",
+                [(game_id, now) for game_id in dict.fromkeys(game_ids)],
+            )
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def remove(self, game_ids: Iterable[str]) -> int:
+        rows = [(game_id,) for game_id in dict.fromkeys(game_ids)]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany("DELETE FROM watchlist WHERE game_id = ?", rows)
+            self._conn.executemany("DELETE FROM snapshot WHERE game_id = ?", rows)
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def game_ids(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT game_id FROM watchlist ORDER BY added_at, game_id")]
+
+    def snapshot(self, game_ids: List[str]) -> Dict[str, PriceInfo]:
+        prices: Dict[str, PriceInfo] = {}
+        with self._lock:
+            # SQLite 单条语句的参数个数有限，分块查询
+            for i in range(0, len(game_ids), 500):
+                chunk = game_ids[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT game_id, {', '.join(PRICE_FIELDS)} FROM snapshot "
+                    f"WHERE game_id IN ({', '.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for game_id, *values in rows:
+                    prices[game_id] = PriceInfo(game_id=game_id, **dict(zip(PRICE_FIELDS, values)))
+        return prices
+
+    def update_snapshot(self, price_infos: Iterable[PriceInfo], updated_at: Optional[float] = None) -> None:
+        updated_at = updated_at or time.time()
+        rows = [
+            (p.game_id, p.store, p.current_price, p.historical_low, p.discount_percent, updated_at)
+            for p in price_infos
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO snapshot "
+                "(game_id, store, current_price, historical_low, discount_percent, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def diff_prices(
+    previous: Dict[str, PriceInfo],
+    current: Dict[str, PriceInfo],
+    observed_at: Optional[float] = None,
+) -> List[PriceChange]:
+    """与上次快照比较，返回价格、折扣、史低或商店发生变化（以及首次出现）的游戏"""
+    observed_at = observed_at or time.time()
+    changes = []
+    for game_id, price_info in current.items():
+        before = previous.get(game_id)
+        if before is None or any(getattr(before, f) != getattr(price_info, f) for f in PRICE_FIELDS):
+            changes.append(PriceChange(game_id=game_id, previous=before, current=price_info, observed_at=observed_at))
+    return changes
+
+
+class WatchlistPoller:
+    def __init__(
+        self,
+        store: WatchlistStore,
+        interval: float = 3600,
+        max_rps: float = 2.0,
+        chunk_size: int = OVERVIEW_CHUNK_SIZE,
+        fetch: Callable[[List[str]], Awaitable[Dict[str, PriceInfo]]] = afetch_price_map,
+    ):
+        """
+        interval: 每轮扫描的周期（秒），一轮内的请求均匀分布在该周期内
+        max_rps: 每秒最多发出的 overview 请求数
+        """
+        self.store = store
+        self.interval = interval
+        self.max_rps = max_rps
+        self.chunk_size = chunk_size
+        self._fetch = fetch
+
+    async def sweep(
+        self,
+        on_change: Callable[[PriceChange], None],
+        spread: bool = True,
+    ) -> dict:
+        """扫描一轮关注列表；spread=False 时只受 max_rps 限制，尽快完成"""
+        game_ids = self.store.game_ids()
+        chunks = [game_ids[i:i + self.chunk_size] for i in range(0, len(game_ids), self.chunk_size)]
+        spacing = 1 / self.max_rps if self.max_rps > 0 else 0.0
+        if spread and chunks:
+            spacing = max(spacing, self.interval / len(chunks))
+
+        stats = {"games": len(game_ids), "requests": 0, "failed_requests": 0, "fetched": 0, "missing": 0, "changed": 0}
+        start = time.monotonic()
+        for index, chunk in enumerate(chunks):
+            delay = start + index * spacing - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+
+            stats["requests"] += 1
+            try:
+                current = await self._fetch(chunk)
+            except Exception as e:
+                # 失败的分块留到下一轮重试
+                stats["failed_requests"] += 1
+                logger.warning(f"Watchlist chunk {index + 1}/{len(chunks)} failed: {e}")
+                continue
+
+            observed_at = time.time()
+            changes = diff_prices(self.store.snapshot(chunk), current, observed_at)
+            self.store.update_snapshot((change.current for change in changes), observed_at)
+            for change in changes:
+                on_change(change)
+
+            stats["fetched"] += len(current)
+            stats["missing"] += len(chunk) - len(current)
+            stats["changed"] += len(changes)
+
+        stats["elapsed"] = time.monotonic() - start
+        logger.info(f"Watchlist sweep finished: {stats}")
+        return stats
+
+    async def run(self, on_change: Callable[[PriceChange], None], once: bool = False) -> None:
+        while True:
+            started = time.monotonic()
+            await self.sweep(on_change, spread=not once)
+            if once:
+                return
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+
+def _write_change(out: IO[str]) -> Callable[[PriceChange], None]:
+    def write(change: PriceChange) -> None:
+        out.write(json.dumps(change.model_dump(mode="json"), ensure_ascii=False) + "\n")
+        out.flush()
+    return write
+
+
+async def _run_and_close(poller: WatchlistPoller, out: IO[str], once: bool) -> None:
+    from tools.http_client import aclose_async_client
+
+    try:
+        await poller.run(_write_change(out), once=once)
+    finally:
+        await aclose_async_client()
+
+
+def get_watchlist_store() -> WatchlistStore:
+    return WatchlistStore(settings.WATCHLIST_PATH or os.path.join(settings.CACHE_DIR, "watchlist.sqlite"))
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Refresh watchlist prices in bulk without LLM calls")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    add_parser = subparsers.add_parser("add", help="add ITAD game ids to the watchlist")
+    add_parser.add_argument("game_ids", nargs="*")
+    add_parser.add_argument("--file", help="file with one ITAD game id per line")
+
+    remove_parser = subparsers.add_parser("remove", help="remove ITAD game ids from the watchlist")
+    remove_parser.add_argument("game_ids", nargs="+")
+
+    subparsers.add_parser("list", help="print the watchlist")
+
+    run_parser = subparsers.add_parser("run", help="poll prices and emit changes as JSONL")
+    run_parser.add_argument("--interval", type=float, default=settings.WATCHLIST_INTERVAL)
+    run_parser.add_argument("--max-rps", type=float, default=settings.WATCHLIST_MAX_RPS)
+    run_parser.add_argument("--once", action="store_true", help="run a single sweep as fast as allowed")
+    run_parser.add_argument("--output", default="-", help="JSONL changes file, '-' for stdout")
+    args = parser.parse_args(argv)
+
+    setup_logging()
+    setup_tracing()
+    store = get_watchlist_store()
+
+    try:
+        if args.command == "add":
+            game_ids = list(args.game_ids)
+            if args.file:
+                with open(args.file, encoding="utf-8") as f:
+                    game_ids.extend(line.strip() for line in f if line.strip())
+            logger.info(f"Added {store.add(game_ids)} games to the watchlist")
+        elif args.command == "remove":
+            logger.info(f"Removed {store.remove(args.game_ids)} games from the watchlist")
+        elif args.command == "list":
+            for game_id in store.game_ids():
+                print(game_id)
+        else:
+            poller = WatchlistPoller(store, interval=args.interval, max_rps=args.max_rps)
+            out = sys.stdout if args.output == "-" else open(args.output, "a", encoding="utf-8")
+            try:
+                asyncio.run(_run_and_close(poller, out, args.once))
+            except KeyboardInterrupt:
+                pass
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
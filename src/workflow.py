@@ -1,38 +1,29 @@
-from langchain_deepseek import ChatDeepSeek
-
-from agent.game_entity_resolver import GameEntityResolver
-from agent.decision import PurchaseDecisionAgent
-from schemas.price_result import PriceInfo
-from agent.candidate_selector import CandidateSelectorAgent
 from tools.itad_price import game_price
 from tools.itad_search import search_games
 
-from config.settings import Settings
 from utils.logger import setup_logging,get_logger
 
 logger = get_logger(__name__)
 
-def create_llm():
-    return ChatDeepSeek(
-        model="deepseek-chat",
-        temperature=0.2,
-        api_key=Settings.DEEPSEEK_API_KEY
-    )
-
 
-def steam_price_workflow(user_query: str):
+def steam_price_workflow(user_query: str, agents=None):
     """
     High-level workflow orchestrating:
     - entity resolution
     - candidate selection
     - price aggregation
     - purchase decision
+
+    agents: 复用的 agents，默认使用进程内共享运行时创建的 agents
     """
-    llm = create_llm()
-    
-    resolver = GameEntityResolver(llm)
-    decision_agent = PurchaseDecisionAgent(llm)
-    selector = CandidateSelectorAgent(llm)
+    if agents is None:
+        from runtime import get_runtime
+
+        agents = get_runtime().agents
+
+    resolver = agents["resolver"]
+    decision_agent = agents["decision"]
+    selector = agents["selector"]
     # 1. 搜索候选游戏
     game_entity = resolver.resolve(user_query)
     